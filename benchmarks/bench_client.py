@@ -0,0 +1,262 @@
+"""Benchmark SpotifyClient and spotify_app against the local mock API
+
+Usage:
+
+    python benchmarks/bench_client.py request --total 5000 --concurrency 50
+    python benchmarks/bench_client.py update_auth --users 100
+    python benchmarks/bench_client.py oauth --output oauth.json
+    python benchmarks/bench_client.py --compare old.json new.json
+
+Each run prints a summary and, with ``--output``, saves the results as JSON
+so that runs can be compared using ``--compare``.
+
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import secrets
+import socket
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Mapping
+
+from aiohttp import ClientSession, web
+
+import aiohttp_spotify
+from aiohttp_spotify import SpotifyAuth
+from aiohttp_spotify.mock_api import (
+    generate_fixtures,
+    issue_tokens,
+    mock_api_app,
+)
+
+SCENARIOS = ("request", "update_auth", "oauth")
+METRICS = ("requests_per_second", "p50_ms", "p95_ms", "p99_ms")
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def drive(
+    operation: Callable[[int], Awaitable[None]], total: int, concurrency: int
+) -> Dict[str, Any]:
+    """Run ``operation`` ``total`` times with ``concurrency`` workers"""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    indices = iter(range(total))
+
+    async def worker() -> None:
+        for index in indices:
+            start = time.perf_counter()
+            try:
+                await operation(index)
+            except Exception as error:
+                name = type(error).__name__
+                errors[name] = errors.get(name, 0) + 1
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return dict(
+        operations=total,
+        succeeded=len(latencies),
+        errors=errors,
+        elapsed_s=elapsed,
+        requests_per_second=len(latencies) / elapsed,
+        p50_ms=1000 * percentile(latencies, 0.50),
+        p95_ms=1000 * percentile(latencies, 0.95),
+        p99_ms=1000 * percentile(latencies, 0.99),
+    )
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    client_id = secrets.token_urlsafe()
+    client_secret = secrets.token_urlsafe()
+    redirect_uri = f"{base_url}/spotify/callback"
+
+    mock = mock_api_app(
+        client_id,
+        client_secret,
+        redirect_uri,
+        fixtures=generate_fixtures(num_tracks=200, num_playlists=1),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        retry_after=args.retry_after,
+        token_lifetime=args.token_lifetime,
+        seed=args.seed,
+    )
+    spotify = aiohttp_spotify.spotify_app(
+        client_id=client_id,
+        client_secret=client_secret,
+        redirect_uri=redirect_uri,
+        auth_url=f"{base_url}/api/authorize",
+        token_url=f"{base_url}/api/token",
+        api_url=f"{base_url}/api/api",
+        connector_options=dict(limit=args.connections),
+    )
+    app = web.Application()
+    app.add_subapp("/spotify", spotify)
+    app.add_subapp("/api", mock)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    try:
+        client = spotify["spotify_client"]
+        session = spotify["spotify_client_session"]
+        users: List[SpotifyAuth] = []
+        for _ in range(args.users):
+            tokens = issue_tokens(mock)
+            users.append(
+                SpotifyAuth(
+                    tokens["access_token"],
+                    tokens["refresh_token"],
+                    int(time.time()) + tokens["expires_in"],
+                )
+            )
+
+        async def request(index: int) -> None:
+            user = index % len(users)
+            response = await client.request(
+                session, users[user], args.endpoint
+            )
+            if response.auth_changed:
+                users[user] = response.auth
+
+        # Every refresh uses its own refresh token so that each operation is
+        # a round trip to the token endpoint, instead of joining a refresh
+        # that is in flight or reusing one that was just cached
+        refresh_tokens: List[str] = []
+        if args.scenario == "update_auth":
+            refresh_tokens = [
+                issue_tokens(mock)["refresh_token"] for _ in range(args.total)
+            ]
+
+        async def update_auth(index: int) -> None:
+            await client.update_auth(
+                session, SpotifyAuth("", refresh_tokens[index], 0)
+            )
+
+        async def oauth(index: int) -> None:
+            async with browser.get(f"{base_url}/spotify/auth") as response:
+                await response.read()
+                response.raise_for_status()
+
+        operation = dict(
+            request=request, update_auth=update_auth, oauth=oauth
+        )[args.scenario]
+
+        async with ClientSession() as browser:
+            if args.trace_allocations:
+                tracemalloc.start()
+            results = await drive(operation, args.total, args.concurrency)
+            if args.trace_allocations:
+                current, peak = tracemalloc.get_traced_memory()
+                blocks = sum(
+                    stat.count
+                    for stat in tracemalloc.take_snapshot().statistics(
+                        "filename"
+                    )
+                )
+                tracemalloc.stop()
+                results.update(
+                    alloc_current_bytes=current,
+                    alloc_peak_bytes=peak,
+                    alloc_blocks=blocks,
+                )
+        results.update(
+            (f"mock_{k}", v) for k, v in sorted(mock["stats"].items())
+        )
+        return results
+    finally:
+        await runner.cleanup()
+
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path) as f:
+        old = json.load(f)["results"]
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+    print(f"{'metric':>24} {'old':>12} {'new':>12} {'change':>8}")
+    for key in sorted(set(old) & set(new)):
+        if not isinstance(old[key], (int, float)) or not old[key]:
+            continue
+        change = 100 * (new[key] - old[key]) / old[key]
+        print(f"{key:>24} {old[key]:12.2f} {new[key]:12.2f} {change:7.1f}%")
+
+
+def report(results: Mapping[str, Any]) -> None:
+    for key, value in results.items():
+        if isinstance(value, float):
+            value = f"{value:.2f}"
+        print(f"{key:>24}: {value}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("scenario", nargs="?", choices=SCENARIOS)
+    parser.add_argument("--total", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--endpoint", default="/me")
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--token-lifetime", type=int, default=3600)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--trace-allocations", action="store_true")
+    parser.add_argument("--output", help="Save the results to this file")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare runs"
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.scenario is None:
+        parser.error("a scenario is required")
+
+    results = asyncio.run(run(args))
+    report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                dict(
+                    scenario=args.scenario,
+                    timestamp=time.time(),
+                    python=sys.version,
+                    platform=platform.platform(),
+                    version=aiohttp_spotify.__version__,
+                    args=vars(args),
+                    results=results,
+                ),
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark decoding large responses with SpotifyResponse.json
+
+Usage:
+
+    python benchmarks/bench_json.py --tracks 10000 --calls 5
+
+"""
+
+import argparse
+import json
+import time
+import timeit
+
+from aiohttp_spotify import SpotifyAuth, SpotifyResponse, fast_json_loads
+
+
+def playlist_body(num_tracks: int) -> bytes:
+    """Build a playlist items page similar to the ones returned by Spotify"""
+    items = []
+    for n in range(num_tracks):
+        artist = dict(
+            id=f"artist{n % 500}",
+            name=f"Artist {n % 500}",
+            type="artist",
+            uri=f"spotify:artist:artist{n % 500}",
+        )
+        album = dict(
+            id=f"album{n % 2000}",
+            name=f"Album {n % 2000}",
+            album_type="album",
+            artists=[artist],
+            release_date="2020-01-01",
+            total_tracks=12,
+            uri=f"spotify:album:album{n % 2000}",
+        )
+        track = dict(
+            id=f"track{n}",
+            name=f"Track {n}",
+            album=album,
+            artists=[artist],
+            duration_ms=200000 + n,
+            explicit=False,
+            popularity=n % 100,
+            track_number=n % 12 + 1,
+            uri=f"spotify:track:track{n}",
+        )
+        items.append(dict(added_at="2020-01-01T00:00:00Z", track=track))
+    return json.dumps(
+        dict(items=items, offset=0, limit=num_tracks, total=num_tracks)
+    ).encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=10000)
+    parser.add_argument("--calls", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    body = playlist_body(args.tracks)
+    auth = SpotifyAuth("access", "refresh", int(time.time()) + 3600)
+    print(f"body size: {len(body) / 1024 / 1024:.1f} MB")
+
+    def run(loads, memoize):
+        response = SpotifyResponse(False, auth, 200, {}, body)
+        response.loads = loads
+        for _ in range(args.calls):
+            if memoize:
+                response.json()
+            else:
+                loads(response.body)
+
+    cases = [
+        ("json.loads, no memo", json.loads, False),
+        ("json.loads, memo", json.loads, True),
+        ("fast_json_loads, memo", fast_json_loads, True),
+    ]
+    for name, loads, memoize in cases:
+        best = min(
+            timeit.repeat(
+                lambda: run(loads, memoize), number=1, repeat=args.repeat
+            )
+        )
+        print(f"{name:>24}: {1000 * best:8.1f} ms for {args.calls} calls")
+
+
+if __name__ == "__main__":
+    main()
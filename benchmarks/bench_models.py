@@ -0,0 +1,56 @@
+"""Compare the memory used to hold tracks as dicts and as compact models
+
+Usage:
+
+    python benchmarks/bench_models.py --tracks 100000
+
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+from typing import Any, Callable
+
+from bench_json import playlist_body
+
+from aiohttp_spotify import ModelDecoder
+
+
+def measure(build: Callable[[], Any]) -> int:
+    """The number of bytes still allocated by the object returned by build"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=100000)
+    args = parser.parse_args()
+
+    body = playlist_body(args.tracks)
+
+    def as_dicts():
+        return json.loads(body)["items"]
+
+    def as_models():
+        decoder = ModelDecoder()
+        page = decoder.paging(json.loads(body), decoder.track_item)
+        return decoder, list(page.items)
+
+    dicts = measure(as_dicts)
+    models = measure(as_models)
+    print(f"tracks: {args.tracks}")
+    print(f"  dicts: {dicts / 1024 / 1024:8.1f} MB")
+    print(f" models: {models / 1024 / 1024:8.1f} MB")
+    print(f"  ratio: {dicts / models:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,7 +22,8 @@ CLASSIFIERS = [
     "Programming Language :: Python",
     "Programming Language :: Python :: 3",
 ]
-INSTALL_REQUIRES = ["aiohttp"]
+INSTALL_REQUIRES = ["aiohttp>=3.10"]
+EXTRAS_REQUIRE = {"fast": ["orjson"], "numpy": ["numpy"]}
 
 # END PROJECT SPECIFIC
 
@@ -66,6 +67,7 @@ if __name__ == "__main__":
         package_dir={"": "src"},
         include_package_data=True,
         install_requires=INSTALL_REQUIRES,
+        extras_require=EXTRAS_REQUIRE,
         classifiers=CLASSIFIERS,
         zip_safe=False,
         options={"bdist_wheel": {"universal": "1"}},
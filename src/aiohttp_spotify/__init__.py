@@ -4,11 +4,63 @@ __all__ = [
     "SpotifyAuth",
     "SpotifyClient",
     "SpotifyResponse",
+    "RateLimiter",
+    "AdaptiveLimiter",
+    "SQLiteRateLimitCoordinator",
+    "RetryPolicy",
+    "RequestScheduler",
+    "RequestShed",
+    "Paginator",
+    "BatchLoader",
+    "BulkResult",
+    "ChunkResult",
+    "add_to_playlist",
+    "remove_from_playlist",
+    "save_to_library",
+    "remove_from_library",
+    "ExportResult",
+    "export_library",
+    "export_users",
+    "FeatureArray",
+    "fetch_audio_features",
+    "fetch_numeric",
+    "ResponseCache",
+    "fast_json_loads",
+    "SpotifyStream",
+    "ModelDecoder",
+    "SpotifyMetrics",
+    "TokenRefresher",
+    "TokenStore",
+    "MemoryTokenStore",
+    "SQLiteTokenStore",
+    "OAuthState",
 ]
 
 from .aiohttp_spotify_version import __version__
-from .api import SpotifyAuth, SpotifyClient, SpotifyResponse
+from .api import SpotifyAuth, SpotifyClient, SpotifyResponse, fast_json_loads
 from .app import spotify_app
+from .batch import BatchLoader
+from .bulk import (
+    BulkResult,
+    ChunkResult,
+    add_to_playlist,
+    remove_from_library,
+    remove_from_playlist,
+    save_to_library,
+)
+from .cache import ResponseCache
+from .export import ExportResult, export_library, export_users
+from .features import FeatureArray, fetch_audio_features, fetch_numeric
+from .metrics import SpotifyMetrics
+from .models import ModelDecoder
+from .paging import Paginator
+from .ratelimit import AdaptiveLimiter, RateLimiter, SQLiteRateLimitCoordinator
+from .refresher import TokenRefresher
+from .retry import RetryPolicy
+from .scheduler import RequestScheduler, RequestShed
+from .state import OAuthState
+from .store import MemoryTokenStore, SQLiteTokenStore, TokenStore
+from .streaming import SpotifyStream
 
 __uri__ = "https://github.com/dfm/aiohttp_spotify"
 __author__ = "Daniel Foreman-Mackey"
@@ -0,0 +1,61 @@
+__all__ = ["SQLiteExecutor"]
+
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SQLiteExecutor:
+    """Run the queries for one SQLite database on a dedicated thread
+
+    Args:
+        path (str): The path to the database file
+        setup (Callable): Called with the new connection to create the tables
+
+    """
+
+    def __init__(
+        self, path: str, setup: Callable[[sqlite3.Connection], None]
+    ) -> None:
+        self.path = path
+        self.setup = setup
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._connection: Optional[sqlite3.Connection] = None
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Call ``func(connection, *args)`` on the database thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._call, func, args
+        )
+
+    async def fetch(
+        self, query: str, params: Sequence[Any] = ()
+    ) -> List[Tuple[Any, ...]]:
+        """Execute a query and fetch all of the rows"""
+        return await self.run(
+            lambda connection: connection.execute(query, params).fetchall()
+        )
+
+    async def close(self) -> None:
+        """Close the connection and stop the thread"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._close)
+        self._executor.shutdown(wait=True)
+
+    def _call(self, func: Callable[..., T], args: Sequence[Any]) -> T:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.setup(connection)
+            connection.commit()
+            self._connection = connection
+        return func(self._connection, *args)
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -1,12 +1,66 @@
-__all__ = ["SpotifyAuth", "SpotifyResponse", "SpotifyClient"]
+__all__ = [
+    "SpotifyAuth",
+    "SpotifyResponse",
+    "SpotifyClient",
+    "fast_json_loads",
+]
 
 import asyncio
 import json
 import time
-from typing import Any, Iterable, Mapping, NamedTuple, Optional
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import yarl
-from aiohttp import ClientSession
+from aiohttp import (
+    ClientConnectionError,
+    ClientPayloadError,
+    ClientResponse,
+    ClientSession,
+    ClientTimeout,
+)
+
+from .batch import BatchEndpoint, BatchLoader
+from .cache import ResponseCache
+from .metrics import SpotifyMetrics
+from .paging import Paginator
+from .ratelimit import AdaptiveLimiter, RateLimiter
+from .retry import RetryPolicy
+from .scheduler import RequestScheduler
+from .streaming import SpotifyStream
+
+if TYPE_CHECKING:
+    from .refresher import TokenRefresher
+    from .store import TokenStore
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+JSONLoads = Callable[[Union[bytes, str]], Any]
+
+
+def fast_json_loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON using orjson if it is installed or the standard library"""
+    if orjson is None:
+        return json.loads(data)
+    return orjson.loads(data)
 
 
 class SpotifyAuth(NamedTuple):
@@ -17,18 +71,32 @@ class SpotifyAuth(NamedTuple):
     expires_at: int
 
 
-class SpotifyResponse(NamedTuple):
-    """The contents of a response from the API"""
-
+class _SpotifyResponse(NamedTuple):
     auth_changed: bool
     auth: SpotifyAuth
     status: int
     headers: Mapping[str, str]
     body: bytes
 
-    def json(self) -> Mapping[str, Any]:
+
+class SpotifyResponse(_SpotifyResponse):
+    """The contents of a response from the API
+
+    The body is decoded at most once: every call to :func:`json` returns the
+    same object, so it should be treated as read-only.
+    """
+
+    # The function used to decode the body; the client overrides this on
+    # each response using its ``json_loads`` option
+    loads: JSONLoads = staticmethod(json.loads)
+
+    def json(self) -> Any:
         """Parse the response body as JSON"""
-        return json.loads(self.body)
+        try:
+            return self.__dict__["_json"]
+        except KeyError:
+            data = self.__dict__["_json"] = self.loads(self.body)
+            return data
 
 
 class SpotifyClient:
@@ -39,6 +107,51 @@ class SpotifyClient:
         client_secret (str): The client secret for your app
         redirect_uri (str): The URI registered with Spotify as the redirect
         scope (Iterable[str], optional): A list of access scopes to request
+        refresh_cache_ttl (float, optional): The number of seconds that a
+            refreshed authorization is remembered so that callers still
+            holding the old one reuse it instead of refreshing again
+        rate_limit (float, optional): The maximum number of requests per
+            second to make to the API
+        rate_limit_burst (int, optional): The number of requests that can
+            be made at once before ``rate_limit`` applies
+        rate_limiter (RateLimiter, optional): A limiter to share between
+            clients; if provided, ``rate_limit`` and ``rate_limit_burst`` are
+            ignored
+        max_rate_limit_retries (int, optional): The number of times that a
+            rate limited request is retried before giving up
+        cache (ResponseCache, optional): If provided, GET responses are
+            cached and revalidated using their ``ETag``
+        json_loads (Callable, optional): The function used to decode JSON
+            responses, e.g. ``orjson.loads`` or :func:`fast_json_loads`.
+            Defaults to ``json.loads``.
+        metrics (SpotifyMetrics, optional): If provided, the timing and
+            outcome of every request and token refresh is recorded
+        token_store (TokenStore, optional): If provided, refreshed
+            authorizations are saved in this store, keyed by their refresh
+            token, and it is checked before refreshing so that tokens
+            refreshed by other clients or processes are reused
+        token_refresher (TokenRefresher, optional): If provided, the tokens
+            that it refreshed in the background are used instead of
+            refreshing them again
+        retry_policy (RetryPolicy, optional): If provided, requests that fail
+            with a server error, a connection error or a timeout are retried
+            according to this policy
+        deadline (float, optional): The default maximum number of seconds
+            that a call to :func:`request` or :func:`stream` can take,
+            including token refreshes, rate limiting and retries
+        scheduler (RequestScheduler, optional): If provided, requests wait
+            for a slot from this scheduler, in order of their ``priority``
+            and fairly between users
+        dedupe_requests (bool, optional): If True, identical GET requests
+            (with the same endpoint, parameters, access token and priority)
+            that are in flight at the same time share a single request to
+            the API. Each caller still gets its own :class:`SpotifyResponse`
+            and parsed body. The shared request has no deadline of its own;
+            each caller only waits for it until its own deadline. Defaults
+            to False.
+        concurrency_limiter (AdaptiveLimiter, optional): If provided, the
+            number of requests in flight is limited by this limiter, which
+            adapts to the rate limits, errors and latency of the responses
 
     """
 
@@ -52,6 +165,21 @@ class SpotifyClient:
         auth_url: str = "https://accounts.spotify.com/authorize",
         token_url: str = "https://accounts.spotify.com/api/token",
         api_url: str = "https://api.spotify.com/v1",
+        refresh_cache_ttl: float = 30.0,
+        rate_limit: Optional[float] = None,
+        rate_limit_burst: Optional[int] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_rate_limit_retries: int = 5,
+        cache: Optional[ResponseCache] = None,
+        json_loads: Optional[JSONLoads] = None,
+        metrics: Optional[SpotifyMetrics] = None,
+        token_store: Optional["TokenStore"] = None,
+        token_refresher: Optional["TokenRefresher"] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        deadline: Optional[float] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        dedupe_requests: bool = False,
+        concurrency_limiter: Optional[AdaptiveLimiter] = None,
     ):
         self.client_id = client_id
         self.client_secret = client_secret
@@ -60,6 +188,37 @@ class SpotifyClient:
         self.auth_url = auth_url
         self.token_url = token_url
         self.api_url = api_url
+        self.refresh_cache_ttl = refresh_cache_ttl
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(rate=rate_limit, burst=rate_limit_burst)
+        self.rate_limiter = rate_limiter
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.cache = cache
+        self.metrics = metrics
+        self.token_store = token_store
+        self.token_refresher = token_refresher
+        self.retry_policy = retry_policy
+        self.deadline = deadline
+        self.scheduler = scheduler
+        self.dedupe_requests = dedupe_requests
+        self.concurrency_limiter = concurrency_limiter
+        self.json_loads: JSONLoads = (
+            json.loads if json_loads is None else json_loads
+        )
+
+        # In-flight and recently completed token refreshes, keyed by the
+        # refresh token
+        self._refreshes: Dict[str, "asyncio.Future[SpotifyAuth]"] = {}
+        self._refreshed: "OrderedDict[str, Tuple[float, SpotifyAuth]]" = (
+            OrderedDict()
+        )
+
+        # The GET requests in flight, keyed by the request and access token
+        self._inflight: Dict[Hashable, _Flight] = {}
+
+        # The app token from the client credentials flow
+        self._app_auth: Optional[SpotifyAuth] = None
+        self._app_auth_future: Optional["asyncio.Future[SpotifyAuth]"] = None
 
     def get_oauth_url(self, *, state: Optional[str] = None) -> yarl.URL:
         """Get the URL to start the OAuth flow
@@ -121,7 +280,8 @@ class SpotifyClient:
         async with session.post(
             self.token_url, headers=headers, data=data
         ) as response:
-            user_data = await response.json()
+            response.raise_for_status()
+            user_data = self.json_loads(await response.read())
 
         return SpotifyAuth(
             access_token=user_data["access_token"],
@@ -134,6 +294,10 @@ class SpotifyClient:
     ) -> SpotifyAuth:
         """Update the authorization by requesting a new access token
 
+        Concurrent calls for the same refresh token share a single request to
+        the token endpoint, and calls that arrive shortly after a refresh
+        reuse its result.
+
         Args:
             session (ClientSession): A session for executing HTTP requests
             auth (SpotifyAuth): The current authorization information
@@ -142,70 +306,751 @@ class SpotifyClient:
             SpotifyAuth: The updated information
 
         """
-        data = dict(
-            client_id=self.client_id,
-            client_secret=self.client_secret,
+        key = auth.refresh_token
+        now = time.monotonic()
+
+        # Drop the cached refreshes that are too old to be useful
+        while self._refreshed:
+            oldest = next(iter(self._refreshed.values()))
+            if now - oldest[0] <= self.refresh_cache_ttl:
+                break
+            self._refreshed.popitem(last=False)
+
+        cached = self._refreshed.get(key)
+        if cached is not None and cached[1].expires_at > auth.expires_at:
+            return cached[1]
+
+        future = self._refreshes.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._refresh_auth(session, auth))
+            self._refreshes[key] = future
+            future.add_done_callback(lambda f: self._finish_refresh(key, f))
+
+        # Shield the shared refresh so that one caller being cancelled
+        # doesn't cancel it for everyone else
+        return await asyncio.shield(future)
+
+    def _finish_refresh(
+        self, key: str, future: "asyncio.Future[SpotifyAuth]"
+    ) -> None:
+        if self._refreshes.get(key) is future:
+            del self._refreshes[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._refreshed.pop(key, None)
+        self._refreshed[key] = (time.monotonic(), future.result())
+
+    async def _refresh_auth(
+        self, session: ClientSession, auth: SpotifyAuth
+    ) -> SpotifyAuth:
+        # The background refresher or another client might have already
+        # refreshed this token
+        if self.token_refresher is not None:
+            latest = self.token_refresher.latest(auth.refresh_token)
+            if latest is not None and _newer(latest, auth):
+                return latest
+        if self.token_store is not None:
+            stored = await self.token_store.get(auth.refresh_token)
+            if stored is not None and _newer(stored, auth):
+                return stored
+
+        new_auth = await self._request_refresh(session, auth)
+        if self.token_store is not None:
+            await self.token_store.set(auth.refresh_token, new_auth)
+        return new_auth
+
+    async def _request_refresh(
+        self, session: ClientSession, auth: SpotifyAuth
+    ) -> SpotifyAuth:
+        user_data = await self._request_token(
+            session,
             grant_type="refresh_token",
             refresh_token=auth.refresh_token,
         )
-        async with session.post(self.token_url, data=data) as response:
-            response.raise_for_status()
-            user_data = await response.json()
         return SpotifyAuth(
             access_token=user_data["access_token"],
             refresh_token=auth.refresh_token,
             expires_at=int(time.time()) + int(user_data["expires_in"]),
         )
 
+    async def get_app_auth(self, session: ClientSession) -> SpotifyAuth:
+        """Get an app token using the client credentials flow
+
+        This token can be used for requests that don't need access to any
+        user's data, like looking up tracks or artists. It is shared by all
+        callers, and it is requested again at most once when it is about to
+        expire. Passing ``None`` as the authorization to :func:`request`
+        uses this token.
+
+        Args:
+            session (ClientSession): A session for executing HTTP requests
+
+        Returns:
+            SpotifyAuth: The authorization information, with an empty
+            ``refresh_token``
+
+        """
+        auth = self._app_auth
+        if auth is not None and auth.expires_at - time.time() > 60:
+            return auth
+
+        future = self._app_auth_future
+        if future is None:
+            future = asyncio.ensure_future(self._request_app_auth(session))
+            self._app_auth_future = future
+            future.add_done_callback(self._finish_app_auth)
+
+        return await asyncio.shield(future)
+
+    def _finish_app_auth(self, future: "asyncio.Future[SpotifyAuth]") -> None:
+        if self._app_auth_future is future:
+            self._app_auth_future = None
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._app_auth = future.result()
+
+    async def _request_app_auth(self, session: ClientSession) -> SpotifyAuth:
+        app_data = await self._request_token(
+            session, grant_type="client_credentials"
+        )
+        return SpotifyAuth(
+            access_token=app_data["access_token"],
+            refresh_token="",
+            expires_at=int(time.time()) + int(app_data["expires_in"]),
+        )
+
+    async def _request_token(
+        self, session: ClientSession, **data: str
+    ) -> Dict[str, Any]:
+        data = dict(
+            data, client_id=self.client_id, client_secret=self.client_secret
+        )
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            async with session.post(self.token_url, data=data) as response:
+                response.raise_for_status()
+                token_data = self.json_loads(await response.read())
+            outcome = "success"
+        finally:
+            if self.metrics is not None:
+                self.metrics.increment(
+                    "spotify_token_refreshes_total", outcome=outcome
+                )
+                self.metrics.observe(
+                    "spotify_token_refresh_seconds",
+                    time.perf_counter() - start,
+                )
+        return token_data
+
     async def request(
         self,
         session: ClientSession,
-        auth: SpotifyAuth,
+        auth: Optional[SpotifyAuth],
         endpoint: str,
         *,
         method: str = "GET",
+        deadline: Optional[float] = None,
+        priority: Optional[str] = None,
         **payload,
     ) -> SpotifyResponse:
         """Make a request to the API
 
-        Note that this handles rate limiting.
+        Note that this handles rate limiting. When the API responds with a
+        429, the client's rate limiter holds back all new requests until the
+        ``Retry-After`` window has passed before the request is retried.
+        Other failures are retried according to the client's
+        ``retry_policy``.
 
         Args:
             session (ClientSession): A session for executing HTTP requests
-            auth (SpotifyAuth): The current authorization information
-            endpoint (str): The API endpoint to be requested
+            auth (Optional[SpotifyAuth]): The current authorization
+                information, or ``None`` to use the app token from
+                :func:`get_app_auth`
+            endpoint (str): The API endpoint to be requested, or an absolute
+                URL
             method (str, optional): The HTTP method. Defaults to "GET".
+            deadline (float, optional): The maximum number of seconds that
+                the call can take, overriding the client's ``deadline``
+            priority (str, optional): The priority class of the request for
+                the client's ``scheduler``
+
+        Raises:
+            aiohttp.ClientResponseError: If the request fails or is still
+                rate limited after ``max_rate_limit_retries`` retries
+            asyncio.TimeoutError: If the deadline is exceeded
 
         Returns:
             SpotifyResponse: The response from the request
 
         """
-        # Update the access token if it is to expire soon
-        auth_changed = False
-        if auth.expires_at - time.time() <= 60:
-            auth_changed = True
-            auth = await self.update_auth(session, auth)
-
-        headers = {
-            "Accept": "application/json",
-            "Authorization": f"Bearer {auth.access_token}",
-        }
-        async with session.request(
-            method, self.api_url + endpoint, headers=headers, **payload
-        ) as response:
-            if response.status == 429:
-                # We got rate limited!
-                await asyncio.sleep(int(response.headers["Retry-After"]))
-                return await self.request(
-                    session, auth, endpoint, method=method, **payload
+        deadline_at = self._deadline_at(deadline)
+        auth_changed, auth = await self._fresh_auth(session, auth, deadline_at)
+        headers: Dict[str, str] = {}
+
+        # Check the cache and revalidate stale entries
+        cache_key = self._cache_key(method, endpoint, auth, payload)
+        if cache_key is not None:
+            assert self.cache is not None
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                if entry.fresh:
+                    return self._response(
+                        auth_changed,
+                        auth,
+                        entry.status,
+                        entry.headers,
+                        entry.body,
+                    )
+                if entry.etag is not None:
+                    headers["If-None-Match"] = entry.etag
+
+        # Identical GETs that are in flight at the same time share a request
+        key = self._request_key(method, endpoint, payload)
+        if key is None or not self.dedupe_requests:
+            return await self._fetch(
+                session,
+                auth_changed,
+                auth,
+                endpoint,
+                method,
+                headers,
+                payload,
+                deadline_at,
+                priority,
+                cache_key,
+            )
+
+        # Callers with different priorities don't share a request, so that
+        # an interactive call never waits in the queue of a background one
+        if self.scheduler is not None:
+            priority = priority or self.scheduler.priorities[0]
+        key = key + (auth.access_token, priority)
+        flight = self._inflight.get(key)
+        if flight is None:
+            # The deadline of the first caller doesn't apply to the others
+            flight = self._inflight[key] = _Flight(
+                self._fetch(
+                    session,
+                    auth_changed,
+                    auth,
+                    endpoint,
+                    method,
+                    headers,
+                    payload,
+                    None,
+                    priority,
+                    cache_key,
                 )
+            )
+            flight.task.add_done_callback(
+                lambda _: self._finish_flight(key, flight)
+            )
 
-            response.raise_for_status()
+        # Shield the shared request so that one caller being cancelled (or
+        # running out of time) doesn't cancel it for everyone else, but
+        # cancel it once nobody is waiting for it
+        flight.waiters += 1
+        try:
+            response = await asyncio.wait_for(
+                asyncio.shield(flight.task), _remaining(deadline_at)
+            )
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                flight.task.cancel()
+                self._finish_flight(key, flight)
+
+        # Each caller gets its own response so that the parsed bodies aren't
+        # shared between them
+        return self._response(
+            auth_changed,
+            auth,
+            response.status,
+            response.headers,
+            response.body,
+        )
+
+    def _finish_flight(self, key: Hashable, flight: "_Flight") -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    async def _fetch(
+        self,
+        session: ClientSession,
+        auth_changed: bool,
+        auth: SpotifyAuth,
+        endpoint: str,
+        method: str,
+        headers: Mapping[str, str],
+        payload: Mapping[str, Any],
+        deadline_at: Optional[float],
+        priority: Optional[str],
+        cache_key: Optional[Hashable],
+    ) -> SpotifyResponse:
+        while True:
+            async with self._send(
+                session,
+                auth,
+                endpoint,
+                method,
+                headers,
+                payload,
+                deadline_at,
+                priority,
+                read=True,
+            ) as response:
+                if response.status == 304 and cache_key is not None:
+                    assert self.cache is not None
+                    entry = self.cache.revalidated(cache_key, response.headers)
+                    if entry is not None:
+                        return self._response(
+                            auth_changed,
+                            auth,
+                            entry.status,
+                            entry.headers,
+                            entry.body,
+                        )
+
+                    # The entry was evicted while the request was in flight,
+                    # so ask again for the full response
+                    if "If-None-Match" in headers:
+                        headers = {
+                            name: value
+                            for name, value in headers.items()
+                            if name != "If-None-Match"
+                        }
+                        continue
+
+                body = await response.read()
+                if cache_key is not None:
+                    assert self.cache is not None
+                    self.cache.store(
+                        cache_key, response.status, response.headers, body
+                    )
+
+                return self._response(
+                    auth_changed,
+                    auth,
+                    response.status,
+                    response.headers,
+                    body,
+                )
 
-            return SpotifyResponse(
+    @asynccontextmanager
+    async def stream(
+        self,
+        session: ClientSession,
+        auth: Optional[SpotifyAuth],
+        endpoint: str,
+        *,
+        method: str = "GET",
+        deadline: Optional[float] = None,
+        priority: Optional[str] = None,
+        **payload,
+    ) -> AsyncIterator[SpotifyStream]:
+        """Make a request to the API without reading the body up front
+
+        This is an async context manager. The authorization is updated and
+        rate limiting is handled before the body is read, then the body can
+        be consumed incrementally:
+
+        .. code-block:: python
+
+            async with client.stream(session, auth, "/me/tracks") as stream:
+                async for item in stream.iter_items():
+                    ...
+
+        Args:
+            session (ClientSession): A session for executing HTTP requests
+            auth (Optional[SpotifyAuth]): The current authorization
+                information, or ``None`` to use the app token from
+                :func:`get_app_auth`
+            endpoint (str): The API endpoint to be requested, or an absolute
+                URL
+            method (str, optional): The HTTP method. Defaults to "GET".
+            deadline (float, optional): The maximum number of seconds that
+                the call can take, overriding the client's ``deadline``
+            priority (str, optional): The priority class of the request for
+                the client's ``scheduler``
+
+        Raises:
+            aiohttp.ClientResponseError: If the request fails or is still
+                rate limited after ``max_rate_limit_retries`` retries
+            asyncio.TimeoutError: If the deadline is exceeded
+
+        Returns:
+            SpotifyStream: The unread response
+
+        """
+        deadline_at = self._deadline_at(deadline)
+        auth_changed, auth = await self._fresh_auth(session, auth, deadline_at)
+        async with self._send(
+            session,
+            auth,
+            endpoint,
+            method,
+            {},
+            payload,
+            deadline_at,
+            priority,
+        ) as response:
+            yield SpotifyStream(
                 auth_changed,
                 auth,
                 response.status,
                 response.headers,
-                await response.read(),
+                response.content,
+                loads=self.json_loads,
             )
+
+    def _deadline_at(self, deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            deadline = self.deadline
+        if deadline is None:
+            return None
+        return time.monotonic() + deadline
+
+    async def _fresh_auth(
+        self,
+        session: ClientSession,
+        auth: Optional[SpotifyAuth],
+        deadline_at: Optional[float] = None,
+    ) -> Tuple[bool, SpotifyAuth]:
+        # App tokens can't be refreshed, but they are shared by everyone
+        if auth is None:
+            return False, await asyncio.wait_for(
+                self.get_app_auth(session), _remaining(deadline_at)
+            )
+
+        # Update the access token if it is to expire soon; tokens without a
+        # refresh token are used until they expire
+        if auth.refresh_token and auth.expires_at - time.time() <= 60:
+            return True, await asyncio.wait_for(
+                self.update_auth(session, auth), _remaining(deadline_at)
+            )
+        return False, auth
+
+    @asynccontextmanager
+    async def _send(
+        self,
+        session: ClientSession,
+        auth: SpotifyAuth,
+        endpoint: str,
+        method: str,
+        headers: Mapping[str, str],
+        payload: Mapping[str, Any],
+        deadline_at: Optional[float] = None,
+        priority: Optional[str] = None,
+        read: bool = False,
+    ) -> AsyncIterator[ClientResponse]:
+        headers = dict(
+            headers,
+            Accept="application/json",
+            Authorization=f"Bearer {auth.access_token}",
+        )
+        metrics = self.metrics
+        policy = self.retry_policy
+        scheduler = self.scheduler
+        limiter = self.concurrency_limiter
+        rate_limit_retries = 0
+        retries = 0
+        while True:
+            start = time.perf_counter()
+            if scheduler is not None:
+                await asyncio.wait_for(
+                    scheduler.acquire(priority, auth.refresh_token),
+                    _remaining(deadline_at),
+                )
+                if metrics is not None:
+                    now = time.perf_counter()
+                    metrics.observe(
+                        "spotify_scheduler_wait_seconds",
+                        now - start,
+                        priority=priority or scheduler.priorities[0],
+                    )
+                    start = now
+
+            # The slot is held until the response is released, but not while
+            # sleeping before a retry
+            started: Optional[float] = None
+            latency: Optional[float] = None
+            congested = False
+            try:
+                await asyncio.wait_for(
+                    self.rate_limiter.acquire(), _remaining(deadline_at)
+                )
+                if metrics is not None:
+                    now = time.perf_counter()
+                    metrics.observe(
+                        "spotify_rate_limit_wait_seconds", now - start
+                    )
+                    start = now
+                if limiter is not None:
+                    started = await asyncio.wait_for(
+                        limiter.acquire(), _remaining(deadline_at)
+                    )
+
+                # Don't let a single attempt run past the deadline
+                options = dict(payload)
+                remaining = _remaining(deadline_at)
+                if remaining is not None and "timeout" not in options:
+                    options["timeout"] = ClientTimeout(total=remaining)
+
+                reason = None
+                retry_in: Optional[float] = None
+                yielded = False
+                sent = time.perf_counter()
+                try:
+                    async with session.request(
+                        method,
+                        _url(self.api_url, endpoint),
+                        headers=headers,
+                        **options,
+                    ) as response:
+                        latency = time.perf_counter() - sent
+                        congested = (
+                            response.status == 429 or response.status >= 500
+                        )
+                        if metrics is not None:
+                            metrics.increment(
+                                "spotify_requests_total",
+                                method=method,
+                                status=str(response.status),
+                            )
+                            metrics.observe(
+                                "spotify_request_seconds",
+                                time.perf_counter() - start,
+                                method=method,
+                            )
+
+                        if response.status == 429:
+                            # We got rate limited!
+                            if metrics is not None:
+                                metrics.increment("spotify_rate_limited_total")
+                            delay = _retry_after(response.headers)
+                            # Hold back every caller even if this one gives up
+                            self.rate_limiter.backoff(delay)
+                            if scheduler is not None:
+                                scheduler.throttle(delay)
+                            if (
+                                rate_limit_retries
+                                < self.max_rate_limit_retries
+                                and _fits(deadline_at, delay)
+                            ):
+                                rate_limit_retries += 1
+                                if metrics is not None:
+                                    metrics.increment(
+                                        "spotify_retries_total",
+                                        reason="rate_limit",
+                                    )
+                                continue
+
+                        elif (
+                            policy is not None
+                            and response.status in policy.statuses
+                        ):
+                            retry_in = self._retry_delay(
+                                method, retries, deadline_at
+                            )
+                            if retry_in is not None:
+                                reason = "status"
+
+                        if reason is None:
+                            response.raise_for_status()
+                            # Read the body up front, unless streaming, so
+                            # that failures while downloading it are retried
+                            if read:
+                                await response.read()
+                            yielded = True
+                            yield response
+                            return
+
+                except (
+                    ClientConnectionError,
+                    ClientPayloadError,
+                    asyncio.TimeoutError,
+                ):
+                    # Errors raised by the caller while it holds the response
+                    # must not trigger a retry
+                    if yielded:
+                        raise
+                    congested = True
+                    retry_in = self._retry_delay(method, retries, deadline_at)
+                    if retry_in is None:
+                        raise
+                    reason = "error"
+            finally:
+                if started is not None:
+                    assert limiter is not None
+                    limiter.release(started, latency, congested)
+                if scheduler is not None:
+                    scheduler.release()
+
+            # The request failed but there is time to retry it after a delay
+            assert retry_in is not None
+            retries += 1
+            if metrics is not None:
+                metrics.increment("spotify_retries_total", reason=reason)
+            await asyncio.sleep(retry_in)
+
+    def _retry_delay(
+        self, method: str, retries: int, deadline_at: Optional[float]
+    ) -> Optional[float]:
+        # The delay before retrying a failed request, or None if it can't be
+        # retried without exceeding the retry policy or the deadline
+        policy = self.retry_policy
+        if policy is None or not policy.should_retry(method, retries):
+            return None
+        delay = policy.delay(retries)
+        if not _fits(deadline_at, delay):
+            return None
+        return delay
+
+    def _response(
+        self,
+        auth_changed: bool,
+        auth: SpotifyAuth,
+        status: int,
+        headers: Mapping[str, str],
+        body: bytes,
+    ) -> SpotifyResponse:
+        response = SpotifyResponse(auth_changed, auth, status, headers, body)
+        if self.json_loads is not json.loads:
+            response.loads = self.json_loads
+        return response
+
+    def _cache_key(
+        self,
+        method: str,
+        endpoint: str,
+        auth: SpotifyAuth,
+        payload: Mapping[str, Any],
+    ) -> Optional[Hashable]:
+        if self.cache is None:
+            return None
+        key = self._request_key(method, endpoint, payload)
+        if key is None:
+            return None
+
+        # The refresh token identifies the user across access tokens, but
+        # auths without one (like app tokens) only have the access token
+        return key + (auth.refresh_token or auth.access_token,)
+
+    def _request_key(
+        self, method: str, endpoint: str, payload: Mapping[str, Any]
+    ) -> Optional[Tuple[Hashable, ...]]:
+        # Only GET requests without a body can be shared
+        if method != "GET" or set(payload) - {"params"}:
+            return None
+        params = payload.get("params") or ()
+        if isinstance(params, Mapping):
+            params = params.items()
+        params = tuple(sorted((str(k), str(v)) for k, v in params))
+        return (method, endpoint, params)
+
+    def paginate(
+        self,
+        session: ClientSession,
+        auth: Optional[SpotifyAuth],
+        endpoint: str,
+        **kwargs,
+    ) -> Paginator:
+        """Iterate over all of the items of a paging object
+
+        For example:
+
+        .. code-block:: python
+
+            async for item in client.paginate(session, auth, "/me/tracks"):
+                ...
+
+        Args:
+            session (ClientSession): A session for executing HTTP requests
+            auth (Optional[SpotifyAuth]): The current authorization
+                information, or ``None`` to use the app token
+            endpoint (str): The API endpoint returning the paging object
+
+        Returns:
+            Paginator: An async iterator over the items; see
+            :class:`Paginator` for the other keyword arguments
+
+        """
+        return Paginator(self, session, auth, endpoint, **kwargs)
+
+    def batch_loader(
+        self,
+        session: ClientSession,
+        auth: Optional[SpotifyAuth],
+        endpoint: Union[str, BatchEndpoint],
+        **kwargs,
+    ) -> BatchLoader:
+        """Get a loader that batches lookups of objects by ID
+
+        For example:
+
+        .. code-block:: python
+
+            loader = client.batch_loader(session, auth, "tracks")
+            track = await loader.load(track_id)
+
+        Args:
+            session (ClientSession): A session for executing HTTP requests
+            auth (Optional[SpotifyAuth]): The current authorization
+                information, or ``None`` to use the app token
+            endpoint (str or BatchEndpoint): The type of object to look up,
+                one of ``"tracks"``, ``"artists"``, ``"albums"`` or
+                ``"audio-features"``
+
+        Returns:
+            BatchLoader: The loader; see :class:`BatchLoader` for the other
+            keyword arguments
+
+        """
+        return BatchLoader(self, session, auth, endpoint, **kwargs)
+
+
+class _Flight:
+    # A request shared by several callers
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, coro: Awaitable[SpotifyResponse]):
+        self.task = asyncio.ensure_future(coro)
+        self.waiters = 0
+
+
+def _remaining(deadline_at: Optional[float]) -> Optional[float]:
+    # The number of seconds left before the deadline, or None without one
+    if deadline_at is None:
+        return None
+    remaining = deadline_at - time.monotonic()
+    if remaining <= 0:
+        raise asyncio.TimeoutError()
+    return remaining
+
+
+def _fits(deadline_at: Optional[float], delay: float) -> bool:
+    # True if sleeping for delay seconds leaves time before the deadline
+    return deadline_at is None or time.monotonic() + delay < deadline_at
+
+
+def _url(api_url: str, endpoint: str) -> str:
+    # Absolute URLs, e.g. the 'next' links of paging objects, are used as is
+    if endpoint.startswith(("http://", "https://")):
+        return endpoint
+    return api_url + endpoint
+
+
+def _retry_after(headers: Mapping[str, str], default: float = 1.0) -> float:
+    try:
+        return max(0.0, float(headers["Retry-After"]))
+    except (KeyError, ValueError):
+        return default
+
+
+def _newer(candidate: SpotifyAuth, auth: SpotifyAuth) -> bool:
+    # True if candidate replaces auth and isn't about to expire itself
+    return (
+        candidate.expires_at > auth.expires_at
+        and candidate.expires_at - time.time() > 60
+    )
@@ -1,11 +1,33 @@
 __all__ = ["spotify_app"]
 
-from typing import Callable, Iterable, Optional
+import asyncio
+import logging
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Union,
+)
 
-from aiohttp import web
+import yarl
+from aiohttp import (
+    ClientError,
+    ClientSession,
+    ClientTimeout,
+    TCPConnector,
+    web,
+)
 
+from . import views
 from .api import SpotifyAuth, SpotifyClient
-from .views import routes
+from .metrics import SpotifyMetrics
+from .refresher import TokenRefresher
+from .state import OAuthState
+from .store import TokenStore
 
 
 def spotify_app(
@@ -23,11 +45,78 @@ def spotify_app(
     auth_url: str = "https://accounts.spotify.com/authorize",
     token_url: str = "https://accounts.spotify.com/api/token",
     api_url: str = "https://api.spotify.com/v1",
+    client_session: Optional[ClientSession] = None,
+    connector_options: Optional[Mapping[str, Any]] = None,
+    metrics: Optional[SpotifyMetrics] = None,
+    metrics_route: bool = False,
+    token_refresher: Optional[TokenRefresher] = None,
+    token_store: Optional[TokenStore] = None,
+    warm_up: int = 0,
+    state_secret: Optional[Union[str, bytes]] = None,
+    state_max_age: float = 600.0,
 ) -> web.Application:
+    """Build a sub-app that handles the OAuth flow for the Spotify API
+
+    The app owns a single pooled ``ClientSession`` for talking to Spotify
+    that is available as ``app["spotify_client_session"]`` while the app is
+    running. The host app can provide its own session instead; in that case
+    the host is responsible for closing it.
+
+    Args:
+        client_id (str): The client ID for your app from Spotify
+        client_secret (str): The client secret for your app
+        redirect_uri (str): The URI registered with Spotify as the redirect
+        scope (Iterable[str], optional): A list of access scopes to request
+        default_redirect (str, optional): Where to redirect after a
+            successful authorization if no target was requested
+        handle_auth (Callable, optional): Called with the request and the
+            new ``SpotifyAuth`` after a successful authorization
+        on_success (Callable, optional): Builds the response after a
+            successful authorization
+        on_error (Callable, optional): Builds the response after a failed
+            authorization
+        client_session (ClientSession, optional): A session to use instead of
+            creating one
+        connector_options (Mapping[str, Any], optional): Keyword arguments
+            for the ``TCPConnector`` of the session created by the app, for
+            example ``limit``, ``keepalive_timeout`` or ``ttl_dns_cache``
+        metrics (SpotifyMetrics, optional): If provided, the requests made
+            by the client and session of the app and the outcomes of the
+            OAuth callbacks are recorded
+        metrics_route (bool, optional): If true, the metrics are served in
+            the Prometheus text format at ``/metrics``
+        token_refresher (TokenRefresher, optional): If provided, it runs in
+            the background while the app is running, every new
+            authorization from the OAuth flow is tracked by it, and the
+            client uses the tokens that it refreshed
+        token_store (TokenStore, optional): If provided, it is started and
+            closed with the app, every new authorization from the OAuth flow
+            is saved in it, and the client uses it to share refreshed tokens
+        warm_up (int, optional): If positive, this many keep-alive
+            connections to each of the API and token hosts are opened in the
+            background when the app starts, so that the first requests
+            don't pay for the DNS lookup and the TCP and TLS handshakes.
+            ``app["spotify_ready"]`` is an ``asyncio.Event`` that is set once
+            the warm-up finishes, and its state is served at ``/ready``.
+        state_secret (Union[str, bytes], optional): If provided, the OAuth
+            state and the redirect target are carried in a state signed
+            with this secret, and checked against a cookie, instead of
+            being stored in the session
+        state_max_age (float, optional): The number of seconds that a signed
+            state is valid for
+
+    Returns:
+        web.Application: The app to be added as a sub-app
+
+    """
     app = web.Application()
 
     # Add the views
-    app.add_routes(routes)
+    app.add_routes(views.routes)
+    if metrics_route:
+        if metrics is None:
+            raise ValueError("'metrics' must be provided for 'metrics_route'")
+        app.router.add_get("/metrics", views.metrics, name="metrics")
 
     # Set up the client
     app["spotify_client"] = SpotifyClient(
@@ -38,6 +127,9 @@ def spotify_app(
         auth_url=auth_url,
         token_url=token_url,
         api_url=api_url,
+        metrics=metrics,
+        token_store=token_store,
+        token_refresher=token_refresher,
     )
 
     # Store the configuration settings on the app
@@ -45,5 +137,118 @@ def spotify_app(
     app["spotify_handle_auth"] = handle_auth
     app["spotify_on_success"] = on_success
     app["spotify_on_error"] = on_error
+    app["spotify_metrics"] = metrics
+    app["spotify_state_signer"] = (
+        None
+        if state_secret is None
+        else OAuthState(state_secret, state_max_age)
+    )
+
+    # Share one pooled session between all of the requests
+    app["spotify_client_session"] = client_session
+    app["spotify_connector_options"] = dict(
+        DEFAULT_CONNECTOR_OPTIONS, **(connector_options or {})
+    )
+    app.cleanup_ctx.append(_client_session)
+
+    # Share the tokens with the other workers
+    app["spotify_token_store"] = token_store
+    if token_store is not None:
+        app.cleanup_ctx.append(_token_store)
+
+    # Refresh the tokens in the background
+    app["spotify_token_refresher"] = token_refresher
+    if token_refresher is not None:
+        app.cleanup_ctx.append(_token_refresher)
+
+    # Open the connections before the first requests need them
+    app["spotify_warm_up"] = warm_up
+    app["spotify_warm_up_urls"] = _origins([api_url, token_url])
+    if warm_up > 0:
+        app.router.add_get("/ready", views.ready, name="ready")
+        app.cleanup_ctx.append(_warm_up)
 
     return app
+
+
+DEFAULT_CONNECTOR_OPTIONS: Mapping[str, Any] = dict(
+    limit=100, keepalive_timeout=30.0, ttl_dns_cache=300
+)
+
+WARM_UP_TIMEOUT = 10.0
+
+logger = logging.getLogger("aiohttp_spotify")
+
+
+async def _client_session(app: web.Application) -> AsyncIterator[None]:
+    if app["spotify_client_session"] is not None:
+        yield
+        return
+
+    connector = TCPConnector(**app["spotify_connector_options"])
+    metrics = app["spotify_metrics"]
+    trace_configs = None if metrics is None else [metrics.trace_config()]
+    async with ClientSession(
+        connector=connector, trace_configs=trace_configs
+    ) as session:
+        app["spotify_client_session"] = session
+        yield
+
+
+async def _token_refresher(app: web.Application) -> AsyncIterator[None]:
+    refresher = app["spotify_token_refresher"]
+    refresher.start(app["spotify_client"], app["spotify_client_session"])
+    yield
+    await refresher.stop()
+
+
+async def _token_store(app: web.Application) -> AsyncIterator[None]:
+    store = app["spotify_token_store"]
+    await store.start()
+    yield
+    await store.close()
+
+
+async def _warm_up(app: web.Application) -> AsyncIterator[None]:
+    app["spotify_ready"] = ready = asyncio.Event()
+    task = asyncio.ensure_future(
+        _open_connections(
+            app["spotify_client_session"],
+            app["spotify_warm_up_urls"],
+            app["spotify_warm_up"],
+        )
+    )
+    task.add_done_callback(lambda _: ready.set())
+    yield
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def _open_connections(
+    session: ClientSession, urls: List[str], count: int
+) -> None:
+    # Concurrent requests each need their own connection, and once they are
+    # released the connections stay in the pool until they are reused. The
+    # host names are resolved by the first request, and cached by the
+    # connector.
+    timeout = ClientTimeout(total=WARM_UP_TIMEOUT)
+
+    async def connect(url: str) -> None:
+        try:
+            async with session.head(
+                url, allow_redirects=False, timeout=timeout
+            ) as response:
+                await response.read()
+        except (ClientError, asyncio.TimeoutError) as error:
+            logger.warning("Failed to open a connection to %s: %s", url, error)
+
+    await asyncio.gather(*(connect(url) for url in urls for _ in range(count)))
+
+
+def _origins(urls: Iterable[str]) -> List[str]:
+    origins = []
+    for url in urls:
+        origin = str(yarl.URL(url).origin())
+        if origin not in origins:
+            origins.append(origin)
+    return origins
@@ -0,0 +1,186 @@
+__all__ = ["BatchEndpoint", "BatchLoader", "BATCH_ENDPOINTS"]
+
+import asyncio
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Union,
+)
+
+from aiohttp import ClientSession
+
+if TYPE_CHECKING:
+    from .api import SpotifyAuth, SpotifyClient
+
+
+class BatchEndpoint(NamedTuple):
+    """An API endpoint that looks up several objects by ID at once"""
+
+    path: str
+    key: str
+    max_size: int
+
+
+BATCH_ENDPOINTS: Mapping[str, BatchEndpoint] = {
+    "tracks": BatchEndpoint("/tracks", "tracks", 50),
+    "artists": BatchEndpoint("/artists", "artists", 50),
+    "albums": BatchEndpoint("/albums", "albums", 20),
+    "audio-features": BatchEndpoint("/audio-features", "audio_features", 100),
+}
+
+
+class BatchLoader:
+    """Combine lookups of single objects by ID into batched requests
+
+    All of the calls to :func:`load` made within one tick of the event loop
+    (or within ``delay`` seconds of the first one) are deduplicated, split
+    into requests of at most ``max_size`` IDs and sent concurrently. Each
+    caller then receives the object for its own ID.
+
+    Args:
+        client (SpotifyClient): The client used to make the requests
+        session (ClientSession): A session for executing HTTP requests
+        auth (Optional[SpotifyAuth]): The current authorization
+            information, or ``None`` to use the client's app token
+        endpoint (str or BatchEndpoint): The name of one of the
+            ``BATCH_ENDPOINTS`` (e.g. ``"tracks"``) or a custom endpoint
+        delay (float, optional): The number of seconds to wait for more
+            lookups before sending a batch
+        max_size (int, optional): Override the maximum number of IDs sent
+            per request
+
+    Attributes:
+        auth (Optional[SpotifyAuth]): The latest authorization information
+        auth_changed (bool): True if the authorization was updated
+
+    """
+
+    def __init__(
+        self,
+        client: "SpotifyClient",
+        session: ClientSession,
+        auth: Optional["SpotifyAuth"],
+        endpoint: Union[str, BatchEndpoint],
+        *,
+        delay: float = 0.0,
+        max_size: Optional[int] = None,
+        **payload,
+    ):
+        if not isinstance(endpoint, BatchEndpoint):
+            endpoint = BATCH_ENDPOINTS[endpoint]
+        if max_size is not None:
+            endpoint = endpoint._replace(max_size=max_size)
+        self.client = client
+        self.session = session
+        self.auth = auth
+        self.auth_changed = False
+        self.endpoint = endpoint
+        self.delay = delay
+        self.params: Dict[str, Any] = dict(payload.pop("params", None) or {})
+        self.payload = payload
+
+        # The futures for the IDs that are queued or in flight
+        self._futures: Dict[str, "asyncio.Future[Any]"] = {}
+        self._queue: List[str] = []
+        self._pending: Set["asyncio.Future[None]"] = set()
+
+    async def load(self, id: str) -> Optional[Mapping[str, Any]]:
+        """Look up a single object
+
+        Args:
+            id (str): The Spotify ID of the object
+
+        Raises:
+            ValueError: If the response has fewer results than IDs
+
+        Returns:
+            Optional[Mapping[str, Any]]: The object, or None if it wasn't
+            found
+
+        """
+        future = self._futures.get(id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[id] = loop.create_future()
+            if not self._queue:
+                if self.delay > 0:
+                    loop.call_later(self.delay, self._dispatch)
+                else:
+                    loop.call_soon(self._dispatch)
+            self._queue.append(id)
+
+        # Don't let one caller cancel the lookup for the others
+        return await asyncio.shield(future)
+
+    async def load_many(
+        self, ids: Iterable[str]
+    ) -> List[Optional[Mapping[str, Any]]]:
+        """Look up several objects
+
+        Args:
+            ids (Iterable[str]): The Spotify IDs of the objects
+
+        Returns:
+            List[Optional[Mapping[str, Any]]]: The objects in the same order
+            as ``ids``
+
+        """
+        return list(await asyncio.gather(*(self.load(id) for id in ids)))
+
+    def _dispatch(self) -> None:
+        queue, self._queue = self._queue, []
+        size = self.endpoint.max_size
+        for n in range(0, len(queue), size):
+            # Keep a reference so that the request isn't garbage collected
+            future = asyncio.ensure_future(self._fetch(queue[n : n + size]))
+            self._pending.add(future)
+            future.add_done_callback(self._pending.discard)
+
+    async def _fetch(self, ids: List[str]) -> None:
+        try:
+            params = dict(self.params, ids=",".join(ids))
+            response = await self.client.request(
+                self.session,
+                self.auth,
+                self.endpoint.path,
+                params=params,
+                **self.payload,
+            )
+            if response.auth_changed:
+                self.auth = response.auth
+                self.auth_changed = True
+            results = response.json()[self.endpoint.key]
+        except asyncio.CancelledError:
+            for id in ids:
+                self._futures.pop(id).cancel()
+            raise
+        except Exception as error:
+            for id in ids:
+                future = self._futures.pop(id)
+                if not future.done():
+                    future.set_exception(error)
+                    # The callers might all have been cancelled, so mark the
+                    # error as retrieved to avoid warnings about it
+                    future.exception()
+            return
+
+        for id, result in zip(ids, results):
+            future = self._futures.pop(id)
+            if not future.done():
+                future.set_result(result)
+
+        # Don't leave the callers waiting if some results are missing
+        for id in ids[len(results) :]:
+            future = self._futures.pop(id)
+            if not future.done():
+                future.set_exception(
+                    ValueError(f"The response has no result for '{id}'")
+                )
+                future.exception()
@@ -0,0 +1,340 @@
+__all__ = [
+    "ChunkResult",
+    "BulkResult",
+    "add_to_playlist",
+    "remove_from_playlist",
+    "save_to_library",
+    "remove_from_library",
+]
+
+import asyncio
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+
+from aiohttp import ClientResponseError, ClientSession
+
+if TYPE_CHECKING:
+    from .api import SpotifyAuth, SpotifyClient, SpotifyResponse
+
+SendChunk = Callable[
+    [Optional["SpotifyAuth"], int, int], Awaitable["SpotifyResponse"]
+]
+
+
+class ChunkResult(NamedTuple):
+    """The outcome of the request for one chunk of a bulk operation
+
+    ``start`` and ``stop`` are the indices of the chunk's items in the
+    input. If the request failed, ``error`` is the exception that it raised
+    and ``status`` is the response status, if there was one.
+    """
+
+    start: int
+    stop: int
+    status: Optional[int]
+    snapshot_id: Optional[str]
+    error: Optional[Exception]
+
+    @property
+    def ok(self) -> bool:
+        """True if the request succeeded"""
+        return self.error is None
+
+
+class BulkResult(NamedTuple):
+    """The outcome of a bulk operation
+
+    The operation stops sending new chunks after the first failure. In that
+    case ``resume_from`` is the index of the first item that might not have
+    been applied, and the operation can be resumed by calling it again with
+    the same items and ``start=resume_from``.
+
+    For playlists, ``snapshot_id`` is the playlist version returned by the
+    last successful request.
+    """
+
+    auth_changed: bool
+    auth: Optional["SpotifyAuth"]
+    chunks: List[ChunkResult]
+    snapshot_id: Optional[str]
+    resume_from: Optional[int]
+
+    @property
+    def ok(self) -> bool:
+        """True if every chunk was applied"""
+        return self.resume_from is None
+
+
+async def add_to_playlist(
+    client: "SpotifyClient",
+    session: ClientSession,
+    auth: Optional["SpotifyAuth"],
+    playlist_id: str,
+    uris: Sequence[str],
+    *,
+    position: Optional[int] = None,
+    start: int = 0,
+    chunk_size: int = 100,
+) -> BulkResult:
+    """Add any number of items to a playlist
+
+    The chunks are sent one at a time so that the items keep their order in
+    the playlist.
+
+    Args:
+        client (SpotifyClient): The client used to make the requests
+        session (ClientSession): A session for executing HTTP requests
+        auth (Optional[SpotifyAuth]): The current authorization information
+        playlist_id (str): The Spotify ID of the playlist
+        uris (Sequence[str]): The Spotify URIs of the tracks or episodes
+        position (int, optional): Where to insert the items; they are
+            appended by default
+        start (int, optional): The index of the first item to add, to
+            resume a previous operation
+        chunk_size (int, optional): The number of items added per request
+
+    Returns:
+        BulkResult: The result of each request
+
+    """
+
+    def send(
+        auth: Optional["SpotifyAuth"], begin: int, end: int
+    ) -> Awaitable["SpotifyResponse"]:
+        data: Dict[str, Any] = dict(uris=list(uris[begin:end]))
+        if position is not None:
+            data["position"] = position + begin
+        return client.request(
+            session,
+            auth,
+            f"/playlists/{playlist_id}/tracks",
+            method="POST",
+            json=data,
+        )
+
+    return await _run(auth, len(uris), start, chunk_size, 1, send)
+
+
+async def remove_from_playlist(
+    client: "SpotifyClient",
+    session: ClientSession,
+    auth: Optional["SpotifyAuth"],
+    playlist_id: str,
+    uris: Sequence[str],
+    *,
+    snapshot_id: Optional[str] = None,
+    start: int = 0,
+    chunk_size: int = 100,
+    concurrency: int = 4,
+) -> BulkResult:
+    """Remove every occurrence of any number of items from a playlist
+
+    Removals don't depend on the order of the items, so up to
+    ``concurrency`` chunks are sent at once.
+
+    Args:
+        client (SpotifyClient): The client used to make the requests
+        session (ClientSession): A session for executing HTTP requests
+        auth (Optional[SpotifyAuth]): The current authorization information
+        playlist_id (str): The Spotify ID of the playlist
+        uris (Sequence[str]): The Spotify URIs of the tracks or episodes
+        snapshot_id (str, optional): The playlist version to remove the
+            items from
+        start (int, optional): The index of the first item to remove, to
+            resume a previous operation
+        chunk_size (int, optional): The number of items removed per request
+        concurrency (int, optional): The maximum number of requests in
+            flight at once
+
+    Returns:
+        BulkResult: The result of each request
+
+    """
+
+    def send(
+        auth: Optional["SpotifyAuth"], begin: int, end: int
+    ) -> Awaitable["SpotifyResponse"]:
+        data: Dict[str, Any] = dict(
+            tracks=[dict(uri=uri) for uri in uris[begin:end]]
+        )
+        if snapshot_id is not None:
+            data["snapshot_id"] = snapshot_id
+        return client.request(
+            session,
+            auth,
+            f"/playlists/{playlist_id}/tracks",
+            method="DELETE",
+            json=data,
+        )
+
+    return await _run(auth, len(uris), start, chunk_size, concurrency, send)
+
+
+async def save_to_library(
+    client: "SpotifyClient",
+    session: ClientSession,
+    auth: Optional["SpotifyAuth"],
+    kind: str,
+    ids: Sequence[str],
+    *,
+    start: int = 0,
+    chunk_size: int = 50,
+    concurrency: int = 4,
+) -> BulkResult:
+    """Save any number of items to the user's library
+
+    Args:
+        client (SpotifyClient): The client used to make the requests
+        session (ClientSession): A session for executing HTTP requests
+        auth (Optional[SpotifyAuth]): The current authorization information
+        kind (str): The type of the items: ``"tracks"``, ``"albums"``,
+            ``"shows"`` or ``"episodes"``
+        ids (Sequence[str]): The Spotify IDs of the items
+        start (int, optional): The index of the first item to save, to
+            resume a previous operation
+        chunk_size (int, optional): The number of items saved per request
+        concurrency (int, optional): The maximum number of requests in
+            flight at once
+
+    Returns:
+        BulkResult: The result of each request
+
+    """
+    return await _library(
+        client, session, auth, "PUT", kind, ids, start, chunk_size, concurrency
+    )
+
+
+async def remove_from_library(
+    client: "SpotifyClient",
+    session: ClientSession,
+    auth: Optional["SpotifyAuth"],
+    kind: str,
+    ids: Sequence[str],
+    *,
+    start: int = 0,
+    chunk_size: int = 50,
+    concurrency: int = 4,
+) -> BulkResult:
+    """Remove any number of items from the user's library
+
+    The arguments are the same as for :func:`save_to_library`.
+
+    Returns:
+        BulkResult: The result of each request
+
+    """
+    return await _library(
+        client,
+        session,
+        auth,
+        "DELETE",
+        kind,
+        ids,
+        start,
+        chunk_size,
+        concurrency,
+    )
+
+
+async def _library(
+    client: "SpotifyClient",
+    session: ClientSession,
+    auth: Optional["SpotifyAuth"],
+    method: str,
+    kind: str,
+    ids: Sequence[str],
+    start: int,
+    chunk_size: int,
+    concurrency: int,
+) -> BulkResult:
+    def send(
+        auth: Optional["SpotifyAuth"], begin: int, end: int
+    ) -> Awaitable["SpotifyResponse"]:
+        return client.request(
+            session,
+            auth,
+            f"/me/{kind}",
+            method=method,
+            params=dict(ids=",".join(ids[begin:end])),
+        )
+
+    return await _run(auth, len(ids), start, chunk_size, concurrency, send)
+
+
+async def _run(
+    auth: Optional["SpotifyAuth"],
+    size: int,
+    start: int,
+    chunk_size: int,
+    concurrency: int,
+    send: SendChunk,
+) -> BulkResult:
+    if chunk_size < 1:
+        raise ValueError("The 'chunk_size' must be at least 1")
+    if concurrency < 1:
+        raise ValueError("The 'concurrency' must be at least 1")
+
+    # The workers share this iterator so that each chunk is only sent once,
+    # in order, and at most 'concurrency' chunks are in flight
+    chunks = iter(range(start, size, chunk_size))
+    results: List[ChunkResult] = []
+    auth_changed = False
+    snapshot_id = None
+    failed = False
+
+    async def worker() -> None:
+        nonlocal auth, auth_changed, snapshot_id, failed
+        for begin in chunks:
+            if failed:
+                return
+            end = min(begin + chunk_size, size)
+            try:
+                response = await send(auth, begin, end)
+            except ClientResponseError as error:
+                results.append(
+                    ChunkResult(begin, end, error.status, None, error)
+                )
+                failed = True
+                return
+            except Exception as error:
+                results.append(ChunkResult(begin, end, None, None, error))
+                failed = True
+                return
+
+            if response.auth_changed:
+                auth = response.auth
+                auth_changed = True
+            snapshot = (
+                response.json().get("snapshot_id") if response.body else None
+            )
+            if snapshot is not None:
+                snapshot_id = snapshot
+            results.append(
+                ChunkResult(begin, end, response.status, snapshot, None)
+            )
+
+    count = len(range(start, size, chunk_size))
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, count))))
+
+    # Resume from the first chunk that failed or was never sent
+    results.sort()
+    resume_from = None
+    expected = start
+    for result in results:
+        if result.start != expected or not result.ok:
+            break
+        expected = result.stop
+    if expected < size:
+        resume_from = expected
+
+    return BulkResult(auth_changed, auth, results, snapshot_id, resume_from)
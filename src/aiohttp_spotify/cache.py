@@ -0,0 +1,167 @@
+__all__ = ["CacheEntry", "ResponseCache"]
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Mapping, NamedTuple, Optional
+
+
+class CacheEntry(NamedTuple):
+    """A cached response from the API"""
+
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+    etag: Optional[str]
+    expires: float
+
+    @property
+    def fresh(self) -> bool:
+        """True if the entry can be used without revalidating it"""
+        return self.expires > time.monotonic()
+
+
+class ResponseCache:
+    """An in-memory cache of responses with least recently used eviction
+
+    Entries are stored with the ``ETag`` and the ``Cache-Control`` lifetime
+    of their response. Fresh entries are served directly, and stale entries
+    with an ``ETag`` are revalidated using ``If-None-Match``.
+
+    Args:
+        max_size (int, optional): The maximum total size of the cached
+            bodies in bytes
+
+    """
+
+    def __init__(self, max_size: int = 32 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """Get an entry and mark it as recently used
+
+        Args:
+            key (Hashable): The cache key
+
+        Returns:
+            Optional[CacheEntry]: The entry or None if it isn't cached
+
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def pop(self, key: Hashable) -> Optional[CacheEntry]:
+        """Remove an entry from the cache
+
+        Args:
+            key (Hashable): The cache key
+
+        Returns:
+            Optional[CacheEntry]: The removed entry or None if it wasn't
+            cached
+
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry.body)
+        return entry
+
+    def clear(self) -> None:
+        """Remove all of the entries"""
+        self._entries.clear()
+        self.size = 0
+
+    def store(
+        self,
+        key: Hashable,
+        status: int,
+        headers: Mapping[str, str],
+        body: bytes,
+    ) -> Optional[CacheEntry]:
+        """Cache a successful response if its headers allow it
+
+        Args:
+            key (Hashable): The cache key
+            status (int): The status code of the response
+            headers (Mapping[str, str]): The headers of the response
+            body (bytes): The body of the response
+
+        Returns:
+            Optional[CacheEntry]: The new entry or None if the response
+            can't be cached
+
+        """
+        self.pop(key)
+        max_age = _max_age(headers.get("Cache-Control"))
+        etag = headers.get("ETag")
+        if (
+            not 200 <= status < 300
+            or max_age is None
+            or (etag is None and max_age <= 0)
+            or len(body) > self.max_size
+        ):
+            return None
+
+        entry = CacheEntry(
+            status, headers, body, etag, time.monotonic() + max_age
+        )
+        self._entries[key] = entry
+        self.size += len(body)
+        while self.size > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted.body)
+        return entry
+
+    def revalidated(
+        self, key: Hashable, headers: Mapping[str, str]
+    ) -> Optional[CacheEntry]:
+        """Update an entry after the API confirmed that it's still valid
+
+        Args:
+            key (Hashable): The cache key
+            headers (Mapping[str, str]): The headers of the 304 response
+
+        Returns:
+            Optional[CacheEntry]: The updated entry or None if it isn't
+            cached or can no longer be cached
+
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        max_age = _max_age(headers.get("Cache-Control", ""))
+        if max_age is None:
+            self.pop(key)
+            return None
+        entry = entry._replace(expires=time.monotonic() + max_age)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        return entry
+
+
+def _max_age(cache_control: Optional[Any]) -> Optional[float]:
+    """The lifetime allowed by a Cache-Control header; None for no-store"""
+    if not cache_control:
+        return 0.0
+    max_age = 0.0
+    for directive in str(cache_control).lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        if name == "no-store":
+            return None
+        elif name == "no-cache":
+            return 0.0
+        elif name == "max-age":
+            try:
+                max_age = max(0.0, float(value.strip('"')))
+            except ValueError:
+                pass
+    return max_age
@@ -0,0 +1,384 @@
+__all__ = [
+    "ExportCollection",
+    "ExportResult",
+    "EXPORT_COLLECTIONS",
+    "export_library",
+    "export_users",
+]
+
+import asyncio
+import gzip
+import json
+import os
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from aiohttp import ClientSession
+
+if TYPE_CHECKING:
+    from .api import SpotifyAuth, SpotifyClient
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+T = TypeVar("T")
+
+
+class ExportCollection(NamedTuple):
+    """A collection of the user's items that can be exported
+
+    Collections with ``cursor`` set are paged using the ``after`` cursor
+    instead of an offset.
+    """
+
+    endpoint: str
+    key: Optional[str] = None
+    limit: int = 50
+    params: Mapping[str, str] = {}
+    cursor: bool = False
+
+
+EXPORT_COLLECTIONS: Mapping[str, ExportCollection] = {
+    "saved_tracks": ExportCollection("/me/tracks"),
+    "playlists": ExportCollection("/me/playlists"),
+    "followed_artists": ExportCollection(
+        "/me/following",
+        key="artists",
+        params=dict(type="artist"),
+        cursor=True,
+    ),
+}
+
+
+class ExportResult(NamedTuple):
+    """The outcome of exporting one user's library
+
+    ``counts`` is the number of items exported for each collection so far,
+    including the ones exported before resuming. If the export failed,
+    ``error`` is the exception that it raised, and calling it again resumes
+    from the last checkpoint.
+    """
+
+    key: str
+    auth_changed: bool
+    auth: Optional["SpotifyAuth"]
+    counts: Dict[str, int]
+    error: Optional[Exception]
+
+    @property
+    def ok(self) -> bool:
+        """True if every collection was exported"""
+        return self.error is None
+
+
+async def export_library(
+    client: "SpotifyClient",
+    session: ClientSession,
+    auth: Optional["SpotifyAuth"],
+    directory: str,
+    *,
+    collections: Sequence[str] = tuple(EXPORT_COLLECTIONS),
+    compress: bool = False,
+    key: Optional[str] = None,
+) -> ExportResult:
+    """Export a user's library to newline delimited JSON files
+
+    Each collection is written to ``<directory>/<collection>.ndjson`` (or
+    ``.ndjson.gz`` if ``compress`` is True) one page at a time, so at most a
+    few pages are held in memory. After each page, the progress is saved in
+    ``<directory>/checkpoint.json``, and an interrupted export picks up from
+    there when it is run again, with the same ``compress`` setting.
+    Collections that were finished are skipped.
+
+    Args:
+        client (SpotifyClient): The client used to make the requests
+        session (ClientSession): A session for executing HTTP requests
+        auth (Optional[SpotifyAuth]): The user's authorization information
+        directory (str): The directory for the user's files
+        collections (Sequence[str], optional): The names of the collections
+            in :data:`EXPORT_COLLECTIONS` to export
+        compress (bool, optional): If True, the files are gzip compressed
+        key (str, optional): The key for the user in the result; defaults to
+            the directory
+
+    Returns:
+        ExportResult: The outcome of the export
+
+    """
+    exporter = _Exporter(client, session, auth, directory, compress)
+    error = None
+    try:
+        await exporter.run(collections)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        error = e
+    return ExportResult(
+        directory if key is None else key,
+        exporter.auth_changed,
+        exporter.auth,
+        exporter.counts(collections),
+        error,
+    )
+
+
+async def export_users(
+    client: "SpotifyClient",
+    session: ClientSession,
+    users: Iterable[Tuple[str, Optional["SpotifyAuth"]]],
+    directory: str,
+    *,
+    concurrency: int = 8,
+    collections: Sequence[str] = tuple(EXPORT_COLLECTIONS),
+    compress: bool = False,
+) -> AsyncIterator[ExportResult]:
+    """Export the libraries of many users with bounded concurrency
+
+    This is an async generator that yields the result for each user as soon
+    as their export finishes. ``users`` is consumed lazily, so it can be a
+    generator over any number of users. Each user is exported to
+    ``<directory>/<key>`` using :func:`export_library`.
+
+    .. code-block:: python
+
+        async for result in export_users(client, session, users, "exports"):
+            if result.auth_changed:
+                save_auth(result.key, result.auth)
+
+    Args:
+        client (SpotifyClient): The client used to make the requests
+        session (ClientSession): A session for executing HTTP requests
+        users (Iterable[Tuple[str, Optional[SpotifyAuth]]]): Pairs of a
+            unique key for each user (used as the name of their directory)
+            and their authorization information
+        directory (str): The directory for all of the exports
+        concurrency (int, optional): The maximum number of users exported at
+            once
+        collections (Sequence[str], optional): The names of the collections
+            to export
+        compress (bool, optional): If True, the files are gzip compressed
+
+    """
+    if concurrency < 1:
+        raise ValueError("The 'concurrency' must be at least 1")
+    users = iter(users)
+    pending: Set["asyncio.Future[ExportResult]"] = set()
+    try:
+        while True:
+            while len(pending) < concurrency:
+                user = next(users, None)
+                if user is None:
+                    break
+                key, auth = user
+                pending.add(
+                    asyncio.ensure_future(
+                        export_library(
+                            client,
+                            session,
+                            auth,
+                            os.path.join(directory, key),
+                            collections=collections,
+                            compress=compress,
+                            key=key,
+                        )
+                    )
+                )
+            if not pending:
+                break
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+class _Exporter:
+    def __init__(
+        self,
+        client: "SpotifyClient",
+        session: ClientSession,
+        auth: Optional["SpotifyAuth"],
+        directory: str,
+        compress: bool,
+    ):
+        self.client = client
+        self.session = session
+        self.auth = auth
+        self.auth_changed = False
+        self.directory = directory
+        self.compress = compress
+        self.checkpoint: Dict[str, Dict[str, Any]] = {}
+
+    def counts(self, collections: Sequence[str]) -> Dict[str, int]:
+        return {
+            name: self.checkpoint.get(name, {}).get("count", 0)
+            for name in collections
+        }
+
+    async def run(self, collections: Sequence[str]) -> None:
+        self.checkpoint = await _in_thread(_load_checkpoint, self.directory)
+        for name in collections:
+            state = self.checkpoint.setdefault(
+                name,
+                dict(
+                    count=0,
+                    size=0,
+                    after=None,
+                    done=False,
+                    compress=self.compress,
+                ),
+            )
+            if state["done"]:
+                continue
+
+            # Appending to a file in the other format would corrupt it
+            if state.setdefault("compress", self.compress) != self.compress:
+                raise ValueError(
+                    f"The export of '{name}' can't be resumed with "
+                    f"compress={self.compress} because it was started with "
+                    f"compress={state['compress']}"
+                )
+            await self.export(name, EXPORT_COLLECTIONS[name], state)
+
+    async def export(
+        self, name: str, collection: ExportCollection, state: Dict[str, Any]
+    ) -> None:
+        extension = ".ndjson.gz" if self.compress else ".ndjson"
+        path = os.path.join(self.directory, name + extension)
+
+        # Drop anything written after the last checkpoint
+        await _in_thread(_truncate, path, state["size"])
+
+        if collection.cursor:
+            pages = self.cursor_pages(collection, state["after"])
+        else:
+            pages = self.offset_pages(collection, state["count"])
+
+        async for items in pages:
+            if items:
+                data = b"".join(_dumps(item) + b"\n" for item in items)
+                if self.compress:
+                    # Each page is a complete gzip member, so the file can
+                    # be truncated at any checkpoint
+                    data = gzip.compress(data)
+                await _in_thread(_append, path, data)
+                state["count"] += len(items)
+                state["size"] += len(data)
+                if collection.cursor:
+                    state["after"] = items[-1]["id"]
+                await self.save()
+
+        state["done"] = True
+        await self.save()
+
+    async def offset_pages(
+        self, collection: ExportCollection, offset: int
+    ) -> AsyncIterator[List[Any]]:
+        paginator = self.client.paginate(
+            self.session,
+            self.auth,
+            collection.endpoint,
+            key=collection.key,
+            limit=collection.limit,
+            offset=offset,
+            params=dict(collection.params),
+        )
+        page: List[Any] = []
+        try:
+            async for item in paginator:
+                page.append(item)
+                if len(page) >= collection.limit:
+                    yield page
+                    page = []
+            yield page
+        finally:
+            self.update_auth(paginator.auth, paginator.auth_changed)
+
+    async def cursor_pages(
+        self, collection: ExportCollection, after: Optional[str]
+    ) -> AsyncIterator[List[Any]]:
+        params = dict(collection.params, limit=str(collection.limit))
+        while True:
+            if after is not None:
+                params["after"] = after
+            response = await self.client.request(
+                self.session, self.auth, collection.endpoint, params=params
+            )
+            self.update_auth(response.auth, response.auth_changed)
+            data = response.json()
+            if collection.key is not None:
+                data = data[collection.key]
+            yield data["items"]
+            after = (data.get("cursors") or {}).get("after")
+            if not after or not data.get("next"):
+                return
+
+    def update_auth(
+        self, auth: Optional["SpotifyAuth"], auth_changed: bool
+    ) -> None:
+        if auth_changed:
+            self.auth = auth
+            self.auth_changed = True
+
+    async def save(self) -> None:
+        await _in_thread(_save_checkpoint, self.directory, self.checkpoint)
+
+
+async def _in_thread(func: Callable[..., T], *args: Any) -> T:
+    # File operations block, so they are run on the default executor
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def _dumps(item: Any) -> bytes:
+    if orjson is None:
+        return json.dumps(item, separators=(",", ":")).encode()
+    return orjson.dumps(item)
+
+
+def _load_checkpoint(directory: str) -> Dict[str, Dict[str, Any]]:
+    os.makedirs(directory, exist_ok=True)
+    try:
+        with open(os.path.join(directory, "checkpoint.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_checkpoint(
+    directory: str, checkpoint: Mapping[str, Mapping[str, Any]]
+) -> None:
+    # Write the new checkpoint next to the old one and then swap them so that
+    # an interrupted write never leaves a broken checkpoint
+    path = os.path.join(directory, "checkpoint.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+def _truncate(path: str, size: int) -> None:
+    with open(path, "ab") as f:
+        f.truncate(size)
+
+
+def _append(path: str, data: bytes) -> None:
+    with open(path, "ab") as f:
+        f.write(data)
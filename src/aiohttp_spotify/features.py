@@ -0,0 +1,205 @@
+__all__ = [
+    "AUDIO_FEATURES_DTYPE",
+    "FeatureArray",
+    "fetch_audio_features",
+    "fetch_numeric",
+]
+
+import asyncio
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from aiohttp import ClientSession
+
+from .batch import BATCH_ENDPOINTS, BatchEndpoint
+
+if TYPE_CHECKING:
+    from .api import SpotifyAuth, SpotifyClient
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
+# The numeric fields of the audio features objects and their types
+AUDIO_FEATURES_DTYPE: List[Tuple[str, str]] = [
+    ("danceability", "f4"),
+    ("energy", "f4"),
+    ("key", "i1"),
+    ("loudness", "f4"),
+    ("mode", "i1"),
+    ("speechiness", "f4"),
+    ("acousticness", "f4"),
+    ("instrumentalness", "f4"),
+    ("liveness", "f4"),
+    ("valence", "f4"),
+    ("tempo", "f4"),
+    ("duration_ms", "i4"),
+    ("time_signature", "i1"),
+]
+
+
+class FeatureArray(NamedTuple):
+    """Numeric fields for a list of IDs in a NumPy structured array
+
+    Row ``n`` of ``values`` holds the fields for ``ids[n]``, and ``rows``
+    maps each ID back to its row. The rows of the IDs that weren't found
+    have ``found`` set to False and are filled with NaN for floating point
+    fields and -1 for integer fields. The columns can be accessed by name,
+    e.g. ``features.values["tempo"]``.
+    """
+
+    auth_changed: bool
+    auth: Optional["SpotifyAuth"]
+    ids: List[str]
+    rows: Dict[str, int]
+    values: Any
+    found: Any
+
+
+async def fetch_audio_features(
+    client: "SpotifyClient",
+    session: ClientSession,
+    auth: Optional["SpotifyAuth"],
+    ids: Sequence[str],
+    *,
+    concurrency: int = 4,
+) -> FeatureArray:
+    """Get the audio features for any number of tracks as NumPy arrays
+
+    This requires NumPy. The fields are given by
+    :data:`AUDIO_FEATURES_DTYPE`.
+
+    Args:
+        client (SpotifyClient): The client used to make the requests
+        session (ClientSession): A session for executing HTTP requests
+        auth (Optional[SpotifyAuth]): The current authorization
+            information, or ``None`` to use the client's app token
+        ids (Sequence[str]): The Spotify IDs of the tracks
+        concurrency (int, optional): The maximum number of requests in
+            flight at once
+
+    Returns:
+        FeatureArray: The audio features
+
+    """
+    return await fetch_numeric(
+        client,
+        session,
+        auth,
+        "audio-features",
+        ids,
+        AUDIO_FEATURES_DTYPE,
+        concurrency=concurrency,
+    )
+
+
+async def fetch_numeric(
+    client: "SpotifyClient",
+    session: ClientSession,
+    auth: Optional["SpotifyAuth"],
+    endpoint: Union[str, BatchEndpoint],
+    ids: Sequence[str],
+    dtype: Any,
+    *,
+    concurrency: int = 4,
+) -> FeatureArray:
+    """Get numeric fields of objects from a batch endpoint as NumPy arrays
+
+    The IDs are requested in chunks of the endpoint's maximum size, and the
+    fields of each chunk are copied into a structured array that is
+    allocated up front, so the decoded objects only live as long as their
+    chunk.
+
+    Args:
+        client (SpotifyClient): The client used to make the requests
+        session (ClientSession): A session for executing HTTP requests
+        auth (Optional[SpotifyAuth]): The current authorization
+            information, or ``None`` to use the client's app token
+        endpoint (Union[str, BatchEndpoint]): The endpoint, or the name of
+            one in ``BATCH_ENDPOINTS``
+        ids (Sequence[str]): The Spotify IDs of the objects
+        dtype: The NumPy structured data type, with field names matching the
+            keys of the objects
+        concurrency (int, optional): The maximum number of requests in
+            flight at once
+
+    Raises:
+        ImportError: If NumPy isn't installed
+
+    Returns:
+        FeatureArray: The fields of the objects
+
+    """
+    if np is None:
+        raise ImportError("NumPy is required for columnar results")
+    if concurrency < 1:
+        raise ValueError("The 'concurrency' must be at least 1")
+    if not isinstance(endpoint, BatchEndpoint):
+        endpoint = BATCH_ENDPOINTS[endpoint]
+
+    ids = list(ids)
+    dtype = np.dtype(dtype)
+    fills = {}
+    for name in dtype.names:
+        kind = dtype[name].kind
+        fills[name] = np.nan if kind == "f" else (-1 if kind in "iu" else 0)
+    values = np.empty(len(ids), dtype=dtype)
+    for name, fill in fills.items():
+        values[name] = fill
+    found = np.zeros(len(ids), dtype=bool)
+    auth_changed = False
+
+    # The workers share this iterator so each chunk is only requested once
+    size = endpoint.max_size
+    chunks = iter(range(0, len(ids), size))
+
+    async def worker() -> None:
+        nonlocal auth, auth_changed
+        for start in chunks:
+            stop = min(start + size, len(ids))
+            response = await client.request(
+                session,
+                auth,
+                endpoint.path,
+                params=dict(ids=",".join(ids[start:stop])),
+            )
+            if response.auth_changed:
+                auth = response.auth
+                auth_changed = True
+            objects = response.json()[endpoint.key]
+            rows = [n for n, obj in enumerate(objects, start) if obj]
+            if not rows:
+                continue
+            objects = [obj for obj in objects if obj]
+            found[rows] = True
+            for name, fill in fills.items():
+                column = [obj.get(name) for obj in objects]
+                values[name][rows] = [
+                    fill if value is None else value for value in column
+                ]
+
+    count = len(range(0, len(ids), size))
+    tasks = [
+        asyncio.ensure_future(worker()) for _ in range(min(concurrency, count))
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # Don't leave the other workers running after one of them fails
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    rows = {id: n for n, id in enumerate(ids)}
+    return FeatureArray(auth_changed, auth, ids, rows, values, found)
@@ -0,0 +1,278 @@
+__all__ = ["SpotifyMetrics", "Histogram"]
+
+import bisect
+import time
+from types import SimpleNamespace
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from aiohttp import (
+    TraceConfig,
+    TraceConnectionCreateEndParams,
+    TraceConnectionCreateStartParams,
+    TraceConnectionQueuedEndParams,
+    TraceConnectionQueuedStartParams,
+    TraceRequestExceptionParams,
+    TraceRequestHeadersSentParams,
+    TraceResponseChunkReceivedParams,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+Hook = Callable[[str, float, Mapping[str, str]], None]
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    """A histogram with fixed bucket boundaries"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class SpotifyMetrics:
+    """Metrics for the requests made to Spotify and the OAuth flow
+
+    Pass an instance as the ``metrics`` argument of :class:`SpotifyClient`
+    or :func:`spotify_app`. The following metrics are recorded:
+
+    - ``spotify_requests_total`` for each request sent to the API, labeled
+      by ``method`` and ``status``, and ``spotify_request_seconds`` labeled
+      by ``method``
+    - ``spotify_rate_limited_total`` and ``spotify_rate_limit_wait_seconds``
+      for 429 responses and the time spent waiting on the rate limiter
+    - ``spotify_retries_total`` labeled by ``reason``
+    - ``spotify_scheduler_wait_seconds`` labeled by ``priority`` for
+      clients with a :class:`RequestScheduler`
+    - ``spotify_token_refreshes_total`` labeled by ``outcome`` and
+      ``spotify_token_refresh_seconds``
+    - ``spotify_oauth_callbacks_total`` labeled by ``outcome``
+    - ``spotify_connection_queue_seconds``,
+      ``spotify_connection_connect_seconds`` and
+      ``spotify_request_transfer_seconds`` for sessions created with
+      :func:`trace_config`; the transfer is timed from when the request
+      headers are sent until the whole response body has been read
+
+    Args:
+        buckets (Sequence[float], optional): The histogram bucket boundaries
+            in seconds
+
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.hooks: List[Hook] = []
+
+    def add_hook(self, hook: Hook) -> None:
+        """Register a function called with every recorded value
+
+        Args:
+            hook (Callable): Called as ``hook(name, value, labels)``, e.g. to
+                forward the metrics to another system
+
+        """
+        self.hooks.append(hook)
+
+    def increment(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """Increment a counter
+
+        Args:
+            name (str): The name of the counter
+            value (float, optional): The amount to add
+
+        """
+        key = _labels(labels)
+        counter = self.counters.setdefault(name, {})
+        counter[key] = counter.get(key, 0.0) + value
+        for hook in self.hooks:
+            hook(name, value, labels)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record a value in a histogram
+
+        Args:
+            name (str): The name of the histogram
+            value (float): The value, usually a duration in seconds
+
+        """
+        key = _labels(labels)
+        histogram = self.histograms.setdefault(name, {}).get(key)
+        if histogram is None:
+            histogram = self.histograms[name][key] = Histogram(self.buckets)
+        histogram.observe(value)
+        for hook in self.hooks:
+            hook(name, value, labels)
+
+    def get(self, name: str, **labels: str) -> float:
+        """The value of a counter or the number of values in a histogram"""
+        key = _labels(labels)
+        if name in self.histograms:
+            histogram = self.histograms[name].get(key)
+            return 0 if histogram is None else histogram.count
+        return self.counters.get(name, {}).get(key, 0.0)
+
+    def render_prometheus(self) -> str:
+        """Render all of the metrics in the Prometheus text format"""
+        lines = []
+        for name, counter in sorted(self.counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(counter.items()):
+                lines.append(f"{name}{_format(key)} {_number(value)}")
+        for name, histograms in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in sorted(histograms.items()):
+                total = 0
+                bounds = histogram.buckets + (float("inf"),)
+                for bound, count in zip(bounds, histogram.counts):
+                    total += count
+                    le = (("le", _number(bound)),)
+                    lines.append(f"{name}_bucket{_format(key + le)} {total}")
+                lines.append(
+                    f"{name}_sum{_format(key)} {_number(histogram.sum)}"
+                )
+                lines.append(f"{name}_count{_format(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def trace_config(self) -> TraceConfig:
+        """Get a trace config that times the stages of each HTTP request
+
+        Pass this to the ``trace_configs`` argument of ``ClientSession`` to
+        record the time spent waiting for a connection from the pool,
+        establishing new connections, and transferring the request and the
+        response. The transfer is only recorded for responses that are read
+        in full, e.g. using ``read()`` or ``json()``.
+
+        Returns:
+            TraceConfig: The trace config
+
+        """
+        config = TraceConfig()
+
+        async def on_queued_start(
+            session: Any,
+            context: SimpleNamespace,
+            _: TraceConnectionQueuedStartParams,
+        ) -> None:
+            context.queued_start = time.perf_counter()
+
+        async def on_queued_end(
+            session: Any,
+            context: SimpleNamespace,
+            _: TraceConnectionQueuedEndParams,
+        ) -> None:
+            self.observe(
+                "spotify_connection_queue_seconds",
+                time.perf_counter() - context.queued_start,
+            )
+
+        async def on_create_start(
+            session: Any,
+            context: SimpleNamespace,
+            _: TraceConnectionCreateStartParams,
+        ) -> None:
+            context.create_start = time.perf_counter()
+
+        async def on_create_end(
+            session: Any,
+            context: SimpleNamespace,
+            _: TraceConnectionCreateEndParams,
+        ) -> None:
+            self.observe(
+                "spotify_connection_connect_seconds",
+                time.perf_counter() - context.create_start,
+            )
+
+        async def on_headers_sent(
+            session: Any,
+            context: SimpleNamespace,
+            _: TraceRequestHeadersSentParams,
+        ) -> None:
+            context.transfer_start = time.perf_counter()
+
+        async def on_chunk_received(
+            session: Any,
+            context: SimpleNamespace,
+            _: TraceResponseChunkReceivedParams,
+        ) -> None:
+            # This is sent once the whole body has been read
+            start = getattr(context, "transfer_start", None)
+            if start is None:
+                return
+            context.transfer_start = None
+            self.observe(
+                "spotify_request_transfer_seconds",
+                time.perf_counter() - start,
+            )
+
+        async def on_request_exception(
+            session: Any,
+            context: SimpleNamespace,
+            params: TraceRequestExceptionParams,
+        ) -> None:
+            self.increment(
+                "spotify_request_errors_total",
+                error=type(params.exception).__name__,
+            )
+
+        # aiohttp's stubs type the trace signals as holding callbacks that
+        # take a callback, so mypy rejects correctly typed handlers here
+        config.on_connection_queued_start.append(on_queued_start)  # type: ignore[arg-type]
+        config.on_connection_queued_end.append(on_queued_end)  # type: ignore[arg-type]
+        config.on_connection_create_start.append(on_create_start)  # type: ignore[arg-type]
+        config.on_connection_create_end.append(on_create_end)  # type: ignore[arg-type]
+        config.on_request_headers_sent.append(on_headers_sent)  # type: ignore[arg-type]
+        config.on_response_chunk_received.append(on_chunk_received)  # type: ignore[arg-type]
+        config.on_request_exception.append(on_request_exception)  # type: ignore[arg-type]
+        return config
+
+
+def _labels(labels: Mapping[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
@@ -1,10 +1,17 @@
-__all__ = ["mock_api_app"]
+__all__ = ["mock_api_app", "generate_fixtures", "issue_tokens"]
 
+import asyncio
+import random
 import secrets
+import time
+from collections import Counter
+from typing import Any, Dict, List, Mapping, Optional
 
 import yarl
 from aiohttp import web
 
+MAX_IDS = {"tracks": 50, "artists": 50, "audio-features": 100}
+
 
 async def authorize(request: web.Request) -> web.Response:
     client_id = request.query.get("client_id")
@@ -17,6 +24,7 @@ async def authorize(request: web.Request) -> web.Response:
     if (
         client_id != request.app["client_id"]
         or response_type != "code"
+        or redirect_uri is None
         or redirect_uri != request.app["redirect_uri"]
     ):
         raise web.HTTPBadRequest(body="bad request")
@@ -30,6 +38,7 @@ async def authorize(request: web.Request) -> web.Response:
     else:
         code = secrets.token_urlsafe()
         data["code"] = request.app["code"] = code
+        request.app["codes"].add(code)
 
     return web.HTTPTemporaryRedirect(
         location=yarl.URL(redirect_uri).with_query(data)
@@ -37,6 +46,7 @@ async def authorize(request: web.Request) -> web.Response:
 
 
 async def token(request: web.Request) -> web.Response:
+    request.app["stats"]["token_requests"] += 1
     data = await request.post()
     client_id = data.get("client_id")
     client_secret = data.get("client_secret")
@@ -53,54 +63,503 @@ async def token(request: web.Request) -> web.Response:
         if redirect_uri != request.app["redirect_uri"]:
             raise web.HTTPBadRequest(body="invalid redirect")
         code = data.get("code")
-        if code != request.app["code"]:
+        if code not in request.app["codes"]:
             raise web.HTTPBadRequest(body="invalid code")
-        access_token = request.app["access_token"] = secrets.token_urlsafe()
-        refresh_token = request.app["refresh_token"] = secrets.token_urlsafe()
-        return web.json_response(
-            dict(
-                access_token=access_token,
-                token_type="Bearer",
-                scope=request.app["scope"],
-                expires_in=3600,
-                refresh_token=refresh_token,
-            )
-        )
+        request.app["codes"].discard(code)
+        return web.json_response(issue_tokens(request.app))
     elif grant_type == "refresh_token":
         this_refresh_token = data.get("refresh_token")
-        if this_refresh_token != request.app["refresh_token"]:
+        if this_refresh_token not in request.app["refresh_tokens"]:
             raise web.HTTPBadRequest(body="invalid refresh_token")
-        access_token = request.app["access_token"] = secrets.token_urlsafe()
+        request.app["stats"]["refreshes"] += 1
+        return web.json_response(issue_tokens(request.app, refresh=False))
+    elif grant_type == "client_credentials":
+        request.app["stats"]["app_tokens"] += 1
+        return web.json_response(issue_tokens(request.app, refresh=False))
+
+    raise web.HTTPBadRequest(body="invalid grant type")
+
+
+def issue_tokens(app: web.Application, refresh: bool = True) -> Dict[str, Any]:
+    """Issue a new access token (and refresh token) from the mock API
+
+    This can be used to create users for tests without going through the
+    OAuth flow.
+
+    Args:
+        app (web.Application): The mock API app
+        refresh (bool, optional): Whether to issue a refresh token too
+
+    Returns:
+        Dict[str, Any]: The token response
+
+    """
+    lifetime = app["token_lifetime"]
+    access_token = app["access_token"] = secrets.token_urlsafe()
+    app["access_tokens"][access_token] = time.time() + lifetime
+    tokens = dict(
+        access_token=access_token,
+        token_type="Bearer",
+        scope=app.get("scope"),
+        expires_in=lifetime,
+    )
+    if refresh:
+        refresh_token = app["refresh_token"] = secrets.token_urlsafe()
+        app["refresh_tokens"].add(refresh_token)
+        tokens["refresh_token"] = refresh_token
+    return tokens
+
+
+def error_response(status: int, message: str, **kwargs) -> web.Response:
+    return web.json_response(
+        dict(error=dict(status=status, message=message)),
+        status=status,
+        **kwargs,
+    )
+
+
+async def api(request: web.Request) -> web.Response:
+    app = request.app
+    stats = app["stats"]
+    rng = app["random"]
+    stats["requests"] += 1
+
+    # Simulate the network and processing time
+    delay = app["latency"] + app["jitter"] * rng.random()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+    # Rate limit everyone for a while after a random request
+    now = time.monotonic()
+    if now >= app["rate_limited_until"] and rng.random() < app["rate_limit"]:
+        app["rate_limited_until"] = now + app["retry_after"]
+    if now < app["rate_limited_until"]:
+        stats["rate_limited"] += 1
+        return error_response(
+            429,
+            "API rate limit exceeded",
+            headers={"Retry-After": str(app["retry_after"])},
+        )
+
+    if rng.random() < app["error_rate"]:
+        stats["errors"] += 1
+        return error_response(503, "Service unavailable")
+
+    # Check the access token
+    authorization = request.headers.get("Authorization", "")
+    expires_at = app["access_tokens"].get(authorization[len("Bearer ") :])
+    if not authorization.startswith("Bearer ") or expires_at is None:
+        return error_response(401, "Invalid access token")
+    if expires_at <= time.time():
+        stats["expired"] += 1
+        return error_response(401, "The access token expired")
+
+    fixtures = app["fixtures"]
+    parts = request.match_info["endpoint"].strip("/").split("/")
+    if request.method != "GET":
+        return await mutate(request, parts)
+
+    if parts == ["me"]:
+        return web.json_response(fixtures["me"])
+    if parts == ["me", "tracks"]:
+        return paging_response(request, fixtures["saved_tracks"], 50)
+    if parts == ["me", "playlists"]:
+        playlists = [p["playlist"] for p in fixtures["playlists"].values()]
+        return paging_response(request, playlists, 50)
+    if parts == ["me", "following"]:
+        if request.query.get("type") != "artist":
+            return error_response(400, "Invalid type")
+        return cursor_response(request, fixtures["followed_artists"])
+
+    if parts[0] in MAX_IDS:
+        key = parts[0].replace("-", "_")
+        objects = fixtures[key]
+        if len(parts) == 1:
+            ids = [id for id in request.query.get("ids", "").split(",") if id]
+            if not ids or len(ids) > MAX_IDS[parts[0]]:
+                return error_response(400, "Invalid ids")
+            return web.json_response({key: [objects.get(id) for id in ids]})
+        if len(parts) == 2 and parts[1] in objects:
+            return web.json_response(objects[parts[1]])
+
+    if parts[0] == "playlists" and len(parts) >= 2:
+        playlist = fixtures["playlists"].get(parts[1])
+        if playlist is not None:
+            if len(parts) == 2:
+                return web.json_response(playlist["playlist"])
+            if len(parts) == 3 and parts[2] in ("tracks", "items"):
+                return paging_response(request, playlist["items"], 100)
+
+    return error_response(404, "Not found")
+
+
+async def mutate(request: web.Request, parts: List[str]) -> web.Response:
+    fixtures = request.app["fixtures"]
+    method = request.method
+
+    if parts == ["me", "tracks"] and method in ("PUT", "DELETE"):
+        ids = [id for id in request.query.get("ids", "").split(",") if id]
+        if not ids or len(ids) > 50:
+            return error_response(400, "Invalid ids")
+        if any(id not in fixtures["tracks"] for id in ids):
+            return error_response(400, "Invalid track id")
+        saved = fixtures["saved_tracks"]
+        saved[:] = [item for item in saved if item["track"]["id"] not in ids]
+        if method == "PUT":
+            saved[:0] = [
+                dict(added_at=_timestamp(), track=fixtures["tracks"][id])
+                for id in reversed(ids)
+            ]
+        return web.Response()
+
+    if (
+        parts[0] == "playlists"
+        and len(parts) == 3
+        and parts[2] in ("tracks", "items")
+        and method in ("POST", "DELETE")
+    ):
+        playlist = fixtures["playlists"].get(parts[1])
+        if playlist is None:
+            return error_response(404, "Not found")
+        try:
+            data = await request.json()
+        except ValueError:
+            return error_response(400, "Invalid JSON")
+
+        items = playlist["items"]
+        if method == "POST":
+            uris = data.get("uris") or []
+            if not uris or len(uris) > 100:
+                return error_response(400, "Invalid uris")
+            tracks = [
+                fixtures["tracks"].get(uri.split(":")[-1]) for uri in uris
+            ]
+            if any(track is None for track in tracks):
+                return error_response(400, "Invalid track uri")
+            position = data.get("position", len(items))
+            items[position:position] = [
+                dict(added_at=_timestamp(), track=track) for track in tracks
+            ]
+        else:
+            uris = [track["uri"] for track in data.get("tracks") or []]
+            if not uris or len(uris) > 100:
+                return error_response(400, "Invalid tracks")
+            remove = set(uris)
+            items[:] = [
+                item for item in items if item["track"]["uri"] not in remove
+            ]
+
+        snapshot_id = secrets.token_urlsafe()
+        playlist["playlist"]["snapshot_id"] = snapshot_id
+        playlist["playlist"]["tracks"]["total"] = len(items)
         return web.json_response(
+            dict(snapshot_id=snapshot_id),
+            status=201 if method == "POST" else 200,
+        )
+
+    return error_response(405, "Method not allowed")
+
+
+def _timestamp() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def paging_response(
+    request: web.Request, items: List[Any], max_limit: int
+) -> web.Response:
+    try:
+        offset = int(request.query.get("offset", 0))
+        limit = int(request.query.get("limit", 20))
+    except ValueError:
+        return error_response(400, "Invalid offset or limit")
+    if offset < 0 or not 0 < limit <= max_limit:
+        return error_response(400, "Invalid offset or limit")
+
+    def url(offset: int) -> Optional[str]:
+        if not 0 <= offset < len(items):
+            return None
+        return str(request.url.update_query(offset=offset, limit=limit))
+
+    return web.json_response(
+        dict(
+            href=str(request.url),
+            items=items[offset : offset + limit],
+            limit=limit,
+            offset=offset,
+            total=len(items),
+            next=url(offset + limit),
+            previous=url(offset - limit) if offset > 0 else None,
+        )
+    )
+
+
+def cursor_response(request: web.Request, ids: List[str]) -> web.Response:
+    try:
+        limit = int(request.query.get("limit", 20))
+    except ValueError:
+        return error_response(400, "Invalid limit")
+    if not 0 < limit <= 50:
+        return error_response(400, "Invalid limit")
+    start = 0
+    after = request.query.get("after")
+    if after is not None:
+        start = ids.index(after) + 1 if after in ids else len(ids)
+
+    artists = request.app["fixtures"]["artists"]
+    items = [artists[id] for id in ids[start : start + limit]]
+    more = start + limit < len(ids)
+    after = items[-1]["id"] if items and more else None
+    return web.json_response(
+        dict(
+            artists=dict(
+                href=str(request.url),
+                items=items,
+                limit=limit,
+                total=len(ids),
+                cursors=dict(after=after),
+                next=(
+                    str(request.url.update_query(after=after))
+                    if after
+                    else None
+                ),
+            )
+        )
+    )
+
+
+def generate_fixtures(
+    *,
+    num_artists: int = 50,
+    num_albums: int = 100,
+    num_tracks: int = 1000,
+    num_playlists: int = 3,
+    playlist_size: int = 250,
+    num_saved_tracks: int = 100,
+    num_followed_artists: int = 30,
+    seed: int = 42,
+) -> Mapping[str, Any]:
+    """Generate a fake catalog for the mock API
+
+    Args:
+        num_artists (int, optional): The number of artists
+        num_albums (int, optional): The number of albums
+        num_tracks (int, optional): The number of tracks
+        num_playlists (int, optional): The number of playlists
+        playlist_size (int, optional): The number of tracks per playlist
+        num_saved_tracks (int, optional): The number of tracks saved in the
+            user's library
+        num_followed_artists (int, optional): The number of artists that the
+            user follows
+        seed (int, optional): The random seed
+
+    Returns:
+        Mapping[str, Any]: The fixtures with the keys ``me``, ``artists``,
+        ``tracks``, ``playlists``, ``saved_tracks``,
+        ``followed_artists`` and ``audio_features``
+
+    """
+    rng = random.Random(seed)
+
+    def uri(kind: str, id: str) -> str:
+        return f"spotify:{kind}:{id}"
+
+    artists = {}
+    for n in range(num_artists):
+        id = f"artist{n:06d}"
+        artists[id] = dict(
+            id=id,
+            name=f"Artist {n}",
+            type="artist",
+            uri=uri("artist", id),
+            genres=[],
+            popularity=rng.randrange(100),
+        )
+    artist_list = list(artists.values())
+
+    def simplified_artist(artist: Mapping[str, Any]) -> Dict[str, Any]:
+        return {k: artist[k] for k in ("id", "name", "type", "uri")}
+
+    albums: List[Dict[str, Any]] = []
+    for n in range(num_albums):
+        id = f"album{n:06d}"
+        albums.append(
             dict(
-                access_token=access_token,
-                token_type="Bearer",
-                scope=request.app["scope"],
-                expires_in=3600,
+                id=id,
+                name=f"Album {n}",
+                type="album",
+                uri=uri("album", id),
+                album_type="album",
+                release_date=f"{rng.randrange(1960, 2021)}-01-01",
+                total_tracks=0,
+                artists=[simplified_artist(rng.choice(artist_list))],
             )
         )
 
-    raise web.HTTPBadRequest(body="invalid grant type")
+    tracks = {}
+    for n in range(num_tracks):
+        id = f"track{n:06d}"
+        album = rng.choice(albums)
+        album["total_tracks"] += 1
+        tracks[id] = dict(
+            id=id,
+            name=f"Track {n}",
+            type="track",
+            uri=uri("track", id),
+            album=album,
+            artists=album["artists"],
+            disc_number=1,
+            track_number=album["total_tracks"],
+            duration_ms=rng.randrange(60000, 600000),
+            explicit=rng.random() < 0.1,
+            popularity=rng.randrange(100),
+        )
+    track_list = list(tracks.values())
 
+    me = dict(
+        id="mock_user",
+        display_name="Mock User",
+        type="user",
+        uri=uri("user", "mock_user"),
+    )
 
-async def api(request: web.Request) -> web.Response:
-    pass
+    playlists = {}
+    for n in range(num_playlists):
+        id = f"playlist{n:06d}"
+        items = [
+            dict(added_at="2020-01-01T00:00:00Z", track=rng.choice(track_list))
+            for _ in range(playlist_size)
+        ]
+        playlists[id] = dict(
+            playlist=dict(
+                id=id,
+                name=f"Playlist {n}",
+                type="playlist",
+                uri=uri("playlist", id),
+                owner=me,
+                snapshot_id=secrets.token_urlsafe(),
+                public=True,
+                collaborative=False,
+                tracks=dict(total=len(items)),
+            ),
+            items=items,
+        )
+
+    saved_tracks = [
+        dict(added_at="2020-01-01T00:00:00Z", track=track)
+        for track in rng.sample(track_list, min(num_saved_tracks, num_tracks))
+    ]
+
+    followed_artists = sorted(
+        rng.sample(list(artists), min(num_followed_artists, num_artists))
+    )
+
+    # Some tracks don't have audio features
+    audio_features = {}
+    for n, (id, track) in enumerate(tracks.items()):
+        if n % 50 == 49:
+            continue
+        audio_features[id] = dict(
+            id=id,
+            type="audio_features",
+            uri=track["uri"],
+            danceability=rng.random(),
+            energy=rng.random(),
+            key=rng.randrange(-1, 12),
+            loudness=-60 * rng.random(),
+            mode=rng.randrange(2),
+            speechiness=rng.random(),
+            acousticness=rng.random(),
+            instrumentalness=rng.random(),
+            liveness=rng.random(),
+            valence=rng.random(),
+            tempo=60 + 140 * rng.random(),
+            duration_ms=track["duration_ms"],
+            time_signature=rng.randrange(3, 8),
+        )
+
+    return dict(
+        me=me,
+        artists=artists,
+        tracks=tracks,
+        playlists=playlists,
+        saved_tracks=saved_tracks,
+        followed_artists=followed_artists,
+        audio_features=audio_features,
+    )
 
 
 def mock_api_app(
-    client_id: str, client_secret: str, redirect_uri: str
+    client_id: str,
+    client_secret: str,
+    redirect_uri: str,
+    *,
+    fixtures: Optional[Mapping[str, Any]] = None,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    rate_limit: float = 0.0,
+    retry_after: float = 1,
+    token_lifetime: int = 3600,
+    seed: Optional[int] = None,
 ) -> web.Application:
+    """A local stand-in for the Spotify accounts service and Web API
+
+    The accounts service is available at ``/authorize`` and ``/token``, and
+    the Web API is available under ``/api``. All of the knobs are stored on
+    the app (e.g. ``app["latency"]``) so that they can be changed while the
+    app is running, and ``app["stats"]`` counts the requests, token
+    refreshes and injected failures.
+
+    Args:
+        client_id (str): The client ID expected from the client
+        client_secret (str): The client secret expected from the client
+        redirect_uri (str): The redirect URI expected from the client
+        fixtures (Mapping[str, Any], optional): The catalog to serve; see
+            :func:`generate_fixtures`
+        latency (float, optional): The minimum time in seconds taken by
+            each API request
+        jitter (float, optional): The maximum random time in seconds added
+            to the latency
+        error_rate (float, optional): The probability of responding with a
+            503 error
+        rate_limit (float, optional): The probability of starting a window
+            where every request is rate limited
+        retry_after (float, optional): The length of that window in seconds,
+            returned as the ``Retry-After`` header
+        token_lifetime (int, optional): The lifetime of the access tokens in
+            seconds
+        seed (int, optional): The seed for the injected randomness
+
+    Returns:
+        web.Application: The mock API app
+
+    """
     app = web.Application()
 
     app["client_id"] = client_id
     app["client_secret"] = client_secret
     app["redirect_uri"] = redirect_uri
 
+    app["fixtures"] = generate_fixtures() if fixtures is None else fixtures
+    app["latency"] = latency
+    app["jitter"] = jitter
+    app["error_rate"] = error_rate
+    app["rate_limit"] = rate_limit
+    app["retry_after"] = retry_after
+    app["token_lifetime"] = token_lifetime
+    app["random"] = random.Random(seed)
+
+    app["codes"] = set()
+    app["access_tokens"] = {}
+    app["refresh_tokens"] = set()
+    app["rate_limited_until"] = 0.0
+    app["stats"] = Counter()
+
     app.router.add_routes(
         [
             web.get("/authorize", authorize, name="authorize"),
             web.post("/token", token, name="token"),
-            web.route("*", "/api/{endpoint}", api, name="api"),
+            web.route("*", "/api/{endpoint:.*}", api, name="api"),
         ]
     )
 
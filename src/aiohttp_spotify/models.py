@@ -0,0 +1,237 @@
+__all__ = [
+    "Artist",
+    "Album",
+    "Track",
+    "TrackItem",
+    "Playlist",
+    "PagingObject",
+    "LazySequence",
+    "ModelDecoder",
+]
+
+import sys
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
+
+T = TypeVar("T")
+
+
+class Artist(NamedTuple):
+    """A compact representation of an artist"""
+
+    id: Optional[str]
+    name: str
+    uri: Optional[str]
+
+
+class Album(NamedTuple):
+    """A compact representation of an album"""
+
+    id: Optional[str]
+    name: str
+    uri: Optional[str]
+    album_type: str
+    release_date: str
+    total_tracks: int
+    artists: Tuple[Artist, ...]
+
+
+class Track(NamedTuple):
+    """A compact representation of a track"""
+
+    id: Optional[str]
+    name: str
+    uri: str
+    duration_ms: int
+    explicit: bool
+    popularity: Optional[int]
+    disc_number: int
+    track_number: int
+    album: Optional[Album]
+    artists: Tuple[Artist, ...]
+
+
+class TrackItem(NamedTuple):
+    """A track in a playlist or a user's library"""
+
+    added_at: Optional[str]
+    track: Optional[Track]
+
+
+class Playlist(NamedTuple):
+    """A compact representation of a playlist"""
+
+    id: str
+    name: str
+    uri: str
+    owner_id: str
+    snapshot_id: str
+    public: Optional[bool]
+    collaborative: bool
+    total_tracks: int
+
+
+class LazySequence(Sequence[T]):
+    """A read-only sequence that decodes its elements when accessed"""
+
+    __slots__ = ("_data", "_decode")
+
+    def __init__(
+        self, data: Sequence[Any], decode: Callable[[Any], T]
+    ) -> None:
+        self._data = data
+        self._decode = decode
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[T]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[T, List[T]]:
+        if isinstance(index, slice):
+            return [self._decode(item) for item in self._data[index]]
+        return self._decode(self._data[index])
+
+    def __iter__(self) -> Iterator[T]:
+        return map(self._decode, self._data)
+
+
+class PagingObject(NamedTuple):
+    """A page of results whose items are decoded when they are accessed
+
+    Copy the items (e.g. using ``list(page.items)``) to release the parsed
+    response body.
+    """
+
+    items: LazySequence[Any]
+    offset: int
+    limit: int
+    total: Optional[int]
+    next: Optional[str]
+
+
+class ModelDecoder:
+    """Decode parsed responses into compact models
+
+    Artists and albums are interned by ID: every repeated artist or album
+    decoded by the same decoder is represented by a single object. Local
+    files have no IDs, so their artists and albums are never interned.
+    Strings that are repeated between objects, like album types and release
+    dates, are interned too. Use one decoder for all of the objects that are
+    held in memory together.
+
+    """
+
+    def __init__(self) -> None:
+        self.artists: Dict[str, Artist] = {}
+        self.albums: Dict[str, Album] = {}
+
+    def clear(self) -> None:
+        """Forget the interned artists and albums"""
+        self.artists.clear()
+        self.albums.clear()
+
+    def artist(self, data: Mapping[str, Any]) -> Artist:
+        """Decode an artist object"""
+        id = data.get("id")
+        artist = None if id is None else self.artists.get(id)
+        if artist is None:
+            artist = Artist(id, data["name"], data["uri"])
+            if id is not None:
+                self.artists[id] = artist
+        return artist
+
+    def album(self, data: Mapping[str, Any]) -> Album:
+        """Decode an album object"""
+        id = data.get("id")
+        album = None if id is None else self.albums.get(id)
+        if album is None:
+            album = Album(
+                id,
+                data["name"],
+                data["uri"],
+                sys.intern(data.get("album_type") or "album"),
+                sys.intern(data.get("release_date") or ""),
+                data.get("total_tracks", 0),
+                tuple(map(self.artist, data.get("artists", ()))),
+            )
+            if id is not None:
+                self.albums[id] = album
+        return album
+
+    def track(self, data: Mapping[str, Any]) -> Track:
+        """Decode a track object"""
+        album = data.get("album")
+        return Track(
+            data.get("id"),
+            data["name"],
+            data["uri"],
+            data.get("duration_ms", 0),
+            data.get("explicit", False),
+            data.get("popularity"),
+            data.get("disc_number", 1),
+            data.get("track_number", 0),
+            None if album is None else self.album(album),
+            tuple(map(self.artist, data.get("artists", ()))),
+        )
+
+    def track_item(self, data: Mapping[str, Any]) -> TrackItem:
+        """Decode a playlist track or saved track object"""
+        track = data.get("track")
+        added_at = data.get("added_at")
+        return TrackItem(
+            None if added_at is None else sys.intern(added_at),
+            None if track is None else self.track(track),
+        )
+
+    def playlist(self, data: Mapping[str, Any]) -> Playlist:
+        """Decode a playlist object"""
+        return Playlist(
+            data["id"],
+            data["name"],
+            data["uri"],
+            data["owner"]["id"],
+            data["snapshot_id"],
+            data.get("public"),
+            data.get("collaborative", False),
+            data.get("tracks", {}).get("total", 0),
+        )
+
+    def paging(
+        self, data: Mapping[str, Any], decode: Callable[[Any], T]
+    ) -> PagingObject:
+        """Decode a paging object
+
+        Args:
+            data (Mapping[str, Any]): The parsed paging object
+            decode (Callable): The function used to decode each item, e.g.
+                ``decoder.track_item`` for the tracks in a playlist
+
+        Returns:
+            PagingObject: The page
+
+        """
+        return PagingObject(
+            LazySequence(data["items"], decode),
+            data.get("offset", 0),
+            data.get("limit", len(data["items"])),
+            data.get("total"),
+            data.get("next"),
+        )
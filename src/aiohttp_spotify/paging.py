@@ -0,0 +1,160 @@
+__all__ = ["Paginator"]
+
+import asyncio
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Deque,
+    Dict,
+    Mapping,
+    Optional,
+)
+
+import yarl
+from aiohttp import ClientSession
+
+if TYPE_CHECKING:
+    from .api import SpotifyAuth, SpotifyClient
+
+
+class Paginator:
+    """Iterate over all of the items in a paging object from the API
+
+    Use this with ``async for``. After the first page reveals the total
+    number of items, the remaining pages are requested concurrently, but at
+    most ``concurrency`` pages are in flight or buffered at any time, and
+    the items are always yielded in order. Paging objects without a
+    ``total`` (e.g. cursor based ones) are followed serially using ``next``.
+
+    Args:
+        client (SpotifyClient): The client used to make the requests
+        session (ClientSession): A session for executing HTTP requests
+        auth (Optional[SpotifyAuth]): The current authorization
+            information, or ``None`` to use the client's app token
+        endpoint (str): The API endpoint returning the paging object
+        key (str, optional): If the paging object is nested in the
+            response (e.g. ``"tracks"`` for search results), its key
+        limit (int, optional): The number of items requested per page
+        offset (int, optional): The offset of the first item
+        concurrency (int, optional): The maximum number of pages requested
+            at once
+
+    Attributes:
+        auth (Optional[SpotifyAuth]): The latest authorization information
+        auth_changed (bool): True if the authorization was updated while
+            iterating
+        total (Optional[int]): The total number of items, once known
+
+    """
+
+    def __init__(
+        self,
+        client: "SpotifyClient",
+        session: ClientSession,
+        auth: Optional["SpotifyAuth"],
+        endpoint: str,
+        *,
+        key: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        concurrency: int = 4,
+        **payload,
+    ):
+        if concurrency < 1:
+            raise ValueError("The 'concurrency' must be at least 1")
+        self.client = client
+        self.session = session
+        self.auth = auth
+        self.auth_changed = False
+        self.endpoint = endpoint
+        self.key = key
+        self.limit = limit
+        self.offset = offset
+        self.concurrency = concurrency
+        self.params: Dict[str, Any] = dict(payload.pop("params", None) or {})
+        self.payload = payload
+        self.total: Optional[int] = None
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[Any]:
+        page = await self._fetch_offset(self.offset)
+        for item in page["items"]:
+            yield item
+
+        self.total = page.get("total")
+        if self.total is None:
+            while page.get("next"):
+                page = await self._fetch_url(page["next"])
+                for item in page["items"]:
+                    yield item
+            return
+
+        step = page.get("limit") or self.limit
+        offsets = iter(
+            range(page.get("offset", self.offset) + step, self.total, step)
+        )
+        pending: Deque["asyncio.Future[Mapping[str, Any]]"] = deque()
+        try:
+            while True:
+                while len(pending) < self.concurrency:
+                    offset = next(offsets, None)
+                    if offset is None:
+                        break
+                    pending.append(
+                        asyncio.ensure_future(self._fetch_offset(offset))
+                    )
+                if not pending:
+                    break
+                page = await pending.popleft()
+                for item in page["items"]:
+                    yield item
+        finally:
+            # A page can still fail after it is cancelled, so mark its error
+            # as retrieved to avoid warnings about it
+            for future in pending:
+                future.cancel()
+                future.add_done_callback(_retrieve)
+
+    async def _fetch_offset(self, offset: int) -> Mapping[str, Any]:
+        params = dict(self.params, offset=offset, limit=self.limit)
+        return await self._fetch(self.endpoint, params=params)
+
+    async def _fetch_url(self, url: str) -> Mapping[str, Any]:
+        # The 'next' links are absolute and include the query parameters;
+        # links to the API are requested relative to it and anything else
+        # is requested as it is
+        next_url = yarl.URL(url, encoded=True)
+        api_url = yarl.URL(self.client.api_url, encoded=True)
+        base = api_url.raw_path
+        path = next_url.raw_path
+        if (
+            (next_url.scheme, next_url.host, next_url.port)
+            == (api_url.scheme, api_url.host, api_url.port)
+            and not base.endswith("/")
+            and (path == base or path.startswith(base + "/"))
+        ):
+            url = path[len(base) :]
+            if next_url.raw_query_string:
+                url += "?" + next_url.raw_query_string
+        return await self._fetch(url)
+
+    async def _fetch(self, endpoint: str, **kwargs) -> Mapping[str, Any]:
+        response = await self.client.request(
+            self.session, self.auth, endpoint, **kwargs, **self.payload
+        )
+        if response.auth_changed:
+            self.auth = response.auth
+            self.auth_changed = True
+        data = response.json()
+        if self.key is not None:
+            data = data[self.key]
+        return data
+
+
+def _retrieve(future: "asyncio.Future[Any]") -> None:
+    if not future.cancelled():
+        future.exception()
@@ -0,0 +1,422 @@
+__all__ = [
+    "AdaptiveLimiter",
+    "RateLimiter",
+    "RateLimitCoordinator",
+    "SQLiteRateLimitCoordinator",
+]
+
+import asyncio
+import logging
+import math
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Optional, Set, Tuple
+
+from ._sqlite import SQLiteExecutor
+
+logger = logging.getLogger("aiohttp_spotify")
+
+
+class RateLimitCoordinator(ABC):
+    """The interface for sharing a rate limit between processes
+
+    The back off deadlines are wall clock times (from ``time.time()``) so
+    that they can be compared between processes.
+
+    """
+
+    @abstractmethod
+    async def blocked_until(self) -> float:
+        """The time when the shared back off window ends"""
+
+    @abstractmethod
+    async def backoff(self, until: float) -> None:
+        """Extend the shared back off window
+
+        Args:
+            until (float): The time when the window should end at the
+                earliest
+
+        """
+
+    @abstractmethod
+    async def take(
+        self, rate: float, burst: int, count: int
+    ) -> Tuple[int, float]:
+        """Take up to ``count`` requests from the shared token bucket
+
+        Args:
+            rate (float): The number of requests allowed per second
+            burst (int): The size of the bucket
+            count (int): The number of requests wanted
+
+        Returns:
+            Tuple[int, float]: The number of requests granted and, if none
+            were granted, the number of seconds to wait before trying again
+
+        """
+
+    async def close(self) -> None:
+        """Release the resources"""
+
+
+class SQLiteRateLimitCoordinator(RateLimitCoordinator):
+    """Share a rate limit between the processes on one host using SQLite
+
+    Args:
+        path (str): The path to the database file shared by the processes
+
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = SQLiteExecutor(path, _create_rate_limit_table)
+
+    async def blocked_until(self) -> float:
+        rows = await self._db.fetch(
+            "SELECT blocked_until FROM spotify_rate_limit WHERE id = 1"
+        )
+        return rows[0][0]
+
+    async def backoff(self, until: float) -> None:
+        await self._db.run(_extend_backoff, until)
+
+    async def take(
+        self, rate: float, burst: int, count: int
+    ) -> Tuple[int, float]:
+        return await self._db.run(_take_tokens, rate, burst, count)
+
+    async def close(self) -> None:
+        await self._db.close()
+
+
+class RateLimiter:
+    """A rate limiter shared by all of the requests made by a client
+
+    When any response is rate limited, the limiter is put into a back off
+    window and every new request waits until that window ends. Optionally, a
+    token bucket also caps the sustained request rate.
+
+    With a ``coordinator``, the back off window and the token bucket are
+    shared with the other processes using the same coordinator. The window is
+    synchronized every ``sync_interval`` seconds and the requests are taken
+    from the shared bucket ``lease_size`` at a time.
+
+    Args:
+        rate (float, optional): The number of requests allowed per second. If
+            not provided, only the back off window is enforced.
+        burst (int, optional): The maximum number of requests that can be
+            made at once before the rate applies. Defaults to one second's
+            worth of requests.
+        coordinator (RateLimitCoordinator, optional): Share the limit with
+            other processes using this coordinator
+        sync_interval (float, optional): How often to check the shared back
+            off window
+        lease_size (int, optional): How many requests to take from the shared
+            bucket at a time
+
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        coordinator: Optional[RateLimitCoordinator] = None,
+        sync_interval: float = 0.1,
+        lease_size: int = 1,
+    ):
+        if rate is not None and rate <= 0:
+            raise ValueError("The 'rate' must be positive")
+        self.rate = rate
+        if burst is None:
+            burst = 1 if rate is None else max(1, math.ceil(rate))
+        self.burst = burst
+        self.coordinator = coordinator
+        self.sync_interval = sync_interval
+        self.lease_size = lease_size
+        self._tokens = 0.0 if coordinator is not None else float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._synced = -math.inf
+        self._pending: Set["asyncio.Future[None]"] = set()
+
+    @property
+    def blocked_for(self) -> float:
+        """The number of seconds left in the current back off window"""
+        return max(0.0, self._blocked_until - time.monotonic())
+
+    def backoff(self, delay: float) -> None:
+        """Block all new requests for at least ``delay`` seconds
+
+        Args:
+            delay (float): The length of the back off window in seconds,
+                usually taken from a ``Retry-After`` header
+
+        """
+        self._blocked_until = max(
+            self._blocked_until, time.monotonic() + delay
+        )
+        if self.coordinator is not None:
+            future = asyncio.ensure_future(self._share_backoff(delay))
+            self._pending.add(future)
+            future.add_done_callback(self._pending.discard)
+
+    async def acquire(self) -> None:
+        """Wait until a request is allowed to be sent"""
+        while True:
+            if self.coordinator is not None:
+                await self._sync()
+            now = time.monotonic()
+            delay = self._blocked_until - now
+            if delay <= 0:
+                if self.rate is None:
+                    return
+                if self.coordinator is None:
+                    self._tokens = min(
+                        float(self.burst),
+                        self._tokens + (now - self._updated) * self.rate,
+                    )
+                    self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                if self.coordinator is None:
+                    delay = (1 - self._tokens) / self.rate
+                else:
+                    granted, delay = await self._take()
+                    if granted:
+                        self._tokens += granted
+                        continue
+            await asyncio.sleep(delay)
+
+    async def _sync(self) -> None:
+        assert self.coordinator is not None
+        now = time.monotonic()
+        if now - self._synced < self.sync_interval:
+            return
+        self._synced = now
+        try:
+            until = await self.coordinator.blocked_until()
+        except Exception:
+            logger.exception("Failed to read the shared rate limit")
+            return
+        self._blocked_until = max(
+            self._blocked_until, time.monotonic() + until - time.time()
+        )
+
+    async def _take(self) -> Tuple[int, float]:
+        assert self.coordinator is not None and self.rate is not None
+        try:
+            return await self.coordinator.take(
+                self.rate, self.burst, self.lease_size
+            )
+        except Exception:
+            logger.exception("Failed to take from the shared rate limit")
+            return 0, 1 / self.rate
+
+    async def _share_backoff(self, delay: float) -> None:
+        assert self.coordinator is not None
+        try:
+            await self.coordinator.backoff(time.time() + delay)
+        except Exception:
+            logger.exception("Failed to share the rate limit back off")
+
+
+class AdaptiveLimiter:
+    """A concurrency limit that adapts to the responses from the API
+
+    The limit grows additively, by about ``increase`` for every ``limit``
+    requests that complete quickly and successfully, and it is cut
+    multiplicatively by ``decrease`` when a request is rate limited, fails
+    with a server or connection error, or takes more than ``latency_factor``
+    times the typical latency. Only requests that were sent after the last
+    cut can trigger another one, so one burst of failures only cuts the limit
+    once. The typical latency is updated by every response, so when the
+    latency of the API shifts for good, the limit is only cut until the
+    typical latency catches up.
+
+    Args:
+        initial (int, optional): The initial limit
+        min_limit (int, optional): The lowest that the limit can go
+        max_limit (int, optional): The highest that the limit can go
+        increase (float, optional): The additive increase per ``limit``
+            successful requests
+        decrease (float, optional): The factor that the limit is multiplied
+            by when it is cut
+        latency_factor (float, optional): How many times slower than the
+            typical latency a response must be to count as a latency spike
+        smoothing (float, optional): The weight of each new latency in the
+            exponentially weighted typical latency
+        history_size (int, optional): The number of changes to the limit
+            kept in ``history``
+
+    Attributes:
+        limit (float): The current limit; ``int(limit)`` requests are
+            allowed in flight at once
+        in_flight (int): The number of requests in flight
+        history (Deque[Tuple[float, float]]): The most recent changes to the
+            limit as ``(time.time(), limit)`` pairs
+
+    """
+
+    def __init__(
+        self,
+        initial: int = 10,
+        *,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_factor: float = 3.0,
+        smoothing: float = 0.05,
+        history_size: int = 1000,
+    ):
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError(
+                "The limits must satisfy 1 <= min_limit <= initial <= "
+                "max_limit"
+            )
+        if not 0 < decrease < 1:
+            raise ValueError("The 'decrease' must be between 0 and 1")
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.history: Deque[Tuple[float, float]] = deque(
+            [(time.time(), self.limit)], maxlen=history_size
+        )
+        self._decreased = -math.inf
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+
+    async def acquire(self) -> float:
+        """Wait until another request is allowed in flight
+
+        Returns:
+            float: The ``time.monotonic()`` when the request was let through,
+            to be passed to :func:`release`
+
+        """
+        if self.in_flight >= int(self.limit) or self._waiters:
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # We were let through just as we were cancelled
+                    self.in_flight -= 1
+                    self._wake()
+                elif future in self._waiters:
+                    # A release may already have dropped the cancelled future
+                    self._waiters.remove(future)
+                raise
+        else:
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(
+        self,
+        started: float,
+        latency: Optional[float] = None,
+        congested: bool = False,
+    ) -> None:
+        """Finish a request and update the limit
+
+        Args:
+            started (float): The value returned by :func:`acquire`
+            latency (float, optional): The time until the response arrived
+                in seconds, if there was a response
+            congested (bool, optional): True if the request was rate limited
+                or failed in a way that suggests that the API is overloaded
+
+        """
+        self.in_flight -= 1
+        if latency is not None:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                if latency > self.latency_factor * self.latency:
+                    congested = True
+                # Spikes are folded in too, so that the typical latency
+                # follows a lasting shift instead of flagging every response
+                self.latency += self.smoothing * (latency - self.latency)
+
+        if congested:
+            # Only cut once for the requests that were already in flight
+            if started > self._decreased:
+                self._decreased = time.monotonic()
+                self._set_limit(
+                    max(self.min_limit, self.limit * self.decrease)
+                )
+        elif latency is not None:
+            self._set_limit(
+                min(self.max_limit, self.limit + self.increase / self.limit)
+            )
+        self._wake()
+
+    def _set_limit(self, limit: float) -> None:
+        previous = int(self.limit)
+        self.limit = limit
+        if int(limit) != previous:
+            self.history.append((time.time(), limit))
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                self.in_flight += 1
+
+
+def _create_rate_limit_table(connection: sqlite3.Connection) -> None:
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS spotify_rate_limit ("
+        "id INTEGER PRIMARY KEY CHECK (id = 1), "
+        "blocked_until REAL NOT NULL, tokens REAL NOT NULL, "
+        "updated REAL NOT NULL)"
+    )
+    connection.execute(
+        "INSERT OR IGNORE INTO spotify_rate_limit VALUES (1, 0, -1, 0)"
+    )
+
+
+def _extend_backoff(connection: sqlite3.Connection, until: float) -> None:
+    with connection:
+        connection.execute(
+            "UPDATE spotify_rate_limit SET blocked_until = "
+            "MAX(blocked_until, ?) WHERE id = 1",
+            (until,),
+        )
+
+
+def _take_tokens(
+    connection: sqlite3.Connection, rate: float, burst: int, count: int
+) -> Tuple[int, float]:
+    with connection:
+        connection.execute("BEGIN IMMEDIATE")
+        tokens, updated = connection.execute(
+            "SELECT tokens, updated FROM spotify_rate_limit WHERE id = 1"
+        ).fetchone()
+        now = time.time()
+
+        # A negative number of tokens marks a new bucket
+        if tokens < 0:
+            tokens = float(burst)
+        else:
+            tokens = min(float(burst), tokens + max(0.0, now - updated) * rate)
+        granted = min(count, int(tokens))
+        tokens -= granted
+        connection.execute(
+            "UPDATE spotify_rate_limit SET tokens = ?, updated = ? "
+            "WHERE id = 1",
+            (tokens, now),
+        )
+    return granted, 0.0 if granted else (1 - tokens) / rate
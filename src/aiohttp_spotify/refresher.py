@@ -0,0 +1,242 @@
+__all__ = ["TokenRefresher"]
+
+import asyncio
+import heapq
+import logging
+import random
+import time
+from typing import (
+    TYPE_CHECKING,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from aiohttp import ClientResponseError, ClientSession
+
+if TYPE_CHECKING:
+    from .api import SpotifyAuth, SpotifyClient
+
+logger = logging.getLogger("aiohttp_spotify")
+
+OnRefresh = Callable[[str, "SpotifyAuth"], Awaitable[None]]
+
+
+class TokenRefresher:
+    """Refresh the access tokens of many users before they expire
+
+    The tracked authorizations are kept in a heap ordered by their refresh
+    time and a background task refreshes each one ``lead_time`` seconds
+    (plus some random jitter) before it expires, so that requests made on
+    behalf of the users almost never have to wait for a refresh. Tokens
+    that live for less than the lead time are refreshed halfway through
+    their remaining lifetime instead.
+
+    Pass the refresher as the ``token_refresher`` of the
+    :class:`SpotifyClient` that makes the requests so that the client uses
+    the refreshed tokens instead of refreshing the old ones again.
+
+    Args:
+        on_refresh (Callable, optional): Called as ``on_refresh(key, auth)``
+            with each new authorization so that it can be stored
+        lead_time (float, optional): How many seconds before expiry the
+            tokens are refreshed
+        jitter (float, optional): The maximum number of seconds randomly
+            added to the lead time to spread out refreshes
+        concurrency (int, optional): The maximum number of refreshes in
+            flight at once
+        retry_delay (float, optional): How many seconds to wait before
+            retrying a failed refresh
+
+    """
+
+    def __init__(
+        self,
+        *,
+        on_refresh: Optional[OnRefresh] = None,
+        lead_time: float = 300.0,
+        jitter: float = 60.0,
+        concurrency: int = 10,
+        retry_delay: float = 30.0,
+    ):
+        self.on_refresh = on_refresh
+        self.lead_time = lead_time
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.retry_delay = retry_delay
+
+        self._auths: Dict[str, "SpotifyAuth"] = {}
+        self._latest: Dict[str, "SpotifyAuth"] = {}
+        self._heap: List[Tuple[float, int, str, "SpotifyAuth"]] = []
+        self._counter = 0
+        self._tasks: Set["asyncio.Future[None]"] = set()
+        self._runner: Optional["asyncio.Future[None]"] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._auths)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._auths
+
+    def get(self, key: str) -> Optional["SpotifyAuth"]:
+        """Get the latest authorization for a user
+
+        Args:
+            key (str): The key of the user
+
+        Returns:
+            Optional[SpotifyAuth]: The authorization or None if the user
+            isn't tracked
+
+        """
+        return self._auths.get(key)
+
+    def latest(self, refresh_token: str) -> Optional["SpotifyAuth"]:
+        """Get the latest tracked authorization for a refresh token
+
+        Args:
+            refresh_token (str): The refresh token
+
+        Returns:
+            Optional[SpotifyAuth]: The authorization or None if no user with
+            this refresh token is tracked
+
+        """
+        return self._latest.get(refresh_token)
+
+    def track(self, auth: "SpotifyAuth", key: Optional[str] = None) -> str:
+        """Start refreshing the authorization of a user
+
+        Args:
+            auth (SpotifyAuth): The current authorization
+            key (str, optional): The key identifying the user. Defaults to
+                the refresh token.
+
+        Returns:
+            str: The key
+
+        """
+        if key is None:
+            key = auth.refresh_token
+        self._auths[key] = auth
+        self._latest[auth.refresh_token] = auth
+
+        # Short-lived tokens would otherwise be due as soon as they're issued
+        now = time.time()
+        refresh_at = max(
+            auth.expires_at - self.lead_time - random.uniform(0, self.jitter),
+            now + (auth.expires_at - now) / 2,
+        )
+        self._schedule(refresh_at, key, auth)
+        return key
+
+    def untrack(self, key: str) -> None:
+        """Stop refreshing the authorization of a user
+
+        Args:
+            key (str): The key identifying the user
+
+        """
+        auth = self._auths.pop(key, None)
+        if auth is not None and self._latest.get(auth.refresh_token) == auth:
+            del self._latest[auth.refresh_token]
+
+    def start(self, client: "SpotifyClient", session: ClientSession) -> None:
+        """Start refreshing in the background
+
+        Args:
+            client (SpotifyClient): The client used to refresh the tokens
+            session (ClientSession): A session for executing HTTP requests
+
+        """
+        if self._runner is not None:
+            raise RuntimeError("The refresher is already running")
+        self._wakeup = asyncio.Event()
+        self._runner = asyncio.ensure_future(self._run(client, session))
+
+    async def stop(self) -> None:
+        """Stop refreshing and cancel the refreshes in flight"""
+        tasks = list(self._tasks)
+        if self._runner is not None:
+            tasks.append(self._runner)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._runner = None
+        self._wakeup = None
+
+    def _schedule(
+        self, refresh_at: float, key: str, auth: "SpotifyAuth"
+    ) -> None:
+        # The counter breaks ties so that the auths are never compared
+        self._counter += 1
+        heapq.heappush(self._heap, (refresh_at, self._counter, key, auth))
+        if self._wakeup is not None and self._heap[0][2] == key:
+            self._wakeup.set()
+
+    async def _run(
+        self, client: "SpotifyClient", session: ClientSession
+    ) -> None:
+        assert self._wakeup is not None
+        semaphore = asyncio.Semaphore(self.concurrency)
+        while True:
+            self._wakeup.clear()
+            while self._heap and self._heap[0][0] <= time.time():
+                _, _, key, auth = heapq.heappop(self._heap)
+
+                # Skip the entries that have been replaced or untracked
+                if self._auths.get(key) != auth:
+                    continue
+
+                await semaphore.acquire()
+                task = asyncio.ensure_future(
+                    self._refresh(client, session, key, auth)
+                )
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                task.add_done_callback(lambda _: semaphore.release())
+
+            delay = None
+            if self._heap:
+                delay = max(0.0, self._heap[0][0] - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refresh(
+        self,
+        client: "SpotifyClient",
+        session: ClientSession,
+        key: str,
+        auth: "SpotifyAuth",
+    ) -> None:
+        try:
+            new_auth = await client.update_auth(session, auth)
+        except ClientResponseError as error:
+            if error.status in (400, 401):
+                logger.warning(
+                    "Giving up on refreshing a revoked token: %s", error
+                )
+                if self._auths.get(key) == auth:
+                    self.untrack(key)
+                return
+            logger.warning("Failed to refresh a token: %s", error)
+            self._schedule(time.time() + self.retry_delay, key, auth)
+            return
+        except Exception as error:
+            logger.warning("Failed to refresh a token: %s", error)
+            self._schedule(time.time() + self.retry_delay, key, auth)
+            return
+
+        # Don't overwrite an auth that was replaced in the meantime
+        if self._auths.get(key) != auth:
+            return
+        self.track(new_auth, key)
+        if self.on_refresh is not None:
+            await self.on_refresh(key, new_auth)
@@ -0,0 +1,47 @@
+__all__ = ["RetryPolicy"]
+
+import random
+from typing import FrozenSet, NamedTuple
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+
+class RetryPolicy(NamedTuple):
+    """How failed requests to the API are retried
+
+    Requests using one of ``methods`` are retried when the API responds
+    with one of ``statuses``, or when the connection fails or times out. The
+    delay before each retry grows exponentially and is randomized so that
+    clients that failed together don't all retry together.
+
+    Args:
+        max_retries (int, optional): The number of times that a request is
+            retried before giving up
+        backoff (float, optional): The delay in seconds before the first
+            retry; this is doubled for each subsequent retry
+        max_backoff (float, optional): The maximum delay in seconds
+        jitter (float, optional): The fraction of each delay that is
+            randomized, between 0 (a fixed delay) and 1 (a delay chosen
+            uniformly between zero and the full delay)
+        statuses (FrozenSet[int], optional): The response statuses to retry
+        methods (FrozenSet[str], optional): The HTTP methods that are safe to
+            retry
+
+    """
+
+    max_retries: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 10.0
+    jitter: float = 1.0
+    statuses: FrozenSet[int] = RETRY_STATUSES
+    methods: FrozenSet[str] = IDEMPOTENT_METHODS
+
+    def should_retry(self, method: str, retries: int) -> bool:
+        """True if a failed request can be retried another time"""
+        return retries < self.max_retries and method.upper() in self.methods
+
+    def delay(self, retries: int) -> float:
+        """The delay in seconds before retrying after ``retries`` retries"""
+        delay = min(self.max_backoff, self.backoff * 2**retries)
+        return delay * (1 - self.jitter * random.random())
@@ -0,0 +1,214 @@
+__all__ = ["RequestScheduler", "RequestShed"]
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Hashable, Optional, Sequence
+
+
+class RequestShed(Exception):
+    """Raised for queued requests that were dropped after a rate limit"""
+
+
+class RequestScheduler:
+    """Share a concurrency budget between requests of different priorities
+
+    At most ``concurrency`` requests hold a slot at once. When a slot is
+    released, it is given to a waiting request of the highest priority, and
+    requests of the same priority are served round robin between their keys
+    (e.g. users) so that one busy key can't starve the others.
+
+    When the API responds with a 429, :func:`throttle` pauses every priority
+    except the highest for longer than the ``Retry-After`` window, and the
+    requests that are queued for those priorities can be dropped instead.
+
+    Args:
+        concurrency (int, optional): The maximum number of requests in
+            flight at once
+        priorities (Sequence[str], optional): The priority classes, from
+            the highest to the lowest
+        backoff_factor (float, optional): How much longer than the
+            ``Retry-After`` window the lower priorities are paused
+        shed_on_rate_limit (bool, optional): If True, the requests queued
+            for the lower priorities fail with :class:`RequestShed` when the
+            API responds with a 429
+
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 10,
+        priorities: Sequence[str] = ("interactive", "background"),
+        *,
+        backoff_factor: float = 2.0,
+        shed_on_rate_limit: bool = False,
+    ):
+        if concurrency < 1:
+            raise ValueError("The 'concurrency' must be at least 1")
+        if not priorities:
+            raise ValueError("At least one priority class is required")
+        self.concurrency = concurrency
+        self.priorities = tuple(priorities)
+        self.backoff_factor = backoff_factor
+        self.shed_on_rate_limit = shed_on_rate_limit
+        self.active = 0
+
+        # The waiters for each priority, grouped by key in round robin order
+        self._queues: Dict[
+            str, "OrderedDict[Hashable, Deque[asyncio.Future[None]]]"
+        ] = {priority: OrderedDict() for priority in self.priorities}
+        self._paused_until = {priority: 0.0 for priority in self.priorities}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._resume_at = 0.0
+
+    def queued(self, priority: Optional[str] = None) -> int:
+        """The number of requests waiting for a slot
+
+        Args:
+            priority (str, optional): Only count the requests with this
+                priority
+
+        """
+        priorities = self.priorities if priority is None else (priority,)
+        return sum(
+            len(waiters)
+            for priority in priorities
+            for waiters in self._queues[priority].values()
+        )
+
+    @asynccontextmanager
+    async def slot(
+        self, priority: Optional[str] = None, key: Hashable = None
+    ) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the ``async with`` block
+
+        Args:
+            priority (str, optional): The priority class of the request;
+                defaults to the highest
+            key (Hashable, optional): The key that the request is queued
+                under, for fairness within its priority
+
+        """
+        await self.acquire(priority, key)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(
+        self, priority: Optional[str] = None, key: Hashable = None
+    ) -> None:
+        """Wait for a slot; each call must be paired with :func:`release`
+
+        Raises:
+            RequestShed: If the request was dropped after a rate limit
+
+        """
+        if priority is None:
+            priority = self.priorities[0]
+        elif priority not in self._queues:
+            raise ValueError(f"Unknown priority '{priority}'")
+
+        if self.active < self.concurrency and self._ready(priority):
+            self.active += 1
+            return
+
+        future: "asyncio.Future[None]" = (
+            asyncio.get_running_loop().create_future()
+        )
+        waiters = self._queues[priority].setdefault(key, deque())
+        waiters.append(future)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # We were given a slot just as we were cancelled
+                self.release()
+            elif future in waiters:
+                waiters.remove(future)
+                if not waiters and self._queues[priority].get(key) is waiters:
+                    del self._queues[priority][key]
+            raise
+
+    def release(self) -> None:
+        """Release a slot"""
+        self.active -= 1
+        self._dispatch()
+
+    def throttle(self, delay: float) -> None:
+        """Pause the lower priorities after a rate limit
+
+        Args:
+            delay (float): The length of the rate limit window in seconds
+
+        """
+        until = time.monotonic() + delay * self.backoff_factor
+        for priority in self.priorities[1:]:
+            self._paused_until[priority] = max(
+                self._paused_until[priority], until
+            )
+            if self.shed_on_rate_limit:
+                queue = self._queues[priority]
+                for waiters in queue.values():
+                    for future in waiters:
+                        if not future.done():
+                            future.set_exception(
+                                RequestShed("Dropped after a rate limit")
+                            )
+                queue.clear()
+        self._dispatch()
+
+    def _ready(self, priority: str) -> bool:
+        # True if a new request with this priority can skip the queue
+        if self._paused_until[priority] > time.monotonic():
+            return False
+        for other in self.priorities:
+            if self._queues[other]:
+                return False
+            if other == priority:
+                break
+        return True
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        resume_at = None
+        for priority in self.priorities:
+            queue = self._queues[priority]
+            if not queue:
+                continue
+            paused_until = self._paused_until[priority]
+            if paused_until > now:
+                if resume_at is None or paused_until < resume_at:
+                    resume_at = paused_until
+                continue
+
+            while queue and self.active < self.concurrency:
+                key, waiters = next(iter(queue.items()))
+                future = waiters.popleft()
+                if waiters:
+                    queue.move_to_end(key)
+                else:
+                    del queue[key]
+                if not future.done():
+                    future.set_result(None)
+                    self.active += 1
+
+            if self.active >= self.concurrency:
+                return
+
+        # Wake up when the first paused priority can run again
+        if resume_at is not None and (
+            self._timer is None or self._resume_at > resume_at
+        ):
+            if self._timer is not None:
+                self._timer.cancel()
+            self._resume_at = resume_at
+            self._timer = asyncio.get_running_loop().call_later(
+                resume_at - now, self._resume
+            )
+
+    def _resume(self) -> None:
+        self._timer = None
+        self._dispatch()
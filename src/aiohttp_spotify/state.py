@@ -0,0 +1,96 @@
+__all__ = ["OAuthState"]
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Optional, Union
+
+
+class OAuthState:
+    """Sign the OAuth ``state`` so that it can be verified without a session
+
+    The state carries a nonce, the URL to redirect to after the flow and an
+    expiry time, and it is signed using HMAC-SHA256. The nonce is also set
+    as a cookie on the browser that started the flow, so that the callback
+    can check that it is the same browser without a session store.
+
+    Args:
+        secret (Union[str, bytes]): The key used to sign the states; this
+            must be kept secret and shared by all of the app's workers
+        max_age (float, optional): The number of seconds that a state is
+            valid for
+
+    """
+
+    def __init__(self, secret: Union[str, bytes], max_age: float = 600.0):
+        if isinstance(secret, str):
+            secret = secret.encode()
+        if not secret:
+            raise ValueError("The 'secret' must not be empty")
+        self._secret = secret
+        self.max_age = max_age
+
+    def encode(self, nonce: str, target_url: Optional[str] = None) -> str:
+        """Build a signed state
+
+        Args:
+            nonce (str): A random string that is also stored on the browser
+            target_url (str, optional): Where to redirect after the flow
+
+        Returns:
+            str: The state for the OAuth URL
+
+        """
+        payload = json.dumps(
+            dict(n=nonce, r=target_url, e=time.time() + self.max_age),
+            separators=(",", ":"),
+        ).encode()
+        return _b64encode(payload) + "." + _b64encode(self._sign(payload))
+
+    def decode(
+        self, state: Optional[str], nonce: Optional[str]
+    ) -> Optional[str]:
+        """Verify a state returned to the callback
+
+        Args:
+            state (Optional[str]): The state from the callback
+            nonce (Optional[str]): The nonce stored on the browser
+
+        Raises:
+            ValueError: If the state is missing, invalid or expired, or it
+                doesn't match the nonce
+
+        Returns:
+            Optional[str]: The URL to redirect to after the flow
+
+        """
+        if not state or not nonce:
+            raise ValueError("Missing state")
+        try:
+            encoded_payload, encoded_signature = state.split(".")
+            payload = _b64decode(encoded_payload)
+            signature = _b64decode(encoded_signature)
+        except ValueError:
+            raise ValueError("Malformed state")
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            raise ValueError("Invalid state signature")
+
+        data = json.loads(payload)
+        if data["e"] < time.time():
+            raise ValueError("Expired state")
+        if not hmac.compare_digest(data["n"].encode(), nonce.encode()):
+            raise ValueError("The state doesn't match this browser")
+        return data["r"]
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self._secret, payload, hashlib.sha256).digest()
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
@@ -0,0 +1,338 @@
+__all__ = ["TokenStore", "MemoryTokenStore", "SQLiteTokenStore"]
+
+import asyncio
+import logging
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from ._sqlite import SQLiteExecutor
+from .api import SpotifyAuth
+
+logger = logging.getLogger("aiohttp_spotify")
+
+Listener = Callable[[str, Optional[SpotifyAuth]], None]
+
+
+class TokenStore(ABC):
+    """The interface for storing authorizations
+
+    The client uses the refresh token as the key so that an access token
+    refreshed by one client (or process) can be reused by the others instead
+    of being refreshed again.
+
+    """
+
+    def __init__(self) -> None:
+        self._listeners: List[Listener] = []
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[SpotifyAuth]:
+        """Get the stored authorization
+
+        Args:
+            key (str): The key of the authorization
+
+        Returns:
+            Optional[SpotifyAuth]: The authorization or None if it isn't
+            stored
+
+        """
+
+    @abstractmethod
+    async def set(self, key: str, auth: SpotifyAuth) -> None:
+        """Store an authorization
+
+        Args:
+            key (str): The key of the authorization
+            auth (SpotifyAuth): The authorization
+
+        """
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove an authorization
+
+        Args:
+            key (str): The key of the authorization
+
+        """
+
+    async def start(self) -> None:
+        """Start any background work, like watching for changes"""
+
+    async def close(self) -> None:
+        """Write any pending changes and release the resources"""
+
+    def subscribe(self, listener: Listener) -> None:
+        """Register a function called when an authorization changes
+
+        Args:
+            listener (Callable): Called as ``listener(key, auth)`` where
+                ``auth`` is None if the authorization was deleted
+
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener) -> None:
+        """Remove a function registered using :func:`subscribe`"""
+        self._listeners.remove(listener)
+
+    def _notify(self, key: str, auth: Optional[SpotifyAuth]) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(key, auth)
+            except Exception:
+                logger.exception("A token store listener failed")
+
+
+class MemoryTokenStore(TokenStore):
+    """An in-process store with least recently used eviction
+
+    On its own, this store is only shared by the clients in one process. With
+    a ``backend`` (e.g. :class:`SQLiteTokenStore`), it is a cache in front of
+    that store: the writes go through to the backend and the changes made by
+    other processes are picked up using the notifications of the backend.
+
+    Args:
+        max_size (int, optional): The maximum number of authorizations kept
+            in memory
+        backend (TokenStore, optional): The store to cache
+
+    """
+
+    def __init__(
+        self, max_size: int = 10000, backend: Optional[TokenStore] = None
+    ):
+        super().__init__()
+        self.max_size = max_size
+        self.backend = backend
+        self._auths: "OrderedDict[str, SpotifyAuth]" = OrderedDict()
+        if backend is not None:
+            backend.subscribe(self._on_backend_change)
+
+    def __len__(self) -> int:
+        return len(self._auths)
+
+    async def get(self, key: str) -> Optional[SpotifyAuth]:
+        auth = self._auths.get(key)
+        if auth is not None:
+            self._auths.move_to_end(key)
+            return auth
+        if self.backend is None:
+            return None
+        auth = await self.backend.get(key)
+        if auth is not None:
+            self._remember(key, auth)
+        return auth
+
+    async def set(self, key: str, auth: SpotifyAuth) -> None:
+        self._remember(key, auth)
+        self._notify(key, auth)
+        if self.backend is not None:
+            await self.backend.set(key, auth)
+
+    async def delete(self, key: str) -> None:
+        self._auths.pop(key, None)
+        self._notify(key, None)
+        if self.backend is not None:
+            await self.backend.delete(key)
+
+    async def start(self) -> None:
+        if self.backend is not None:
+            await self.backend.start()
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+
+    def _remember(self, key: str, auth: SpotifyAuth) -> None:
+        self._auths[key] = auth
+        self._auths.move_to_end(key)
+        while len(self._auths) > self.max_size:
+            self._auths.popitem(last=False)
+
+    def _on_backend_change(self, key: str, auth: Optional[SpotifyAuth]):
+        current = self._auths.get(key)
+        if auth is None:
+            self._auths.pop(key, None)
+        elif current is not None and current != auth:
+            # Only refresh the entries that are already cached
+            self._auths[key] = auth
+        else:
+            return
+        self._notify(key, auth)
+
+
+class SQLiteTokenStore(TokenStore):
+    """A store backed by a SQLite database shared between processes
+
+    Writes are collected for ``flush_interval`` seconds (or until there are
+    ``max_batch`` of them) and written in a single transaction. While the
+    store is started, the database is polled for changes made by other
+    processes and the listeners are notified about them; the store's own
+    writes were already reported when they were made, so they are skipped.
+
+    Args:
+        path (str): The path to the database file
+        flush_interval (float, optional): How long to wait before writing
+            a batch of changes
+        max_batch (int, optional): The maximum number of changes per batch
+        poll_interval (float, optional): How often to check for changes made
+            by other processes
+
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        flush_interval: float = 0.05,
+        max_batch: int = 500,
+        poll_interval: float = 1.0,
+    ):
+        super().__init__()
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.poll_interval = poll_interval
+
+        self._db = SQLiteExecutor(path, _create_tokens_table)
+        self._pending: Dict[str, Optional[SpotifyAuth]] = {}
+        self._flush: Optional["asyncio.Future[None]"] = None
+        self._poller: Optional["asyncio.Future[None]"] = None
+        self._version = 0
+
+        # The versions of the rows written by this store that haven't been
+        # polled yet
+        self._written: Set[int] = set()
+
+    async def get(self, key: str) -> Optional[SpotifyAuth]:
+        if key in self._pending:
+            return self._pending[key]
+        rows = await self._db.fetch(
+            "SELECT access_token, refresh_token, expires_at "
+            "FROM spotify_tokens WHERE key = ? AND access_token IS NOT NULL",
+            (key,),
+        )
+        return SpotifyAuth(*rows[0]) if rows else None
+
+    async def set(self, key: str, auth: SpotifyAuth) -> None:
+        self._write(key, auth)
+
+    async def delete(self, key: str) -> None:
+        self._write(key, None)
+
+    async def flush(self) -> None:
+        """Write the pending changes now"""
+        # This always goes through the database thread so that it also waits
+        # for any batch that is already being written
+        pending, self._pending = self._pending, {}
+        versions = await self._db.run(_write_tokens, list(pending.items()))
+        if self._poller is not None:
+            self._written.update(versions)
+
+    async def start(self) -> None:
+        if self._poller is None:
+            rows = await self._db.fetch(
+                "SELECT COALESCE(MAX(version), 0) FROM spotify_tokens"
+            )
+            self._version = rows[0][0]
+            self._poller = asyncio.ensure_future(self._poll())
+
+    async def close(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+        if self._flush is not None:
+            self._flush.cancel()
+            await asyncio.gather(self._flush, return_exceptions=True)
+            self._flush = None
+        await self.flush()
+        await self._db.close()
+
+    def _write(self, key: str, auth: Optional[SpotifyAuth]) -> None:
+        self._pending[key] = auth
+        self._notify(key, auth)
+        if len(self._pending) >= self.max_batch:
+            if self._flush is not None:
+                self._flush.cancel()
+            self._flush = asyncio.ensure_future(self._flush_later(0.0))
+        elif self._flush is None:
+            self._flush = asyncio.ensure_future(
+                self._flush_later(self.flush_interval)
+            )
+
+    async def _flush_later(self, delay: float) -> None:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._flush = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Failed to write the tokens to the database")
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                rows = await self._db.fetch(
+                    "SELECT key, access_token, refresh_token, expires_at, "
+                    "version FROM spotify_tokens WHERE version > ? "
+                    "ORDER BY version",
+                    (self._version,),
+                )
+            except Exception:
+                logger.exception("Failed to poll the token database")
+                continue
+            for key, access_token, refresh_token, expires_at, version in rows:
+                self._version = max(self._version, version)
+                if version in self._written or key in self._pending:
+                    continue
+                if access_token is None:
+                    self._notify(key, None)
+                else:
+                    self._notify(
+                        key,
+                        SpotifyAuth(access_token, refresh_token, expires_at),
+                    )
+            self._written = {v for v in self._written if v > self._version}
+
+
+def _create_tokens_table(connection: sqlite3.Connection) -> None:
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS spotify_tokens ("
+        "key TEXT PRIMARY KEY, access_token TEXT, "
+        "refresh_token TEXT, expires_at INTEGER, "
+        "version INTEGER NOT NULL)"
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS spotify_tokens_version "
+        "ON spotify_tokens (version)"
+    )
+
+
+def _write_tokens(
+    connection: sqlite3.Connection,
+    changes: List[Tuple[str, Optional[SpotifyAuth]]],
+) -> range:
+    if not changes:
+        return range(0)
+    with connection:
+        # Take the write lock before reading the latest version
+        connection.execute("BEGIN IMMEDIATE")
+        (version,) = connection.execute(
+            "SELECT COALESCE(MAX(version), 0) FROM spotify_tokens"
+        ).fetchone()
+        connection.executemany(
+            "INSERT OR REPLACE INTO spotify_tokens "
+            "(key, access_token, refresh_token, expires_at, version) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (key, *(auth or (None, None, None)), version + n + 1)
+                for n, (key, auth) in enumerate(changes)
+            ],
+        )
+    return range(version + 1, version + len(changes) + 1)
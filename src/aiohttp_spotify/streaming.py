@@ -0,0 +1,266 @@
+__all__ = ["SpotifyStream", "JSONArrayScanner"]
+
+import codecs
+import json
+import re
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from aiohttp import StreamReader
+
+if TYPE_CHECKING:
+    from .api import SpotifyAuth
+
+_TOKEN = re.compile(r'[\[\]{},"]')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+_WHITESPACE = re.compile(r"[ \t\n\r]+")
+
+
+class SpotifyStream:
+    """A response from the API whose body hasn't been read yet
+
+    Attributes:
+        auth_changed (bool): True if the authorization was updated
+        auth (SpotifyAuth): The latest authorization information
+        status (int): The status code of the response
+        headers (Mapping[str, str]): The headers of the response
+        content (StreamReader): The body of the response
+
+    """
+
+    def __init__(
+        self,
+        auth_changed: bool,
+        auth: "SpotifyAuth",
+        status: int,
+        headers: Mapping[str, str],
+        content: StreamReader,
+        *,
+        loads: Callable[[Union[bytes, str]], Any] = json.loads,
+    ):
+        self.auth_changed = auth_changed
+        self.auth = auth
+        self.status = status
+        self.headers = headers
+        self.content = content
+        self.loads = loads
+
+    async def iter_chunks(
+        self, chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        """Iterate over the raw body in chunks
+
+        Args:
+            chunk_size (int, optional): The maximum size of each chunk
+
+        """
+        while True:
+            chunk = await self.content.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    async def iter_items(
+        self,
+        key: Union[str, Sequence[str]] = "items",
+        *,
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[Any]:
+        """Decode the elements of a JSON array in the body one at a time
+
+        Only the elements completed by the latest chunk of the body are held
+        in memory at once.
+
+        Args:
+            key (str or Sequence[str], optional): The key of the array in the
+                top level object, or a sequence of keys for nested arrays
+                (e.g. ``("tracks", "items")`` for search results). Use an
+                empty sequence if the body is an array itself.
+            chunk_size (int, optional): The number of bytes read at a time
+
+        Raises:
+            ValueError: If the body ends before the end of the array
+
+        """
+        scanner = JSONArrayScanner(
+            (key,) if isinstance(key, str) else key, loads=self.loads
+        )
+        async for chunk in self.iter_chunks(chunk_size):
+            for item in scanner.feed(chunk):
+                yield item
+            if scanner.done:
+                return
+        if scanner.started:
+            raise ValueError("The response ended inside of the JSON array")
+
+    async def json(self) -> Any:
+        """Read the rest of the body and parse it as JSON"""
+        return self.loads(await self.content.read())
+
+
+class JSONArrayScanner:
+    """An incremental decoder for the elements of a JSON array
+
+    The document is fed in arbitrary chunks and each element of the array at
+    ``path`` is decoded as soon as it is complete. Everything outside of that
+    array is skipped without being decoded.
+
+    Args:
+        path (Sequence[str]): The keys leading to the array
+        loads (Callable, optional): The function used to decode each
+            element. Defaults to ``json.loads``.
+
+    Attributes:
+        started (bool): True once the start of the array has been found
+        done (bool): True once the end of the array has been found
+
+    """
+
+    def __init__(
+        self,
+        path: Sequence[str],
+        *,
+        loads: Callable[[Union[bytes, str]], Any] = json.loads,
+    ):
+        self.path = list(path)
+        self.loads = loads
+        self.started = False
+        self.done = False
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._stack: List[List[Any]] = []
+        self._expect_key = False
+        self._expect_item = True
+
+    def feed(self, data: bytes) -> List[Any]:
+        """Add the next chunk of the document
+
+        Args:
+            data (bytes): The chunk
+
+        Raises:
+            ValueError: If the array is malformed
+
+        Returns:
+            List[Any]: The elements completed by this chunk
+
+        """
+        buf = self._buffer = self._buffer + self._text.decode(data)
+        pos = self._pos
+        items = []
+        while not self.done:
+            if self.started:
+                pos = _skip_whitespace(buf, pos)
+                if pos == len(buf):
+                    break
+                if buf[pos] == "]":
+                    self.done = True
+                    break
+                if not self._expect_item:
+                    if buf[pos] != ",":
+                        raise ValueError(f"Expected ',' at {buf[pos:][:20]}")
+                    pos += 1
+                    self._expect_item = True
+                    continue
+
+                # Find the end of the element and decode it all at once
+                end = _value_end(buf, pos)
+                if end is None:
+                    break
+                items.append(self.loads(buf[pos:end]))
+                pos = end
+                self._expect_item = False
+                continue
+
+            match = _TOKEN.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+            char = match.group()
+            index = match.start()
+
+            # Skip over strings, keeping track of object keys on the way
+            if char == '"':
+                string = _STRING.match(buf, index)
+                if string is None:
+                    pos = index
+                    break
+                pos = string.end()
+                if self._expect_key:
+                    self._stack[-1][1] = json.loads(string.group())
+                    self._expect_key = False
+                continue
+            pos = index + 1
+
+            if char == "{":
+                self._stack.append([char, None])
+                self._expect_key = True
+            elif char == "[":
+                if self._at_target():
+                    self.started = True
+                else:
+                    self._stack.append([char, None])
+            elif char in "}]":
+                self._stack.pop()
+                self._expect_key = False
+            elif char == ",":
+                self._expect_key = self._stack[-1][0] == "{"
+
+        # Drop everything that has already been consumed
+        self._buffer = buf[pos:]
+        self._pos = 0
+        return items
+
+    def _at_target(self) -> bool:
+        if len(self._stack) != len(self.path):
+            return False
+        return all(
+            char == "{" and key == name
+            for (char, key), name in zip(self._stack, self.path)
+        )
+
+
+def _value_end(text: str, pos: int) -> Optional[int]:
+    # The end of the JSON value starting at pos, or None if it's incomplete.
+    # Numbers and literals only end at the next ',' or ']'.
+    depth = 0
+    while True:
+        match = _TOKEN.search(text, pos)
+        if match is None:
+            return None
+        char = match.group()
+        index = match.start()
+        if char == '"':
+            string = _STRING.match(text, index)
+            if string is None:
+                return None
+            pos = string.end()
+            if not depth:
+                return pos
+            continue
+        pos = index + 1
+        if char in "[{":
+            depth += 1
+        elif char in "]}":
+            if not depth:
+                return index
+            depth -= 1
+            if not depth:
+                return pos
+        elif not depth:
+            return index
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    match = _WHITESPACE.match(text, pos)
+    return pos if match is None else match.end()
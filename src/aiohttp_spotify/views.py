@@ -1,10 +1,10 @@
-__all__ = ["routes"]
+__all__ = ["routes", "metrics", "ready"]
 
 import logging
 import secrets
 from typing import Any, MutableMapping, Optional, Union
 
-from aiohttp import ClientSession, web
+from aiohttp import ClientError, web
 
 from . import api
 
@@ -23,6 +23,9 @@ except ImportError:
 
 routes = web.RouteTableDef()
 
+# The cookie that holds the nonce of a signed OAuth state
+STATE_COOKIE = "spotify_state_nonce"
+
 
 async def get_session(
     request: web.Request,
@@ -38,6 +41,23 @@ async def get_session(
 
 @routes.get("/auth", name="auth")
 async def auth(request: web.Request) -> web.Response:
+    signer = request.app.get("spotify_state_signer")
+    if signer is not None:
+        # Carry the target in the signed state instead of the session
+        nonce = secrets.token_urlsafe()
+        state = signer.encode(nonce, request.query.get("redirect"))
+        location = request.app["spotify_client"].get_oauth_url(state=state)
+        response = web.HTTPTemporaryRedirect(location=str(location))
+        response.set_cookie(
+            STATE_COOKIE,
+            nonce,
+            max_age=int(signer.max_age),
+            httponly=True,
+            samesite="Lax",
+            secure=request.secure,
+        )
+        return response
+
     session = await get_session(request)
     session["spotify_target_url"] = request.query.get("redirect")
 
@@ -53,28 +73,85 @@ async def auth(request: web.Request) -> web.Response:
 
 @routes.get("/callback", name="callback")
 async def callback(request: web.Request) -> web.Response:
+    if STATE_COOKIE not in request.cookies:
+        return await handle_callback(request)
+
+    # The nonce can only be used once, so expire it whatever the outcome to
+    # stop the signed state from being replayed
+    try:
+        response = await handle_callback(request)
+    except web.HTTPException as exception:
+        exception.del_cookie(STATE_COOKIE)
+        raise
+    response.del_cookie(STATE_COOKIE)
+    return response
+
+
+async def handle_callback(request: web.Request) -> web.Response:
     error = request.query.get("error")
     if error is not None:
-        print(f"error: {error}")
+        logger.info("Spotify authorization failed: %s", error)
+        record_callback(request, "error")
         return await handle_error(request, error)
 
     code = request.query.get("code")
     if code is None:
+        record_callback(request, "invalid_request")
         return await handle_error(request)
 
-    session = await get_session(request)
-
     # Check that the 'state' matches
-    state = session.pop("spotify_state", None)
+    signer = request.app.get("spotify_state_signer")
     returned_state = request.query.get("state")
-    if state is not None and state != returned_state:
-        return await handle_error(request)
+    target_url = None
+    if signer is not None:
+        try:
+            target_url = signer.decode(
+                returned_state, request.cookies.get(STATE_COOKIE)
+            )
+        except ValueError as error:
+            logger.info("Invalid OAuth state: %s", error)
+            record_callback(request, "invalid_state")
+            return await handle_error(request)
+    else:
+        session = await get_session(request)
+        state = session.pop("spotify_state", None)
+        if state is not None and state != returned_state:
+            record_callback(request, "invalid_state")
+            return await handle_error(request)
+        target_url = session.get("spotify_target_url")
+
+    # Request the tokens using the app's pooled session
+    try:
+        auth = await request.app["spotify_client"].get_auth(
+            request.app["spotify_client_session"], code
+        )
+    except ClientError:
+        record_callback(request, "token_error")
+        raise
 
-    # Construct the request to get the tokens
-    async with ClientSession(raise_for_status=True) as client:
-        auth = await request.app["spotify_client"].get_auth(client, code)
+    record_callback(request, "success")
 
-    return await handle_success(request, auth)
+    return await handle_success(request, auth, target_url)
+
+
+async def metrics(request: web.Request) -> web.Response:
+    return web.Response(
+        text=request.app["spotify_metrics"].render_prometheus(),
+        content_type="text/plain",
+        headers={"X-Content-Type-Options": "nosniff"},
+    )
+
+
+async def ready(request: web.Request) -> web.Response:
+    if request.app["spotify_ready"].is_set():
+        return web.Response(text="ready")
+    return web.Response(status=503, text="warming up")
+
+
+def record_callback(request: web.Request, outcome: str) -> None:
+    metrics = request.app.get("spotify_metrics")
+    if metrics is not None:
+        metrics.increment("spotify_oauth_callbacks_total", outcome=outcome)
 
 
 async def handle_error(
@@ -91,8 +168,18 @@ async def handle_error(
 
 
 async def handle_success(
-    request: web.Request, auth: api.SpotifyAuth
+    request: web.Request,
+    auth: api.SpotifyAuth,
+    target_url: Optional[str] = None,
 ) -> web.Response:
+    store = request.app.get("spotify_token_store")
+    if store is not None:
+        await store.set(auth.refresh_token, auth)
+
+    refresher = request.app.get("spotify_token_refresher")
+    if refresher is not None:
+        refresher.track(auth)
+
     handler = request.app.get("spotify_handle_auth")
     if handler is not None:
         await handler(request, auth)
@@ -101,8 +188,6 @@ async def handle_success(
     if handler is not None:
         return await handler(request, auth)
 
-    session = await get_session(request)
-    target_url = session.get("spotify_target_url")
     if target_url is None:
         target_url = request.app["spotify_default_redirect"]
         if target_url is None:
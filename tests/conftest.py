@@ -1,10 +1,11 @@
 import secrets
+import time
 
 import pytest
 from aiohttp import web
 
 import aiohttp_spotify
-from aiohttp_spotify.mock_api import mock_api_app
+from aiohttp_spotify.mock_api import issue_tokens, mock_api_app
 
 
 @pytest.fixture
@@ -28,6 +29,8 @@ def client(loop, aiohttp_client, aiohttp_unused_port):
         auth_url=f"{api_url}/authorize",
         token_url=f"{api_url}/token",
         api_url=f"{api_url}/api",
+        metrics=aiohttp_spotify.SpotifyMetrics(),
+        metrics_route=True,
     )
 
     app.add_subapp("/spotify", spotify_app)
@@ -36,3 +39,47 @@ def client(loop, aiohttp_client, aiohttp_unused_port):
     return loop.run_until_complete(
         aiohttp_client(app, server_kwargs={"port": port})
     )
+
+
+@pytest.fixture
+def api(loop, aiohttp_client):
+    client_id = secrets.token_urlsafe()
+    client_secret = secrets.token_urlsafe()
+    app = mock_api_app(client_id, client_secret, "/callback", seed=1)
+    test_client = loop.run_until_complete(aiohttp_client(app))
+    spotify = aiohttp_spotify.SpotifyClient(
+        client_id=client_id,
+        client_secret=client_secret,
+        token_url=str(test_client.make_url("/token")),
+        api_url=str(test_client.make_url("/api")),
+    )
+    tokens = issue_tokens(app)
+    auth = aiohttp_spotify.SpotifyAuth(
+        tokens["access_token"],
+        tokens["refresh_token"],
+        int(time.time()) + tokens["expires_in"],
+    )
+    return test_client, spotify, auth
+
+
+@pytest.fixture
+def auth():
+    return aiohttp_spotify.SpotifyAuth("a", "r", int(time.time()) + 3600)
+
+
+@pytest.fixture
+def stub_api(aiohttp_client):
+    # Serve the given routes and build a client for the API under "/api"
+    async def make(*routes, **options):
+        app = web.Application()
+        app.router.add_routes(routes)
+        test_client = await aiohttp_client(app)
+        spotify = aiohttp_spotify.SpotifyClient(
+            client_id="id",
+            client_secret="secret",
+            api_url=str(test_client.make_url("/api")),
+            **options,
+        )
+        return test_client, spotify
+
+    return make
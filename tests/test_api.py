@@ -0,0 +1,295 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+import aiohttp_spotify
+from aiohttp_spotify.mock_api import issue_tokens
+
+
+async def test_update_auth_single_flight(api):
+    test_client, spotify, _ = api
+    app = test_client.server.app
+    tokens = issue_tokens(app)
+    auth = aiohttp_spotify.SpotifyAuth(
+        tokens["access_token"], tokens["refresh_token"], int(time.time())
+    )
+    results = await asyncio.gather(
+        *(spotify.update_auth(test_client.session, auth) for _ in range(10))
+    )
+    assert app["stats"]["token_requests"] == 1
+    assert len({r.access_token for r in results}) == 1
+
+    # Late callers holding the old auth reuse the fresh one
+    late = await spotify.update_auth(test_client.session, auth)
+    assert late == results[0]
+    assert app["stats"]["token_requests"] == 1
+
+
+async def test_app_auth(api):
+    test_client, spotify, _ = api
+    app = test_client.server.app
+    track_id = next(iter(app["fixtures"]["tracks"]))
+
+    # Concurrent requests without a user share a single app token
+    responses = await asyncio.gather(
+        *(
+            spotify.request(test_client.session, None, f"/tracks/{track_id}")
+            for _ in range(10)
+        )
+    )
+    assert all(r.json()["id"] == track_id for r in responses)
+    assert app["stats"]["app_tokens"] == 1
+    auth = await spotify.get_app_auth(test_client.session)
+    assert auth.refresh_token == ""
+    assert app["stats"]["app_tokens"] == 1
+
+    # The token is requested again once it is about to expire
+    spotify._app_auth = auth._replace(expires_at=int(time.time()))
+    new_auth = await spotify.get_app_auth(test_client.session)
+    assert new_auth.access_token != auth.access_token
+    assert app["stats"]["app_tokens"] == 2
+
+    # User tokens without a refresh token are used as they are
+    tokens = issue_tokens(app, refresh=False)
+    user_auth = aiohttp_spotify.SpotifyAuth(
+        tokens["access_token"], "", int(time.time()) + 30
+    )
+    response = await spotify.request(test_client.session, user_auth, "/me")
+    assert response.status == 200
+    assert not response.auth_changed
+    assert response.auth == user_auth
+    assert app["stats"]["app_tokens"] == 2
+
+
+async def test_rate_limit_shared_backoff(stub_api, auth):
+    calls = []
+
+    async def handler(request):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        if len(calls) == 3:
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        return web.json_response({})
+
+    test_client, spotify = await stub_api(
+        web.get("/api/me", handler),
+        max_rate_limit_retries=1,
+        metrics=aiohttp_spotify.SpotifyMetrics(),
+    )
+
+    response = await spotify.request(test_client.session, auth, "/me")
+    assert response.status == 200
+    assert len(calls) == 2
+    metrics = spotify.metrics
+    assert metrics.get("spotify_rate_limited_total") == 1
+    assert metrics.get("spotify_retries_total", reason="rate_limit") == 1
+    assert metrics.get("spotify_request_seconds", method="GET") == 2
+
+    # The retry budget is bounded, but the backoff still applies
+    spotify.max_rate_limit_retries = 0
+    with pytest.raises(aiohttp.ClientResponseError):
+        await spotify.request(test_client.session, auth, "/me")
+    assert spotify.rate_limiter.blocked_for > 0
+
+
+async def test_retry_policy(stub_api, auth):
+    calls = []
+
+    async def handler(request):
+        calls.append(request.method)
+        if len(calls) == 1:
+            return web.Response(status=503)
+        if len(calls) in (2, 3):
+            # Drop the connection without responding; aiohttp retries this
+            # once on its own, so do it twice for the client to see it
+            request.transport.close()
+            return web.Response()
+        return web.json_response({})
+
+    test_client, spotify = await stub_api(
+        web.route("*", "/api/me", handler),
+        retry_policy=aiohttp_spotify.RetryPolicy(backoff=0.01),
+        metrics=aiohttp_spotify.SpotifyMetrics(),
+    )
+
+    response = await spotify.request(test_client.session, auth, "/me")
+    assert response.status == 200
+    assert len(calls) == 4
+    metrics = spotify.metrics
+    assert metrics.get("spotify_retries_total", reason="status") == 1
+    assert metrics.get("spotify_retries_total", reason="error") == 1
+
+    # Methods that aren't idempotent are never retried
+    calls.clear()
+    with pytest.raises(aiohttp.ClientResponseError):
+        await spotify.request(test_client.session, auth, "/me", method="POST")
+    assert calls == ["POST"]
+
+
+async def test_retry_body_errors(stub_api, auth):
+    calls = []
+
+    async def handler(request):
+        calls.append(request.method)
+        if len(calls) > 1:
+            return web.json_response({})
+
+        # Drop the connection part way through the body
+        response = web.StreamResponse(headers={"Content-Length": "100"})
+        await response.prepare(request)
+        await response.write(b'{"id": ')
+        request.transport.close()
+        return response
+
+    test_client, spotify = await stub_api(
+        web.get("/api/me", handler),
+        retry_policy=aiohttp_spotify.RetryPolicy(backoff=0.01),
+        metrics=aiohttp_spotify.SpotifyMetrics(),
+    )
+
+    response = await spotify.request(test_client.session, auth, "/me")
+    assert response.json() == {}
+    assert len(calls) == 2
+    metrics = spotify.metrics
+    assert metrics.get("spotify_retries_total", reason="error") == 1
+
+
+async def test_deadline(stub_api, auth):
+    async def handler(request):
+        return web.Response(status=429, headers={"Retry-After": "10"})
+
+    async def slow(request):
+        await asyncio.sleep(10)
+        return web.json_response({})
+
+    test_client, spotify = await stub_api(
+        web.route("*", "/api/me", handler),
+        web.get("/api/slow", slow),
+        retry_policy=aiohttp_spotify.RetryPolicy(),
+        deadline=0.1,
+        dedupe_requests=True,
+    )
+
+    # Waiting out the rate limit would take us past the deadline
+    start = time.monotonic()
+    with pytest.raises(aiohttp.ClientResponseError) as error:
+        await spotify.request(test_client.session, auth, "/me", method="PUT")
+    assert error.value.status == 429
+
+    # Slow responses are cut off at the deadline
+    with pytest.raises(asyncio.TimeoutError):
+        await spotify.request(test_client.session, auth, "/slow")
+    with pytest.raises(asyncio.TimeoutError):
+        await spotify.request(
+            test_client.session, auth, "/slow", deadline=0.05
+        )
+
+    # Shared requests wait out the rate limit, but each caller gives up at
+    # its own deadline
+    with pytest.raises(asyncio.TimeoutError):
+        await spotify.request(test_client.session, auth, "/me")
+    assert time.monotonic() - start < 1
+    assert not spotify._inflight
+
+
+async def test_dedupe_deadlines(stub_api, auth):
+    release = asyncio.Event()
+
+    async def handler(request):
+        await release.wait()
+        return web.json_response({})
+
+    test_client, spotify = await stub_api(
+        web.get("/api/me", handler), dedupe_requests=True
+    )
+
+    # The first caller's deadline doesn't cut off the shared request
+    first = asyncio.ensure_future(
+        spotify.request(test_client.session, auth, "/me", deadline=0.05)
+    )
+    second = asyncio.ensure_future(
+        spotify.request(test_client.session, auth, "/me")
+    )
+    with pytest.raises(asyncio.TimeoutError):
+        await first
+    release.set()
+    assert (await second).json() == {}
+
+
+async def test_dedupe_requests(stub_api, auth):
+    calls = []
+    release = asyncio.Event()
+
+    async def handler(request):
+        calls.append(request.query.get("q"))
+        await release.wait()
+        return web.json_response({"q": request.query.get("q")})
+
+    test_client, spotify = await stub_api(
+        web.get("/api/search", handler), dedupe_requests=True
+    )
+
+    def search(q):
+        return asyncio.ensure_future(
+            spotify.request(
+                test_client.session, auth, "/search", params=dict(q=q)
+            )
+        )
+
+    tasks = [search("a") for _ in range(5)] + [search("b")]
+    await asyncio.sleep(0.05)
+    assert sorted(calls) == ["a", "b"]
+
+    # Cancelling one of the callers doesn't affect the others
+    tasks[0].cancel()
+    release.set()
+    responses = await asyncio.gather(*tasks[1:])
+    assert all(r.body is responses[0].body for r in responses[1:4])
+    assert all(r.json() == {"q": "a"} for r in responses[:4])
+    responses[0].json()["q"] = "changed"
+    assert responses[1].json() == {"q": "a"}
+    assert responses[-1].json() == {"q": "b"}
+    assert tasks[0].cancelled()
+    assert not spotify._inflight
+
+    # The request is cancelled once nobody is waiting for it
+    release.clear()
+    task = search("c")
+    await asyncio.sleep(0.05)
+    flight = next(iter(spotify._inflight.values()))
+    task.cancel()
+    await asyncio.gather(flight.task, return_exceptions=True)
+    assert flight.task.cancelled()
+    assert not spotify._inflight
+    release.set()
+
+
+async def test_rate_limiter_blocks_everyone():
+    limiter = aiohttp_spotify.RateLimiter()
+    limiter.backoff(0.05)
+    assert limiter.blocked_for > 0
+    start = time.monotonic()
+    await asyncio.gather(limiter.acquire(), limiter.acquire())
+    assert time.monotonic() - start >= 0.04
+
+
+def test_response_json_is_memoized():
+    calls = []
+
+    def loads(data):
+        calls.append(data)
+        return json.loads(data)
+
+    auth = aiohttp_spotify.SpotifyAuth("a", "r", 0)
+    response = aiohttp_spotify.SpotifyResponse(
+        False, auth, 200, {}, b'{"id": "me"}'
+    )
+    response.loads = loads
+    assert response.json() is response.json()
+    assert len(calls) == 1
+    assert aiohttp_spotify.fast_json_loads(response.body) == dict(id="me")
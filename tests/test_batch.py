@@ -0,0 +1,61 @@
+import asyncio
+import gc
+
+from aiohttp import web
+
+
+async def test_batch_loader(stub_api, auth):
+    batches = []
+
+    async def handler(request):
+        ids = request.query["ids"].split(",")
+        batches.append(ids)
+        tracks = [None if id == "x" else dict(id=id) for id in ids]
+        if "z" in ids:
+            tracks = tracks[:-1]
+        return web.json_response(dict(tracks=tracks))
+
+    test_client, spotify = await stub_api(web.get("/api/tracks", handler))
+    loader = spotify.batch_loader(
+        test_client.session, auth, "tracks", max_size=3
+    )
+
+    ids = ["a", "b", "c", "a", "d", "x", "e"]
+    results = await asyncio.gather(*(loader.load(id) for id in ids))
+    assert results == [None if id == "x" else dict(id=id) for id in ids]
+    assert sorted(map(len, batches)) == [3, 3]
+
+    # Missing results fail instead of leaving their callers waiting
+    results = await asyncio.gather(
+        *(loader.load(id) for id in ["y", "z", "w"]), return_exceptions=True
+    )
+    assert results[:2] == [dict(id="y"), dict(id="z")]
+    assert isinstance(results[2], ValueError)
+
+
+async def test_batch_loader_cancelled(stub_api, auth):
+    started = asyncio.Event()
+
+    async def handler(request):
+        started.set()
+        await asyncio.sleep(0.05)
+        return web.Response(status=404)
+
+    test_client, spotify = await stub_api(web.get("/api/tracks", handler))
+    loader = spotify.batch_loader(test_client.session, auth, "tracks")
+    errors = []
+    loop = asyncio.get_running_loop()
+    loop.set_exception_handler(lambda loop, context: errors.append(context))
+
+    # The request outlives its callers and its error isn't reported
+    task = asyncio.ensure_future(loader.load("a"))
+    await started.wait()
+    assert loader._pending
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    while loader._pending:
+        await asyncio.sleep(0.01)
+    del task
+    gc.collect()
+    loop.set_exception_handler(None)
+    assert not errors
@@ -0,0 +1,82 @@
+import aiohttp_spotify
+
+
+async def test_playlist(api):
+    test_client, spotify, auth = api
+    app = test_client.server.app
+    playlist_id, playlist = next(iter(app["fixtures"]["playlists"].items()))
+    size = len(playlist["items"])
+    uris = [track["uri"] for track in app["fixtures"]["tracks"].values()]
+    uris = uris[:250]
+
+    # Nothing is applied if the first chunk fails
+    app["error_rate"] = 1.0
+    result = await aiohttp_spotify.add_to_playlist(
+        spotify, test_client.session, auth, playlist_id, uris, position=1
+    )
+    assert not result.ok
+    assert result.resume_from == 0
+    assert result.chunks[0].status == 503
+    assert len(playlist["items"]) == size
+
+    app["error_rate"] = 0.0
+    result = await aiohttp_spotify.add_to_playlist(
+        spotify, test_client.session, auth, playlist_id, uris[:120], position=1
+    )
+    assert result.ok
+    result = await aiohttp_spotify.add_to_playlist(
+        spotify,
+        test_client.session,
+        auth,
+        playlist_id,
+        uris,
+        position=1,
+        start=120,
+    )
+    assert result.ok
+    assert [(c.start, c.stop) for c in result.chunks] == [
+        (120, 220),
+        (220, 250),
+    ]
+    assert result.snapshot_id == result.chunks[-1].snapshot_id
+    assert result.snapshot_id == playlist["playlist"]["snapshot_id"]
+    added = [item["track"]["uri"] for item in playlist["items"][1:251]]
+    assert added == uris
+
+    result = await aiohttp_spotify.remove_from_playlist(
+        spotify, test_client.session, auth, playlist_id, uris, concurrency=3
+    )
+    assert result.ok
+    assert len(result.chunks) == 3
+    assert not {item["track"]["uri"] for item in playlist["items"]} & set(uris)
+
+
+async def test_library(api):
+    test_client, spotify, auth = api
+    app = test_client.server.app
+    saved = app["fixtures"]["saved_tracks"]
+    ids = list(app["fixtures"]["tracks"])[:120]
+
+    result = await aiohttp_spotify.save_to_library(
+        spotify, test_client.session, auth, "tracks", ids
+    )
+    assert result.ok
+    assert len(result.chunks) == 3
+    assert set(ids) <= {item["track"]["id"] for item in saved}
+
+    # A bad ID fails its chunk, and we can resume from there
+    result = await aiohttp_spotify.remove_from_library(
+        spotify, test_client.session, auth, "tracks", ids[:60] + ["bad"]
+    )
+    assert result.resume_from == 50
+    assert result.chunks[-1].status == 400
+    result = await aiohttp_spotify.remove_from_library(
+        spotify,
+        test_client.session,
+        auth,
+        "tracks",
+        ids,
+        start=result.resume_from,
+    )
+    assert result.ok
+    assert not set(ids) & {item["track"]["id"] for item in saved}
@@ -0,0 +1,86 @@
+import time
+
+from aiohttp import web
+
+import aiohttp_spotify
+
+
+async def test_response_cache(stub_api, auth):
+    statuses = []
+    evict = []
+
+    async def handler(request):
+        if evict:
+            cache.clear()
+        if request.headers.get("If-None-Match") == '"v1"':
+            statuses.append(304)
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        statuses.append(200)
+        return web.json_response(
+            dict(id="me"),
+            headers={"ETag": '"v1"', "Cache-Control": "private, max-age=0"},
+        )
+
+    cache = aiohttp_spotify.ResponseCache(max_size=1024)
+    test_client, spotify = await stub_api(
+        web.get("/api/me", handler), cache=cache
+    )
+
+    for _ in range(3):
+        response = await spotify.request(test_client.session, auth, "/me")
+        assert response.status == 200
+        assert response.json() == dict(id="me")
+    assert statuses == [200, 304, 304]
+    assert len(cache) == 1
+
+    # If the entry is evicted during revalidation, the full response is
+    # requested again
+    evict.append(True)
+    response = await spotify.request(test_client.session, auth, "/me")
+    assert response.status == 200
+    assert response.json() == dict(id="me")
+    assert statuses[3:] == [304, 200]
+
+
+async def test_response_cache_is_per_user(stub_api):
+    async def handler(request):
+        return web.json_response(
+            dict(id=request.headers["Authorization"]),
+            headers={"Cache-Control": "private, max-age=60"},
+        )
+
+    cache = aiohttp_spotify.ResponseCache()
+    test_client, spotify = await stub_api(
+        web.get("/api/me", handler), cache=cache
+    )
+
+    # Auths without a refresh token don't share entries
+    expires_at = int(time.time()) + 3600
+    alice = aiohttp_spotify.SpotifyAuth("alice", "", expires_at)
+    bob = aiohttp_spotify.SpotifyAuth("bob", "", expires_at)
+    response = await spotify.request(test_client.session, alice, "/me")
+    assert response.json() == dict(id="Bearer alice")
+    response = await spotify.request(test_client.session, bob, "/me")
+    assert response.json() == dict(id="Bearer bob")
+    assert len(cache) == 2
+
+
+def test_response_cache_only_stores_success():
+    cache = aiohttp_spotify.ResponseCache()
+    headers = {"Cache-Control": "max-age=60", "ETag": '"v1"'}
+    assert cache.store("a", 304, headers, b"") is None
+    assert cache.store("b", 404, headers, b"{}") is None
+    assert len(cache) == 0
+
+
+def test_response_cache_eviction():
+    cache = aiohttp_spotify.ResponseCache(max_size=10)
+    headers = {"Cache-Control": "max-age=60"}
+    cache.store("a", 200, headers, b"12345")
+    cache.store("b", 200, headers, b"12345")
+    assert cache.get("a") is not None and cache.get("a").fresh
+    cache.store("c", 200, headers, b"12345")
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.size == 10
+    assert cache.store("d", 200, {"Cache-Control": "no-store"}, b"") is None
@@ -0,0 +1,137 @@
+import gzip
+import json
+
+import aiohttp_spotify
+
+
+def read_lines(path, compress=False):
+    with (gzip.open if compress else open)(path, "rb") as f:
+        return [json.loads(line) for line in f]
+
+
+async def test_export_library(api, tmp_path):
+    test_client, spotify, auth = api
+    fixtures = test_client.server.app["fixtures"]
+    directory = str(tmp_path / "user")
+
+    result = await aiohttp_spotify.export_library(
+        spotify, test_client.session, auth, directory, compress=True
+    )
+    assert result.ok
+    assert result.counts == dict(
+        saved_tracks=len(fixtures["saved_tracks"]),
+        playlists=len(fixtures["playlists"]),
+        followed_artists=len(fixtures["followed_artists"]),
+    )
+    saved = read_lines(tmp_path / "user" / "saved_tracks.ndjson.gz", True)
+    assert saved == fixtures["saved_tracks"]
+    followed = read_lines(
+        tmp_path / "user" / "followed_artists.ndjson.gz", True
+    )
+    assert [a["id"] for a in followed] == fixtures["followed_artists"]
+
+    # Finished exports are skipped
+    stats = test_client.server.app["stats"]
+    requests = stats["requests"]
+    result = await aiohttp_spotify.export_library(
+        spotify, test_client.session, auth, directory, compress=True
+    )
+    assert result.ok
+    assert stats["requests"] == requests
+
+
+async def test_export_resume(api, tmp_path):
+    test_client, spotify, auth = api
+    fixtures = test_client.server.app["fixtures"]
+    directory = tmp_path / "user"
+    directory.mkdir()
+
+    # Pretend that an earlier export stopped part way through a page
+    path = directory / "saved_tracks.ndjson"
+    head = b"".join(
+        json.dumps(item).encode() + b"\n"
+        for item in fixtures["saved_tracks"][:50]
+    )
+    path.write_bytes(head + b'{"partial')
+    followed = directory / "followed_artists.ndjson"
+    followed.write_bytes(b"\n" * 20)
+    checkpoint = dict(
+        saved_tracks=dict(count=50, size=len(head), after=None, done=False),
+        followed_artists=dict(
+            count=20,
+            size=20,
+            after=fixtures["followed_artists"][19],
+            done=False,
+        ),
+    )
+    (directory / "checkpoint.json").write_text(json.dumps(checkpoint))
+
+    result = await aiohttp_spotify.export_library(
+        spotify,
+        test_client.session,
+        auth,
+        str(directory),
+        collections=["saved_tracks", "followed_artists"],
+    )
+    assert result.ok
+    assert read_lines(path) == fixtures["saved_tracks"]
+    assert result.counts["followed_artists"] == len(
+        fixtures["followed_artists"]
+    )
+    lines = followed.read_bytes().splitlines()[20:]
+    assert [json.loads(line)["id"] for line in lines] == fixtures[
+        "followed_artists"
+    ][20:]
+
+
+async def test_export_users(api, tmp_path):
+    test_client, spotify, auth = api
+    bad_auth = auth._replace(access_token="invalid")
+    users = [("a", auth), ("b", auth), ("c", bad_auth)]
+    results = [
+        result
+        async for result in aiohttp_spotify.export_users(
+            spotify,
+            test_client.session,
+            iter(users),
+            str(tmp_path),
+            concurrency=2,
+            collections=["playlists"],
+        )
+    ]
+    assert sorted(result.key for result in results) == ["a", "b", "c"]
+    results = {result.key: result for result in results}
+    assert results["a"].ok and results["b"].ok
+    assert (tmp_path / "b" / "playlists.ndjson").exists()
+
+    # Failures are reported per user
+    assert not results["c"].ok
+    assert results["c"].error.status == 401
+
+
+async def test_export_resume_other_format(api, tmp_path):
+    test_client, spotify, auth = api
+    directory = tmp_path / "user"
+    directory.mkdir()
+    path = directory / "saved_tracks.ndjson"
+    path.write_bytes(b"{}\n")
+    checkpoint = dict(
+        saved_tracks=dict(
+            count=1, size=3, after=None, done=False, compress=False
+        )
+    )
+    (directory / "checkpoint.json").write_text(json.dumps(checkpoint))
+
+    # The unfinished export was started without compression
+    result = await aiohttp_spotify.export_library(
+        spotify,
+        test_client.session,
+        auth,
+        str(directory),
+        collections=["saved_tracks"],
+        compress=True,
+    )
+    assert isinstance(result.error, ValueError)
+    assert result.counts == dict(saved_tracks=1)
+    assert path.read_bytes() == b"{}\n"
+    assert not (directory / "saved_tracks.ndjson.gz").exists()
@@ -0,0 +1,64 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+import aiohttp_spotify
+
+np = pytest.importorskip("numpy")
+
+
+async def test_audio_features(api):
+    test_client, spotify, _ = api
+    app = test_client.server.app
+    ids = list(app["fixtures"]["tracks"])[:250] + ["missing"]
+    expected = app["fixtures"]["audio_features"]
+
+    features = await aiohttp_spotify.fetch_audio_features(
+        spotify, test_client.session, None, ids, concurrency=2
+    )
+    assert features.ids == ids
+    assert len(features.values) == len(ids)
+    assert app["stats"]["requests"] == 3
+
+    # Missing tracks are flagged and filled
+    assert features.found.sum() == sum(id in expected for id in ids)
+    row = features.rows["missing"]
+    assert not features.found[row]
+    assert np.isnan(features.values["tempo"][row])
+    assert features.values["key"][row] == -1
+
+    id = ids[10]
+    row = features.values[features.rows[id]]
+    assert features.found[features.rows[id]]
+    assert row["tempo"] == pytest.approx(expected[id]["tempo"])
+    assert row["duration_ms"] == expected[id]["duration_ms"]
+    assert features.values["energy"].dtype == np.float32
+
+
+async def test_failed_chunk_cancels_workers(stub_api, auth):
+    requests = []
+    release = asyncio.Event()
+
+    async def handler(request):
+        requests.append(request)
+        if len(requests) == 1:
+            await asyncio.sleep(0.01)
+            return web.Response(status=404)
+        await release.wait()
+        return web.json_response(dict(audio_features=[]))
+
+    test_client, spotify = await stub_api(
+        web.get("/api/audio-features", handler)
+    )
+    ids = [str(n) for n in range(500)]
+    with pytest.raises(aiohttp.ClientResponseError):
+        await aiohttp_spotify.fetch_audio_features(
+            spotify, test_client.session, auth, ids, concurrency=3
+        )
+
+    # The other workers are stopped instead of requesting the rest
+    release.set()
+    await asyncio.sleep(0.05)
+    assert len(requests) == 3
@@ -0,0 +1,68 @@
+import time
+
+import aiohttp
+import pytest
+
+
+async def test_endpoints(api):
+    test_client, spotify, auth = api
+    app = test_client.server.app
+    session = test_client.session
+
+    response = await spotify.request(session, auth, "/me")
+    assert response.json()["id"] == "mock_user"
+
+    ids = list(app["fixtures"]["tracks"])[:3] + ["missing"]
+    response = await spotify.request(
+        session, auth, "/tracks", params=dict(ids=",".join(ids))
+    )
+    tracks = response.json()["tracks"]
+    assert [t["id"] for t in tracks[:3]] == ids[:3]
+    assert tracks[3] is None
+
+    artist_id = tracks[0]["artists"][0]["id"]
+    response = await spotify.request(session, auth, f"/artists/{artist_id}")
+    assert response.json()["id"] == artist_id
+    with pytest.raises(aiohttp.ClientResponseError):
+        await spotify.request(session, auth, "/artists/missing")
+
+    playlist_id, playlist = next(iter(app["fixtures"]["playlists"].items()))
+    items = [
+        item
+        async for item in spotify.paginate(
+            session, auth, f"/playlists/{playlist_id}/tracks", limit=100
+        )
+    ]
+    assert items == playlist["items"]
+
+
+async def test_injected_failures(api):
+    test_client, spotify, auth = api
+    app = test_client.server.app
+    session = test_client.session
+
+    app["rate_limit"] = 1.0
+    app["retry_after"] = 0.01
+    spotify.max_rate_limit_retries = 2
+    with pytest.raises(aiohttp.ClientResponseError) as error:
+        await spotify.request(session, auth, "/me")
+    assert error.value.status == 429
+    assert app["stats"]["rate_limited"] == 3
+
+    app["rate_limit"] = 0.0
+    app["error_rate"] = 1.0
+    with pytest.raises(aiohttp.ClientResponseError) as error:
+        await spotify.request(session, auth, "/me")
+    assert error.value.status == 503
+
+    # Expired tokens are rejected until they are refreshed
+    app["error_rate"] = 0.0
+    app["access_tokens"][auth.access_token] = time.time() - 1
+    with pytest.raises(aiohttp.ClientResponseError) as error:
+        await spotify.request(session, auth, "/me")
+    assert error.value.status == 401
+    response = await spotify.request(
+        session, auth._replace(expires_at=0), "/me"
+    )
+    assert response.auth_changed
+    assert app["stats"]["refreshes"] == 1
@@ -0,0 +1,73 @@
+from aiohttp_spotify import ModelDecoder
+from aiohttp_spotify.models import Track, TrackItem
+
+
+def test_decode_paging():
+    artist = dict(id="ar", name="Artist", uri="spotify:artist:ar")
+    album = dict(
+        id="al",
+        name="Album",
+        uri="spotify:album:al",
+        album_type="album",
+        release_date="2020",
+        total_tracks=2,
+        artists=[artist],
+    )
+    items = [
+        dict(
+            added_at="2020-01-01T00:00:00Z",
+            track=dict(
+                id=f"t{n}",
+                name=f"Track {n}",
+                uri=f"spotify:track:t{n}",
+                duration_ms=1000,
+                album=album,
+                artists=[artist],
+            ),
+        )
+        for n in range(2)
+    ] + [dict(added_at=None, track=None)]
+
+    decoder = ModelDecoder()
+    page = decoder.paging(
+        dict(items=items, offset=0, limit=3, total=3, next=None),
+        decoder.track_item,
+    )
+    assert len(page.items) == 3
+    tracks = list(page.items)
+    assert isinstance(tracks[0], TrackItem)
+    assert isinstance(tracks[0].track, Track)
+    assert tracks[0].track.name == "Track 0"
+    assert tracks[0].track.album is tracks[1].track.album
+    assert tracks[0].track.artists[0] is tracks[1].track.album.artists[0]
+    assert tracks[2].track is None
+    assert page.items[1:] == tracks[1:]
+
+
+def test_decode_local_tracks():
+    def local_track(n):
+        return dict(
+            id=None,
+            name=f"Local {n}",
+            uri=f"spotify:local:Artist+{n}:Album+{n}:Local+{n}:100",
+            is_local=True,
+            album=dict(
+                id=None,
+                name=f"Album {n}",
+                uri=None,
+                album_type=None,
+                release_date=None,
+                artists=[],
+            ),
+            artists=[dict(id=None, name=f"Artist {n}", uri=None)],
+        )
+
+    decoder = ModelDecoder()
+    first, second = map(decoder.track, map(local_track, range(2)))
+    assert first.album.name == "Album 0"
+    assert second.album.name == "Album 1"
+    assert first.album.album_type == "album"
+    assert first.album.release_date == ""
+    assert first.artists[0].name == "Artist 0"
+    assert second.artists[0].name == "Artist 1"
+    assert not decoder.artists and not decoder.albums
@@ -1,4 +1,11 @@
+import asyncio
+
+import pytest
 import yarl
+from aiohttp import web
+
+import aiohttp_spotify
+from aiohttp_spotify.mock_api import mock_api_app
 
 
 async def test_redirect(client):
@@ -8,3 +15,151 @@ async def test_redirect(client):
     resp = await client.get("/spotify/auth")
     assert resp.status == 200
     assert yarl.URL(resp.url).path == "/spotify/callback"
+
+
+async def test_pooled_session(client):
+    await client.get("/spotify/auth")
+    session = client.app["spotify_app"]["spotify_client_session"]
+    assert session is not None
+    assert not session.closed
+
+    await client.get("/spotify/auth")
+    assert client.app["spotify_app"]["spotify_client_session"] is session
+
+
+async def test_metrics(client):
+    await client.get("/spotify/auth")
+    await client.get("/spotify/callback", params=dict(error="access_denied"))
+
+    metrics = client.app["spotify_app"]["spotify_metrics"]
+    assert metrics.get("spotify_oauth_callbacks_total", outcome="success") == 1
+    assert metrics.get("spotify_oauth_callbacks_total", outcome="error") == 1
+    assert metrics.get("spotify_request_transfer_seconds") == 1
+
+    resp = await client.get("/spotify/metrics")
+    assert resp.status == 200
+    text = await resp.text()
+    assert 'spotify_oauth_callbacks_total{outcome="success"} 1' in text
+    assert "# TYPE spotify_request_transfer_seconds histogram" in text
+
+
+async def test_transfer_includes_body(aiohttp_client):
+    async def handler(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b"[")
+        await asyncio.sleep(0.1)
+        await response.write(b"]")
+        return response
+
+    app = web.Application()
+    app.router.add_get("/slow", handler)
+    metrics = aiohttp_spotify.SpotifyMetrics()
+    client = await aiohttp_client(app, trace_configs=[metrics.trace_config()])
+
+    async with client.session.get(client.make_url("/slow")) as response:
+        assert await response.read() == b"[]"
+    histogram = metrics.histograms["spotify_request_transfer_seconds"][()]
+    assert histogram.count == 1
+    assert histogram.sum >= 0.1
+
+
+async def test_warm_up(aiohttp_client, aiohttp_unused_port):
+    port = aiohttp_unused_port()
+    api_url = f"http://localhost:{port}/api"
+    metrics = aiohttp_spotify.SpotifyMetrics()
+    app = web.Application()
+    app["spotify_app"] = spotify_app = aiohttp_spotify.spotify_app(
+        client_id="id",
+        client_secret="secret",
+        redirect_uri="/spotify/callback",
+        auth_url=f"{api_url}/authorize",
+        token_url=f"{api_url}/token",
+        api_url=f"{api_url}/api",
+        metrics=metrics,
+        warm_up=3,
+    )
+    app.add_subapp("/spotify", spotify_app)
+    client = await aiohttp_client(app, server_kwargs={"port": port})
+
+    await asyncio.wait_for(spotify_app["spotify_ready"].wait(), 5)
+    resp = await client.get("/spotify/ready")
+    assert resp.status == 200
+
+    # The API and token hosts are the same here
+    assert spotify_app["spotify_warm_up_urls"] == [f"http://localhost:{port}"]
+    assert metrics.get("spotify_connection_connect_seconds") == 3
+
+    # Later requests reuse the connections
+    session = spotify_app["spotify_client_session"]
+    async with session.get(f"{api_url}/token"):
+        pass
+    assert metrics.get("spotify_connection_connect_seconds") == 3
+
+
+async def test_signed_state(aiohttp_client, aiohttp_unused_port):
+    port = aiohttp_unused_port()
+    # The cookie must be sent back to the same host
+    api_url = f"http://127.0.0.1:{port}/api"
+    metrics = aiohttp_spotify.SpotifyMetrics()
+    app = web.Application()
+    app["spotify_app"] = spotify_app = aiohttp_spotify.spotify_app(
+        client_id="id",
+        client_secret="secret",
+        redirect_uri="/spotify/callback",
+        auth_url=f"{api_url}/authorize",
+        token_url=f"{api_url}/token",
+        api_url=f"{api_url}/api",
+        metrics=metrics,
+        state_secret="secret",
+    )
+    app.add_subapp("/spotify", spotify_app)
+    app.add_subapp("/api", mock_api_app("id", "secret", "/spotify/callback"))
+    client = await aiohttp_client(app, server_kwargs={"port": port})
+
+    # The target comes back in the state
+    resp = await client.get("/spotify/auth", params=dict(redirect="/done"))
+    assert yarl.URL(resp.url).path == "/done"
+    assert metrics.get("spotify_oauth_callbacks_total", outcome="success") == 1
+
+    assert not client.session.cookie_jar.filter_cookies(client.make_url("/"))
+
+    # The nonce is expired after the callback, so the state can't be reused
+    resp = await client.get("/spotify/auth", allow_redirects=False)
+    location = yarl.URL(resp.headers["Location"])
+    state = location.query["state"]
+    assert client.session.cookie_jar.filter_cookies(client.make_url("/"))
+    resp = await client.get(
+        "/spotify/callback", params=dict(error="access_denied", state=state)
+    )
+    assert resp.status == 500
+    assert not client.session.cookie_jar.filter_cookies(client.make_url("/"))
+    resp = await client.get(
+        "/spotify/callback", params=dict(code="code", state=state)
+    )
+    assert resp.status == 500
+
+    # Forged states are rejected
+    signer = aiohttp_spotify.OAuthState("other")
+    for state in ["bogus", signer.encode("nonce", "/evil")]:
+        resp = await client.get(
+            "/spotify/callback", params=dict(code="code", state=state)
+        )
+        assert resp.status == 500
+    assert (
+        metrics.get("spotify_oauth_callbacks_total", outcome="invalid_state")
+        == 3
+    )
+
+
+def test_oauth_state():
+    signer = aiohttp_spotify.OAuthState("secret", max_age=60)
+    state = signer.encode("nonce", "/target")
+    assert signer.decode(state, "nonce") == "/target"
+    for args in [(state, "other"), (state, None), (state[:-2], "nonce")]:
+        with pytest.raises(ValueError):
+            signer.decode(*args)
+
+    signer.max_age = -1
+    with pytest.raises(ValueError):
+        signer.decode(signer.encode("nonce"), "nonce")
@@ -0,0 +1,57 @@
+import asyncio
+
+from aiohttp import web
+
+
+async def test_paginate(stub_api, auth):
+    items = list(range(237))
+    offsets = []
+
+    async def handler(request):
+        offset = int(request.query["offset"])
+        limit = int(request.query["limit"])
+        offsets.append(offset)
+        await asyncio.sleep(0.01 * ((offset // limit) % 3))
+        return web.json_response(
+            dict(
+                items=items[offset : offset + limit],
+                offset=offset,
+                limit=limit,
+                total=len(items),
+                next=None,
+            )
+        )
+
+    test_client, spotify = await stub_api(web.get("/api/me/tracks", handler))
+
+    paginator = spotify.paginate(
+        test_client.session, auth, "/me/tracks", limit=20, concurrency=3
+    )
+    result = [item async for item in paginator]
+    assert result == items
+    assert paginator.total == len(items)
+    assert sorted(offsets) == list(range(0, len(items), 20))
+
+
+async def test_paginate_next_links(stub_api, auth):
+    async def first(request):
+        url = request.url.with_path("/api/me/following").with_query(page=2)
+        return web.json_response(dict(items=[1, 2], next=str(url)))
+
+    async def second(request):
+        assert request.query["page"] == "2"
+        url = request.url.with_path("/other/following")
+        return web.json_response(dict(items=[3], next=str(url)))
+
+    async def third(request):
+        return web.json_response(dict(items=[4], next=None))
+
+    test_client, spotify = await stub_api(
+        web.get("/api/following", first),
+        web.get("/api/me/following", second),
+        web.get("/other/following", third),
+    )
+
+    # Links outside of the API are requested as they are
+    paginator = spotify.paginate(test_client.session, auth, "/following")
+    assert [item async for item in paginator] == [1, 2, 3, 4]
@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+import aiohttp_spotify
+from aiohttp_spotify import (
+    AdaptiveLimiter,
+    RateLimiter,
+    SQLiteRateLimitCoordinator,
+)
+
+
+def test_incomplete_coordinator():
+    class Coordinator(aiohttp_spotify.ratelimit.RateLimitCoordinator):
+        async def blocked_until(self):
+            return 0.0
+
+    with pytest.raises(TypeError):
+        Coordinator()
+
+
+async def test_shared_backoff(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    coordinators = [SQLiteRateLimitCoordinator(path) for _ in range(2)]
+    first, second = (
+        RateLimiter(coordinator=coordinator, sync_interval=0.0)
+        for coordinator in coordinators
+    )
+    try:
+        await first.acquire()
+        first.backoff(0.2)
+        await asyncio.sleep(0.05)
+
+        start = time.monotonic()
+        await second.acquire()
+        assert time.monotonic() - start > 0.1
+    finally:
+        for coordinator in coordinators:
+            await coordinator.close()
+
+
+async def test_shared_budget(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    coordinators = [SQLiteRateLimitCoordinator(path) for _ in range(2)]
+    limiters = [
+        RateLimiter(rate=20, burst=2, coordinator=coordinator)
+        for coordinator in coordinators
+    ]
+    try:
+        start = time.monotonic()
+        await asyncio.gather(
+            *(limiter.acquire() for limiter in limiters for _ in range(3))
+        )
+        # Two requests are free and the other four share 20 per second
+        assert time.monotonic() - start > 0.15
+    finally:
+        for coordinator in coordinators:
+            await coordinator.close()
+
+
+async def test_adaptive_limiter():
+    limiter = AdaptiveLimiter(4, max_limit=6, latency_factor=3.0)
+
+    # The limit is enforced
+    started = [await limiter.acquire() for _ in range(4)]
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    # Fast, successful requests raise it
+    for start in started:
+        limiter.release(start, 0.01)
+    await waiter
+    assert 4 < limiter.limit < 6
+    limiter.release(await waiter, 0.01)
+    while limiter.limit < 6:
+        limiter.release(await limiter.acquire(), 0.01)
+    assert limiter.limit == 6
+
+    # A burst of rate limits only cuts it once
+    started = [await limiter.acquire() for _ in range(6)]
+    for start in started:
+        limiter.release(start, 0.01, congested=True)
+    assert limiter.limit == 3
+    assert [limit for _, limit in limiter.history][-1] == 3
+
+    # So do latency spikes
+    limiter.release(await limiter.acquire(), 1.0)
+    assert limiter.limit == 1.5
+    assert limiter.in_flight == 0
+
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(0)
+
+
+async def test_adaptive_limiter_cancel_race():
+    limiter = AdaptiveLimiter(1)
+    started = await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+
+    # A release that runs before the cancelled waiter resumes
+    waiter.cancel()
+    limiter.release(started)
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.in_flight == 0
+    assert not limiter._waiters
+
+
+async def test_adaptive_limiter_latency_shift():
+    limiter = AdaptiveLimiter(10)
+    for _ in range(200):
+        limiter.release(await limiter.acquire(), 0.05)
+    before = limiter.limit
+
+    # A lasting rise in latency cuts the limit a few times and then the
+    # clean responses raise it again
+    for _ in range(2000):
+        limiter.release(await limiter.acquire(), 0.2)
+    assert limiter.latency == pytest.approx(0.2)
+    assert limiter.limit > before
+
+
+async def test_client_adaptive_limiter(stub_api, auth):
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        if len(calls) == 1:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        return web.json_response({})
+
+    limiter = AdaptiveLimiter(8)
+    test_client, spotify = await stub_api(
+        web.get("/api/me", handler), concurrency_limiter=limiter
+    )
+
+    await spotify.request(test_client.session, auth, "/me")
+    assert len(calls) == 2
+    assert 4 < limiter.limit < 5
+    assert limiter.in_flight == 0
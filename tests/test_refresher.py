@@ -0,0 +1,118 @@
+import asyncio
+import secrets
+import time
+
+import aiohttp_spotify
+from aiohttp_spotify.mock_api import issue_tokens, mock_api_app
+
+
+async def test_refresh_ahead_of_expiry(aiohttp_client):
+    client_id = secrets.token_urlsafe()
+    client_secret = secrets.token_urlsafe()
+    app = mock_api_app(client_id, client_secret, "/callback")
+    test_client = await aiohttp_client(app)
+    spotify = aiohttp_spotify.SpotifyClient(
+        client_id=client_id,
+        client_secret=client_secret,
+        token_url=str(test_client.make_url("/token")),
+    )
+
+    refreshed = {}
+
+    async def on_refresh(key, auth):
+        refreshed[key] = auth
+
+    refresher = aiohttp_spotify.TokenRefresher(
+        on_refresh=on_refresh, lead_time=60, jitter=0, concurrency=2
+    )
+    users = []
+    for n in range(5):
+        tokens = issue_tokens(app)
+        auth = aiohttp_spotify.SpotifyAuth(
+            tokens["access_token"],
+            tokens["refresh_token"],
+            int(time.time()) + (-1 if n < 3 else 3600),
+        )
+        users.append(refresher.track(auth, key=f"user{n}"))
+
+    refresher.start(spotify, test_client.session)
+    try:
+        for _ in range(100):
+            if len(refreshed) == 3:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await refresher.stop()
+
+    assert sorted(refreshed) == users[:3]
+    assert app["stats"]["refreshes"] == 3
+    for key, auth in refreshed.items():
+        assert refresher.get(key) == auth
+        assert auth.expires_at > time.time() + 3000
+
+
+async def test_client_uses_refreshed_tokens(aiohttp_client):
+    client_id = secrets.token_urlsafe()
+    client_secret = secrets.token_urlsafe()
+    app = mock_api_app(client_id, client_secret, "/callback")
+    test_client = await aiohttp_client(app)
+    refresher = aiohttp_spotify.TokenRefresher(lead_time=60, jitter=0)
+    spotify = aiohttp_spotify.SpotifyClient(
+        client_id=client_id,
+        client_secret=client_secret,
+        token_url=str(test_client.make_url("/token")),
+        api_url=str(test_client.make_url("/api")),
+        token_refresher=refresher,
+    )
+    tokens = issue_tokens(app)
+    auth = aiohttp_spotify.SpotifyAuth(
+        tokens["access_token"], tokens["refresh_token"], int(time.time()) - 1
+    )
+    refresher.track(auth, key="user")
+
+    refresher.start(spotify, test_client.session)
+    try:
+        for _ in range(100):
+            if app["stats"]["refreshes"]:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await refresher.stop()
+    assert app["stats"]["refreshes"] == 1
+
+    # Callers still holding the old auth get the refreshed one after the
+    # client's own cache of refreshes is gone
+    spotify._refreshed.clear()
+    response = await spotify.request(test_client.session, auth, "/me")
+    assert response.auth_changed
+    assert response.auth == refresher.get("user")
+    assert app["stats"]["refreshes"] == 1
+
+
+async def test_short_lived_tokens(aiohttp_client):
+    client_id = secrets.token_urlsafe()
+    client_secret = secrets.token_urlsafe()
+    app = mock_api_app(client_id, client_secret, "/callback")
+    test_client = await aiohttp_client(app)
+    spotify = aiohttp_spotify.SpotifyClient(
+        client_id=client_id,
+        client_secret=client_secret,
+        token_url=str(test_client.make_url("/token")),
+    )
+
+    # Tokens that expire before the lead time aren't refreshed immediately
+    refresher = aiohttp_spotify.TokenRefresher(lead_time=300, jitter=0)
+    tokens = issue_tokens(app)
+    auth = aiohttp_spotify.SpotifyAuth(
+        tokens["access_token"], tokens["refresh_token"], int(time.time()) + 10
+    )
+    refresher.track(auth)
+    refresh_at = refresher._heap[0][0]
+    assert time.time() + 4 < refresh_at < auth.expires_at
+
+    refresher.start(spotify, test_client.session)
+    try:
+        await asyncio.sleep(0.1)
+    finally:
+        await refresher.stop()
+    assert app["stats"]["refreshes"] == 0
@@ -0,0 +1,125 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+import aiohttp_spotify
+
+
+async def test_priorities_and_fairness():
+    scheduler = aiohttp_spotify.RequestScheduler(concurrency=1)
+    order = []
+
+    async def run(priority, key, name):
+        async with scheduler.slot(priority, key):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await scheduler.acquire()
+    tasks = [
+        asyncio.ensure_future(run("background", "a", "a1")),
+        asyncio.ensure_future(run("background", "a", "a2")),
+        asyncio.ensure_future(run("background", "b", "b1")),
+        asyncio.ensure_future(run("interactive", "c", "c1")),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.queued() == 4
+    scheduler.release()
+    await asyncio.gather(*tasks)
+
+    # Interactive requests jump ahead and keys take turns
+    assert order == ["c1", "a1", "b1", "a2"]
+    assert scheduler.active == 0
+
+
+async def test_cancelled_waiter():
+    scheduler = aiohttp_spotify.RequestScheduler(concurrency=1)
+    await scheduler.acquire()
+    waiter = asyncio.ensure_future(scheduler.acquire())
+    other = asyncio.ensure_future(scheduler.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.sleep(0)
+    assert scheduler.queued() == 1
+    scheduler.release()
+    await other
+    assert scheduler.active == 1
+
+
+async def test_throttle():
+    scheduler = aiohttp_spotify.RequestScheduler(
+        concurrency=2, backoff_factor=1.0
+    )
+    scheduler.throttle(0.05)
+
+    # Background requests wait out the window, interactive ones don't
+    start = time.monotonic()
+    await scheduler.acquire("interactive")
+    assert time.monotonic() - start < 0.04
+    await scheduler.acquire("background")
+    assert time.monotonic() - start >= 0.04
+
+    # Or the queued background requests are dropped
+    scheduler.shed_on_rate_limit = True
+    waiter = asyncio.ensure_future(scheduler.acquire("background"))
+    await asyncio.sleep(0)
+    scheduler.throttle(1.0)
+    with pytest.raises(aiohttp_spotify.RequestShed):
+        await waiter
+    assert scheduler.active == 2
+
+
+async def test_client_scheduler(stub_api, auth):
+    active = []
+    peak = []
+
+    async def handler(request):
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.01)
+        active.pop()
+        return web.json_response({})
+
+    scheduler = aiohttp_spotify.RequestScheduler(concurrency=2)
+    test_client, spotify = await stub_api(
+        web.get("/api/me", handler),
+        scheduler=scheduler,
+        metrics=aiohttp_spotify.SpotifyMetrics(),
+        dedupe_requests=True,
+    )
+
+    await asyncio.gather(
+        *(
+            spotify.request(
+                test_client.session,
+                auth,
+                "/me",
+                params=dict(n=str(n)),
+                priority=p,
+            )
+            for n, p in enumerate(["interactive", "background"] * 5)
+        )
+    )
+    assert max(peak) == 2
+    assert scheduler.active == 0
+    metrics = spotify.metrics
+    assert (
+        metrics.get("spotify_scheduler_wait_seconds", priority="background")
+        == 5
+    )
+
+    # An interactive call doesn't join a paused background request
+    scheduler.throttle(1.0)
+    background = asyncio.ensure_future(
+        spotify.request(
+            test_client.session, auth, "/me", priority="background"
+        )
+    )
+    await asyncio.sleep(0.01)
+    start = time.monotonic()
+    await spotify.request(test_client.session, auth, "/me")
+    assert time.monotonic() - start < 0.5
+    assert not background.done()
+    background.cancel()
+    await asyncio.gather(background, return_exceptions=True)
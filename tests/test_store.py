@@ -0,0 +1,117 @@
+import asyncio
+import secrets
+import time
+
+import pytest
+
+import aiohttp_spotify
+from aiohttp_spotify import MemoryTokenStore, SpotifyAuth, SQLiteTokenStore
+from aiohttp_spotify.mock_api import issue_tokens, mock_api_app
+
+
+def test_incomplete_store():
+    class Store(aiohttp_spotify.TokenStore):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Store()
+
+
+async def test_memory_store_lru():
+    store = MemoryTokenStore(max_size=2)
+    changes = []
+    store.subscribe(lambda key, auth: changes.append(key))
+    for key in "abc":
+        await store.set(key, SpotifyAuth(key, key, 0))
+    assert len(store) == 2
+    assert await store.get("a") is None
+    assert (await store.get("c")).access_token == "c"
+    await store.delete("c")
+    assert await store.get("c") is None
+    assert changes == ["a", "b", "c", "c"]
+
+
+async def test_sqlite_store_shared(tmp_path):
+    path = str(tmp_path / "tokens.db")
+    options = dict(flush_interval=0.01, poll_interval=0.01)
+    first = MemoryTokenStore(backend=SQLiteTokenStore(path, **options))
+    second = MemoryTokenStore(backend=SQLiteTokenStore(path, **options))
+    await first.start()
+    await second.start()
+    try:
+        old = SpotifyAuth("old", "refresh", 0)
+        await first.set("refresh", old)
+        await first.backend.flush()
+        assert await second.get("refresh") == old
+
+        # A change in one process is seen by the cache in the other
+        new = old._replace(access_token="new")
+        await first.set("refresh", new)
+        for _ in range(100):
+            if await second.get("refresh") == new:
+                break
+            await asyncio.sleep(0.01)
+        assert await second.get("refresh") == new
+    finally:
+        await first.close()
+        await second.close()
+
+
+async def test_sqlite_store_skips_own_writes(tmp_path):
+    path = str(tmp_path / "tokens.db")
+    options = dict(flush_interval=0.0, poll_interval=0.01)
+    first = SQLiteTokenStore(path, **options)
+    second = SQLiteTokenStore(path, **options)
+    changes = {first: [], second: []}
+    for store, seen in changes.items():
+        store.subscribe(lambda key, auth, seen=seen: seen.append(key))
+    await first.start()
+    await second.start()
+    try:
+        await first.set("a", SpotifyAuth("a", "a", 0))
+        await first.flush()
+        for _ in range(100):
+            if changes[second]:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+    finally:
+        await first.close()
+        await second.close()
+
+    # The writer is only notified once, when it makes the change
+    assert changes[first] == ["a"]
+    assert changes[second] == ["a"]
+
+
+async def test_client_reuses_stored_refresh(aiohttp_client, tmp_path):
+    client_id = secrets.token_urlsafe()
+    client_secret = secrets.token_urlsafe()
+    app = mock_api_app(client_id, client_secret, "/callback")
+    test_client = await aiohttp_client(app)
+    path = str(tmp_path / "tokens.db")
+
+    stores = [SQLiteTokenStore(path, flush_interval=0.0) for _ in range(2)]
+    workers = [
+        aiohttp_spotify.SpotifyClient(
+            client_id=client_id,
+            client_secret=client_secret,
+            token_url=str(test_client.make_url("/token")),
+            token_store=store,
+        )
+        for store in stores
+    ]
+    tokens = issue_tokens(app)
+    auth = SpotifyAuth(
+        tokens["access_token"], tokens["refresh_token"], int(time.time())
+    )
+    try:
+        first = await workers[0].update_auth(test_client.session, auth)
+        await stores[0].flush()
+        second = await workers[1].update_auth(test_client.session, auth)
+    finally:
+        for store in stores:
+            await store.close()
+    assert first == second
+    assert app["stats"]["refreshes"] == 1
@@ -0,0 +1,58 @@
+import json
+
+from aiohttp import web
+
+import aiohttp_spotify
+
+
+def test_json_array_scanner():
+    doc = dict(
+        href="x[1]",
+        tracks=dict(
+            total=3,
+            items=[
+                dict(name='a "quoted" ]} nämé', n=[1, {"b": 2}]),
+                12345,
+                "text, with comma",
+                None,
+            ],
+            next=None,
+        ),
+        items=["not this one"],
+    )
+    data = json.dumps(doc, ensure_ascii=False).encode()
+    for size in (1, 3, 7, len(data)):
+        scanner = aiohttp_spotify.streaming.JSONArrayScanner(
+            ("tracks", "items")
+        )
+        items = []
+        for n in range(0, len(data), size):
+            items += scanner.feed(data[n : n + size])
+        assert scanner.done
+        assert items == doc["tracks"]["items"]
+
+
+async def test_stream(stub_api, auth):
+    items = [dict(id=n) for n in range(1000)]
+    decoded = []
+
+    def loads(data):
+        decoded.append(data)
+        return json.loads(data)
+
+    async def handler(request):
+        return web.json_response(dict(items=items, total=len(items)))
+
+    test_client, spotify = await stub_api(
+        web.get("/api/me/tracks", handler), json_loads=loads
+    )
+
+    async with spotify.stream(
+        test_client.session, auth, "/me/tracks"
+    ) as stream:
+        assert stream.status == 200
+        result = [item async for item in stream.iter_items(chunk_size=100)]
+    assert result == items
+
+    # The items are decoded by the client's decoder
+    assert len(decoded) == len(items)